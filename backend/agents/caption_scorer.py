@@ -0,0 +1,249 @@
+"""Deterministic pre-review scorer for generated captions.
+
+Scores a caption from local, platform-aware rules — quality violations,
+derivative format, CTA shape, character limit, hook fold position and
+hashtag count — in microseconds. Each failed rule adds a weighted penalty.
+
+Calibration against stored LLM review scores (scripts/calibrate_prescreen.py)
+finds the penalty levels at which the rules agree with the reviewer often
+enough to act alone: at or below ``pass_max_penalty`` the LLM review is
+skipped, at or above ``fail_min_penalty`` the review gate goes straight to a
+rewrite. Anything in between still gets an LLM review.
+"""
+
+import json
+import logging
+import re
+import statistics
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+
+from backend.agents.caption_text import char_limit, check_quality_violations, validate_format
+from backend.config import REVIEW_PRESCREEN_CALIBRATION
+from backend.platforms import get as get_platform
+
+logger = logging.getLogger(__name__)
+
+# Penalty per failed rule (quality violations count once each)
+_WEIGHTS = {
+    "quality_violation": 2,
+    "bad_format": 3,
+    "cta_mismatch": 2,
+    "over_char_limit": 2,
+    "hook_past_fold": 1,
+    "too_many_hashtags": 1,
+}
+
+# A review score at or above this passes the review gate
+_GATE_PASS_SCORE = 7
+
+_CONVERSION_RE = re.compile(
+    r"\b(?:book|dm|message us|link in (?:bio|comments)|visit|sign up|register|"
+    r"download|call us|shop|order|save this|grab)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class Calibration:
+    # None disables that verdict; the defaults always defer to the LLM review
+    pass_max_penalty: Optional[int] = None
+    fail_min_penalty: Optional[int] = None
+    # Review scores reported for skipped reviews (median LLM score per band)
+    pass_score: int = 7
+    fail_score: int = 4
+    samples: int = 0
+
+
+@dataclass
+class PrescreenResult:
+    penalty: int
+    verdict: str  # "pass" | "fail" | "review"
+    features: dict = field(default_factory=dict)
+    reasons: list[str] = field(default_factory=list)
+
+    def as_review(self, calibration: Calibration) -> dict:
+        """ReviewResult-shaped dict for a pass/fail verdict, marked ``source: prescreen``."""
+        score = calibration.pass_score if self.verdict == "pass" else calibration.fail_score
+        return {
+            "score": score,
+            "brand_alignment": "moderate",
+            "strengths": [],
+            "improvements": list(self.reasons),
+            # Approval always takes a real review
+            "approved": False,
+            "revision_notes": list(self.reasons) or None,
+            "engagement_scores": {
+                "hook_strength": 5,
+                "relevance": 5,
+                "cta_effectiveness": 5,
+                "platform_fit": 5,
+                "teaching_depth": 0,
+            },
+            "engagement_prediction": "medium",
+            "source": "prescreen",
+            "prescreen_penalty": self.penalty,
+        }
+
+
+def _closing(caption: str) -> str:
+    lines = [line.strip() for line in caption.strip().split("\n") if line.strip()]
+    return " ".join(lines[-2:]) if lines else ""
+
+
+def _cta_mismatch(caption: str, cta_type: Optional[str]) -> Optional[str]:
+    """Reason the closing lines don't match the assigned CTA type, or None."""
+    if not cta_type:
+        return None
+    closing = _closing(caption)
+    asks_question = "?" in closing
+    converts = bool(_CONVERSION_RE.search(closing))
+    if cta_type == "engagement" and (not asks_question or converts):
+        return "End with one conversational question and no conversion language (engagement CTA)."
+    if cta_type == "conversion" and not converts:
+        return "End with one clear action step such as book, DM, save or visit (conversion CTA)."
+    if cta_type in ("implied", "none") and (asks_question or converts):
+        return f"Remove the explicit call to action or closing question ({cta_type} CTA)."
+    return None
+
+
+def score_caption(
+    caption: str,
+    hashtags: list[str] | None,
+    platform: str,
+    derivative_type: str,
+    cta_type: Optional[str] = None,
+    calibration: Optional[Calibration] = None,
+) -> PrescreenResult:
+    """Score a caption against the local rules and classify it."""
+    spec = get_platform(platform)
+    features: dict = {}
+    reasons: list[str] = []
+
+    violations = check_quality_violations(caption, platform, derivative_type)
+    features["quality_violation"] = len(violations)
+    reasons.extend(f"Fix {v}" for v in violations)
+
+    features["bad_format"] = int(
+        derivative_type in ("carousel", "thread_hook", "pin") and not validate_format(caption, derivative_type)
+    )
+    if features["bad_format"]:
+        reasons.append(f"Follow the {derivative_type} structure exactly (labels/numbering are missing).")
+
+    cta_reason = _cta_mismatch(caption, cta_type)
+    features["cta_mismatch"] = int(cta_reason is not None)
+    if cta_reason:
+        reasons.append(cta_reason)
+
+    limit = char_limit(platform, derivative_type)
+    features["over_char_limit"] = int(bool(limit) and len(caption) > limit)
+    if features["over_char_limit"]:
+        reasons.append(f"Cut to under {limit} characters.")
+
+    first_line = caption.strip().split("\n", 1)[0]
+    features["hook_past_fold"] = int(bool(spec.fold_at) and len(first_line) > spec.fold_at)
+    if features["hook_past_fold"]:
+        reasons.append(f"Shorten the hook line to under {spec.fold_at} characters so it shows above the fold.")
+
+    features["too_many_hashtags"] = int(len(hashtags or []) > spec.hashtag_limit)
+    if features["too_many_hashtags"]:
+        reasons.append(f"Use at most {spec.hashtag_limit} hashtags.")
+
+    penalty = sum(_WEIGHTS[name] * value for name, value in features.items())
+    cal = calibration or get_calibration()
+    if cal.pass_max_penalty is not None and penalty <= cal.pass_max_penalty:
+        verdict = "pass"
+    elif cal.fail_min_penalty is not None and penalty >= cal.fail_min_penalty:
+        verdict = "fail"
+    else:
+        verdict = "review"
+    return PrescreenResult(penalty=penalty, verdict=verdict, features=features, reasons=reasons)
+
+
+def calibrate(
+    samples: list[tuple[int, int]],
+    min_precision: float = 0.95,
+    min_support: int = 20,
+) -> Calibration:
+    """Derive thresholds from (penalty, llm_score) pairs.
+
+    ``pass_max_penalty`` is the highest penalty at which captions scoring at
+    or below it passed the gate at least ``min_precision`` of the time;
+    ``fail_min_penalty`` the lowest at which those at or above it failed as
+    reliably. Either is None when too few samples support it.
+    """
+    if not samples:
+        return Calibration(pass_max_penalty=None, fail_min_penalty=None)
+    penalties = sorted({p for p, _ in samples})
+
+    pass_max = None
+    for p in penalties:
+        band = [s for q, s in samples if q <= p]
+        if len(band) >= min_support and sum(s >= _GATE_PASS_SCORE for s in band) / len(band) >= min_precision:
+            pass_max = p
+        elif len(band) >= min_support:
+            break
+
+    fail_min = None
+    for p in reversed(penalties):
+        band = [s for q, s in samples if q >= p]
+        if pass_max is not None and p <= pass_max:
+            break
+        if len(band) >= min_support and sum(s < _GATE_PASS_SCORE for s in band) / len(band) >= min_precision:
+            fail_min = p
+        elif len(band) >= min_support:
+            break
+
+    pass_scores = [s for q, s in samples if pass_max is not None and q <= pass_max]
+    fail_scores = [s for q, s in samples if fail_min is not None and q >= fail_min]
+    return Calibration(
+        pass_max_penalty=pass_max,
+        fail_min_penalty=fail_min,
+        pass_score=max(_GATE_PASS_SCORE, round(statistics.median(pass_scores))) if pass_scores else 7,
+        fail_score=min(_GATE_PASS_SCORE - 1, round(statistics.median(fail_scores))) if fail_scores else 4,
+        samples=len(samples),
+    )
+
+
+def save_calibration(calibration: Calibration, path: str = REVIEW_PRESCREEN_CALIBRATION) -> None:
+    with open(path, "w") as f:
+        json.dump({
+            "pass_max_penalty": calibration.pass_max_penalty,
+            "fail_min_penalty": calibration.fail_min_penalty,
+            "pass_score": calibration.pass_score,
+            "fail_score": calibration.fail_score,
+            "samples": calibration.samples,
+            "calibrated_at": datetime.now(timezone.utc).isoformat(),
+        }, f, indent=2)
+
+
+_calibration: Optional[Calibration] = None
+
+
+def get_calibration() -> Calibration:
+    """Thresholds from REVIEW_PRESCREEN_CALIBRATION, or the uncalibrated defaults.
+
+    Until scripts/calibrate_prescreen.py has written a calibration, every
+    caption still gets an LLM review.
+    """
+    global _calibration
+    if _calibration is None:
+        try:
+            with open(REVIEW_PRESCREEN_CALIBRATION) as f:
+                data = json.load(f)
+            _calibration = Calibration(
+                pass_max_penalty=data.get("pass_max_penalty"),
+                fail_min_penalty=data.get("fail_min_penalty"),
+                pass_score=int(data.get("pass_score", 7)),
+                fail_score=int(data.get("fail_score", 4)),
+                samples=int(data.get("samples", 0)),
+            )
+            logger.info("Loaded pre-review calibration from %d samples", _calibration.samples)
+        except FileNotFoundError:
+            _calibration = Calibration()
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning("Invalid pre-review calibration %s: %s — using defaults",
+                           REVIEW_PRESCREEN_CALIBRATION, e)
+            _calibration = Calibration()
+    return _calibration
@@ -0,0 +1,340 @@
+"""Caption text post-processing shared by generation, review and pre-review.
+
+Every generated caption goes through these helpers, several times per post
+across retries, so patterns are compiled once at import and the hot paths
+(mojibake repair, markdown stripping) avoid per-character Python loops.
+scripts/bench_caption_text.py compares them against the previous
+implementations for speed and output.
+"""
+
+import logging
+import re
+
+from backend.platforms import get as get_platform
+
+logger = logging.getLogger(__name__)
+
+# Common English stopwords that should never be hashtags
+_HASHTAG_STOPWORDS = frozenset({
+    "a", "an", "the", "and", "or", "but", "in", "on", "at", "to", "for",
+    "of", "is", "it", "by", "as", "be", "was", "are", "has", "had", "do",
+    "if", "my", "me", "we", "he", "she", "no", "so", "up", "out", "not",
+    "you", "your", "our", "its", "his", "her", "this", "that", "with",
+    "from", "here", "heres", "image", "post", "caption",
+})
+
+_VALID_HASHTAG_RE = re.compile(r"^[A-Za-z0-9_]+$")
+_CAMEL_PART_RE = re.compile(r"[a-zA-Z][a-z]*|[0-9]+")
+
+
+# ── Mojibake ─────────────────────────────────────────────────────────────────
+# UTF-8 text mis-decoded as CP1252 always contains one of these lead characters
+_MOJIBAKE_HINT_RE = re.compile("[âÃðÂ]")
+
+
+def _cp1252_table() -> tuple[str, dict[int, str]]:
+    chars: list[str] = []
+    byte_to_char: dict[int, str] = {}
+    for b in range(256):
+        try:
+            ch = bytes([b]).decode("cp1252")
+        except UnicodeDecodeError:
+            continue  # 0x81, 0x8D, 0x8F, 0x90, 0x9D are unassigned
+        chars.append(ch)
+        byte_to_char[b] = ch
+    # surrogateescape maps an undecodable byte b to U+DC00+b; map those back
+    # to the CP1252 character the byte came from
+    surrogates = {0xDC00 + b: ch for b, ch in byte_to_char.items() if b >= 0x80}
+    return "".join(chars), surrogates
+
+
+_CP1252_CHARS, _SURROGATE_TO_CP1252 = _cp1252_table()
+# Maximal runs of CP1252-encodable characters; everything else (real emoji,
+# CJK, ...) can't be mojibake and is kept as-is
+_CP1252_RUN_RE = re.compile("[" + re.escape(_CP1252_CHARS) + "]+")
+
+
+def _repair_run(match: re.Match) -> str:
+    run = match.group()
+    try:
+        decoded = run.encode("cp1252").decode("utf-8", errors="surrogateescape")
+    except (UnicodeDecodeError, UnicodeEncodeError):
+        return run
+    return decoded.translate(_SURROGATE_TO_CP1252)
+
+
+def fix_mojibake(text: str) -> str:
+    """Detect and repair UTF-8→CP1252 double-encoding artifacts (quotes, dashes, emojis).
+
+    Each run of CP1252-encodable characters is encoded back to CP1252 bytes
+    and decoded as UTF-8; bytes that don't form valid UTF-8 (real Latin text
+    such as é or ñ) map back to their original character through a lookup
+    table. Characters outside CP1252 (real emojis) are preserved as-is.
+    """
+    if not _MOJIBAKE_HINT_RE.search(text):
+        return text
+    return _CP1252_RUN_RE.sub(_repair_run, text)
+
+
+# ── Markdown ─────────────────────────────────────────────────────────────────
+# Passes run in this order, each on the previous one's output, so nested
+# emphasis unwinds (``**bold with *italic***`` → ``bold with italic``) and the
+# multi-line ``\s`` in the heading and bullet patterns still folds blank lines.
+# A pass is skipped when its marker character is absent, since it could not
+# match; that keeps the output identical to always running every pass.
+_MARKDOWN_PASSES = (
+    ("*", re.compile(r"\*\*(.+?)\*\*"), r"\1"),
+    ("*", re.compile(r"\*(.+?)\*"), r"\1"),
+    ("_", re.compile(r"__(.+?)__"), r"\1"),
+    ("_", re.compile(r"_(.+?)_"), r"\1"),
+    ("[", re.compile(r"\[(.+?)\]\(.+?\)"), r"\1"),
+    ("#", re.compile(r"^#{1,6}\s+", re.MULTILINE), ""),
+    ("*-", re.compile(r"^\s*[*\-]\s+", re.MULTILINE), ""),
+)
+_MARKDOWN_CHARS = frozenset("*_[#-")
+
+
+def strip_markdown(text: str) -> str:
+    """Remove markdown formatting that social platforms can't render."""
+    if _MARKDOWN_CHARS.isdisjoint(text):
+        return text
+    for markers, pattern, repl in _MARKDOWN_PASSES:
+        if any(m in text for m in markers):
+            text = pattern.sub(repl, text)
+    return text
+
+
+# ── Limits and hashtags ──────────────────────────────────────────────────────
+
+def char_limit(platform: str, derivative_type: str = "") -> int | None:
+    """Character limit for a platform/derivative pair, or None if unlimited."""
+    limits = get_platform(platform).char_limits
+    if not limits:
+        return None
+    return limits.get(derivative_type) or limits.get("default")
+
+
+def enforce_char_limit(caption: str, platform: str, derivative_type: str = "") -> str:
+    """Hard-truncate caption to platform char limit. Final safety net only."""
+    limit = char_limit(platform, derivative_type)
+    if not limit or len(caption) <= limit:
+        return caption
+    truncated = caption[: limit - 1]
+    last_space = truncated.rfind(" ")
+    if last_space > limit // 2:
+        truncated = truncated[:last_space]
+    return truncated + "…"
+
+
+def sanitize_hashtags(raw_tags: list[str], platform: str) -> list[str]:
+    """Clean and validate hashtags, enforcing per-platform limits."""
+    limit = get_platform(platform).hashtag_limit
+    clean: list[str] = []
+    for tag in raw_tags:
+        if len(clean) >= limit:
+            break
+        tag = tag.strip().lstrip("#").strip()
+        if len(tag) < 3:
+            continue
+        if tag.lower() in _HASHTAG_STOPWORDS:
+            continue
+        if not _VALID_HASHTAG_RE.match(tag):
+            continue
+        # Mastodon: CamelCase hashtags for screen reader accessibility
+        if platform == "mastodon":
+            tag = "".join(word.capitalize() for word in _CAMEL_PART_RE.findall(tag))
+        clean.append(tag)
+    return clean
+
+
+# ── Format and quality checks ────────────────────────────────────────────────
+
+def validate_format(caption: str, derivative_type: str) -> bool:
+    """Check if the caption follows the expected derivative format. Log warnings on mismatch."""
+    if derivative_type == "carousel":
+        ok = "Slide 1" in caption and "Slide 2" in caption
+        if not ok:
+            logger.warning("Carousel caption missing Slide 1/2 structure")
+        return ok
+    if derivative_type == "thread_hook":
+        ok = "1/" in caption or "1)" in caption
+        if not ok:
+            logger.warning("Thread caption missing numbered format (1/, 2/...)")
+        return ok
+    if derivative_type == "pin":
+        ok = "PIN TITLE" in caption.upper() or "PIN DESCRIPTION" in caption.upper()
+        if not ok:
+            logger.warning("Pin caption missing PIN TITLE / PIN DESCRIPTION labels")
+        return ok
+    return True
+
+
+# Regex safety net for literal quality violations
+_BANNED_OPENERS_RE = re.compile(
+    r"^(?:"
+    r"Are you\b|"
+    r"Did you know\b|"
+    r"What if\b|"
+    r"In today'?s\b|"
+    r"As a [a-z]|"
+    r"When it comes to\b|"
+    r"Here'?s the thing\b|"
+    r"The truth is\b|"
+    r"Let me tell you\b|"
+    r"Still [a-z]+ing\b|"
+    r"[A-Z][a-z]+ won'?t tell you\b|"
+    r"You might be [a-z]+ing\b|"
+    r"Imagine [a-z]+ing\b|"
+    r"What your [a-z]+ isn'?t telling\b"
+    r")",
+    re.IGNORECASE,
+)
+
+_VAGUE_SOCIAL_PROOF_RE = re.compile(
+    r"\b(?:countless|many (?:businesses|clients|owners|people|professionals)"
+    r"|so many (?:businesses|clients|owners|people)|numerous (?:clients|businesses))\b",
+    re.IGNORECASE,
+)
+
+# Fix 26: Discourse marker stripping — handles "But what if", "And did you know",
+# "So, are you" etc. without adding individual regex patterns.
+_DISCOURSE_MARKER_RE = re.compile(
+    r"^(?:(?:but|and|so|yet|or|now|well|look|hey|listen|"
+    r"honestly|actually|seriously|basically|simply|truly|"
+    r"really|frankly|clearly|obviously|ok(?:ay)?|right"
+    r")\b[,:\s]*)+",
+    re.IGNORECASE,
+)
+
+
+_HOOK_SENTENCE_SPLIT_RE = re.compile(r"[.?!:]\s+")
+_SLIDE_ONE_RE = re.compile(r"Slide\s*1[:\-\u2013]\s*(.*?)(?:\n|$)", re.IGNORECASE)
+_EXCLAMATION_RE = re.compile(r"!(?=\s|$)")
+
+
+def check_quality_violations(caption: str, platform: str, derivative_type: str) -> list[str]:
+    """Lightweight regex safety net for literal violations the self-review missed."""
+    violations = []
+    first_line = caption.partition("\n")[0].strip()
+    if derivative_type == "carousel" and "Slide 1" in caption:
+        m = _SLIDE_ONE_RE.search(caption)
+        if m:
+            first_line = m.group(1).strip()
+    if platform != "pinterest":
+        # Check each sentence in the opening line, stripping discourse markers
+        # to catch variants like "But what if" → "what if" (already banned)
+        for sentence in _HOOK_SENTENCE_SPLIT_RE.split(first_line):
+            cleaned = _DISCOURSE_MARKER_RE.sub("", sentence.strip())
+            if cleaned and _BANNED_OPENERS_RE.match(cleaned):
+                violations.append(f"BANNED_HOOK: '{sentence.strip()[:60]}'")
+                break
+    m = _VAGUE_SOCIAL_PROOF_RE.search(caption)
+    if m:
+        violations.append(f"VAGUE_SOCIAL_PROOF: '{m.group()}'")
+    if "!" in caption and len(_EXCLAMATION_RE.findall(caption)) > 1:
+        violations.append("EXCLAMATION_SPAM")
+    return violations
+
+
+# ── Extractive condense ──────────────────────────────────────────────────────
+# Keep at least this share of the (whitespace-normalized) caption; below it the
+# LLM condense does a better job than dropping sentences
+_EXTRACTIVE_MIN_KEEP = 0.7
+
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?…])\s+")
+# Line-leading labels that carry derivative structure and must survive
+_STRUCTURE_LABEL_RE = re.compile(r"^(?:Slide \d+\s*[:.\-]|\d+[/)]|PIN (?:TITLE|DESCRIPTION)\b)", re.IGNORECASE)
+_FILLER_RE = re.compile(r"(?<=\s)(?:really|very|actually|basically|literally|truly|totally|honestly,?) (?=\w)")
+# "not really", "isn't very": the filler is carrying the meaning there
+_NEGATION_RE = re.compile(r"(?:\bnot|n['’]t)\s+$", re.IGNORECASE)
+_EMOJI_RE = re.compile("[\U0001F300-\U0001FAFF\u2600-\u27BF\uFE0F\u200D]+ ?")
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_HSPACE_RE = re.compile(r"[ \t]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+def _sentence_value(sentence: str) -> float:
+    """Distinct content words, with a bonus for numbers (specifics are worth keeping)."""
+    words = _WORD_RE.findall(sentence.lower())
+    content = {w for w in words if len(w) > 2 and w not in _HASHTAG_STOPWORDS}
+    return len(content) + (2 if any(ch.isdigit() for ch in sentence) else 0)
+
+
+def _strip_filler(sentence: str) -> str:
+    """Remove filler words, keeping any that follow a negation."""
+    def _drop(match: re.Match) -> str:
+        return match.group(0) if _NEGATION_RE.search(sentence, 0, match.start()) else ""
+    return _FILLER_RE.sub(_drop, _EMOJI_RE.sub("", sentence)).strip()
+
+
+def extractive_condense(caption: str, limit: int) -> str | None:
+    """Fit ``caption`` under ``limit`` without an LLM call.
+
+    Drops whole middle sentences, lowest value per character first, and
+    only when that alone can't fit the limit trims emoji and filler words
+    from the middle sentences that are left. The hook (first sentence), the
+    closing sentence (usually the CTA) and structural labels ("Slide 2:",
+    "3/", "PIN TITLE") are never touched. Returns None when fitting would
+    mean dropping sentences below _EXTRACTIVE_MIN_KEEP of the caption.
+    """
+    text = _HSPACE_RE.sub(" ", caption)
+    text = "\n".join(line.strip() for line in text.split("\n"))
+    text = _BLANK_LINES_RE.sub("\n\n", text).strip()
+    if len(text) <= limit:
+        return text
+
+    lines = [_SENTENCE_SPLIT_RE.split(line) if line else [] for line in text.split("\n")]
+    units = [(li, si) for li, sents in enumerate(lines) for si in range(len(sents))]
+    if len(units) < 3:
+        return None
+    protected = {units[0], units[-1]}
+    protected.update((li, 0) for li, sents in enumerate(lines) if sents and _STRUCTURE_LABEL_RE.match(sents[0]))
+    middle = [u for u in units if u not in protected]
+    if not middle:
+        return None
+
+    def _render() -> str:
+        out = [" ".join(s for s in sents if s) for sents in lines]
+        # Drop lines emptied by removals but keep the original paragraph breaks
+        out = [line for line, sents in zip(out, lines) if line or not sents]
+        return _BLANK_LINES_RE.sub("\n\n", "\n".join(out)).strip()
+
+    def _fits() -> bool:
+        return len(_render()) <= limit
+
+    # Pass 1: drop middle sentences — a single drop that fits if one exists,
+    # otherwise the one carrying the least value per character — as long as
+    # the caption stays above the keep floor (filler trimming below only
+    # removes words that carry no content, so it isn't held to the floor)
+    floor = len(text) * _EXTRACTIVE_MIN_KEEP
+    remaining = list(middle)
+    while not _fits():
+        current = len(_render())
+        droppable = [u for u in remaining if current - len(lines[u[0]][u[1]]) - 1 >= floor]
+        if not droppable:
+            break
+        overage = current - limit
+        enough = [u for u in droppable if len(lines[u[0]][u[1]]) + 1 >= overage]
+        if enough:
+            li, si = min(enough, key=lambda u: _sentence_value(lines[u[0]][u[1]]))
+        else:
+            li, si = min(
+                droppable,
+                key=lambda u: _sentence_value(lines[u[0]][u[1]]) / max(1, len(lines[u[0]][u[1]])),
+            )
+        lines[li][si] = ""
+        remaining.remove((li, si))
+
+    # Pass 2: dropping wasn't enough — strip emoji and filler from the least
+    # valuable middle sentences still kept
+    for li, si in sorted(remaining, key=lambda u: _sentence_value(lines[u[0]][u[1]])):
+        if _fits():
+            break
+        trimmed = _strip_filler(lines[li][si])
+        if trimmed:
+            lines[li][si] = trimmed
+
+    result = _render()
+    if len(result) > limit:
+        return None
+    return result
@@ -2,117 +2,66 @@ import asyncio
 import base64
 import logging
 import re
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import AsyncIterator
 
 from google import genai
 from google.genai import types
 
-from backend.config import GOOGLE_API_KEY, GEMINI_MODEL
+from backend.config import (
+    CAPTION_CANDIDATES,
+    CAPTION_REVIEW_SURVIVORS,
+    GOOGLE_API_KEY,
+    MODEL_ROUTES,
+    REVIEW_GATE_MODE,
+    REVIEW_PRESCREEN_ENABLED,
+)
 from backend.platforms import get as get_platform
 
 # Interleaved text+image generation requires an image-capable model
 GEMINI_IMAGE_MODEL = "gemini-2.5-flash-image"
 from backend.services import budget_tracker as bt
-from backend.services.storage_client import upload_image_to_gcs
+from backend.services import context_cache
+from backend.services.media_pipeline import store_generated_image
 from backend.services.brand_assets import get_brand_reference_images
-from backend.agents.review_agent import review_post
+from backend.services.hook_index import HookIndex
+from backend.agents import caption_scorer
+from backend.agents.caption_text import (
+    char_limit as _char_limit,
+    check_quality_violations as _check_quality_violations,
+    enforce_char_limit as _enforce_char_limit,
+    extractive_condense as _extractive_condense,
+    fix_mojibake as _fix_mojibake,
+    sanitize_hashtags as _sanitize_hashtags,
+    strip_markdown as _strip_markdown,
+    validate_format as _validate_format,
+)
+from backend.agents.review_agent import review_post, review_posts_batch
 
 logger = logging.getLogger(__name__)
 client = genai.Client(api_key=GOOGLE_API_KEY)
 
-# Common English stopwords that should never be hashtags
-_HASHTAG_STOPWORDS = frozenset({
-    "a", "an", "the", "and", "or", "but", "in", "on", "at", "to", "for",
-    "of", "is", "it", "by", "as", "be", "was", "are", "has", "had", "do",
-    "if", "my", "me", "we", "he", "she", "no", "so", "up", "out", "not",
-    "you", "your", "our", "its", "his", "her", "this", "that", "with",
-    "from", "here", "heres", "image", "post", "caption",
-})
-
-_VALID_HASHTAG_RE = re.compile(r"^[A-Za-z0-9_]+$")
-
-def _fix_mojibake(text: str) -> str:
-    """Detect and repair UTF-8→CP1252 double-encoding artifacts (quotes, dashes, emojis).
-
-    Works by reversing the double-encoding: encode mojibake chars back to CP1252
-    bytes, then decode as UTF-8. Characters that aren't CP1252-encodable (real emojis)
-    are preserved as-is. Non-mojibake Latin chars (é, ñ, etc.) survive via surrogate
-    round-trip back to their original CP1252 character.
-    """
-    # Quick check: mojibake from CP1252 always involves these starter chars
-    if not any(c in text for c in "âÃðÂ"):
-        return text
-
-    result: list[str] = []
-    buf: list[str] = []
-
-    for ch in text:
-        try:
-            ch.encode("cp1252")
-            buf.append(ch)
-        except UnicodeEncodeError:
-            # Non-CP1252 char (e.g. real emoji U+1F4xx) — flush buffer, keep char
-            if buf:
-                result.append(_roundtrip_cp1252(buf))
-                buf = []
-            result.append(ch)
-
-    if buf:
-        result.append(_roundtrip_cp1252(buf))
-
-    return "".join(result)
-
-
-def _roundtrip_cp1252(buf: list[str]) -> str:
-    """Reverse CP1252 mojibake in a buffer of CP1252-encodable chars."""
-    chunk = "".join(buf)
-    try:
-        raw = chunk.encode("cp1252")
-        decoded = raw.decode("utf-8", errors="surrogateescape")
-        # Surrogates represent bytes that weren't valid UTF-8 — map them back
-        # to the original CP1252 character (e.g. 0xE9 → é)
-        out: list[str] = []
-        for ch in decoded:
-            if "\udc80" <= ch <= "\udcff":
-                byte_val = ord(ch) - 0xDC00
-                out.append(bytes([byte_val]).decode("cp1252"))
-            else:
-                out.append(ch)
-        return "".join(out)
-    except (UnicodeDecodeError, UnicodeEncodeError):
-        return chunk
-
-
-def _enforce_char_limit(caption: str, platform: str, derivative_type: str = "") -> str:
-    """Hard-truncate caption to platform char limit. Final safety net only."""
-    spec = get_platform(platform)
-    limits = spec.char_limits
-    if not limits:
-        return caption
-    limit = limits.get(derivative_type) or limits.get("default")
-    if not limit or len(caption) <= limit:
-        return caption
-    truncated = caption[: limit - 1]
-    last_space = truncated.rfind(" ")
-    if last_space > limit // 2:
-        truncated = truncated[:last_space]
-    return truncated + "…"
-
 
 async def _smart_condense(caption: str, platform: str, derivative_type: str) -> str:
-    """If caption exceeds the char limit, ask the LLM to shorten it intelligently.
+    """If caption exceeds the char limit, shorten it intelligently.
 
-    Falls back to hard truncation if the LLM condense fails.
-    Returns the caption unchanged if already within limits.
+    Tries the local extractive condense first and asks the LLM only when that
+    would cut too much. Falls back to hard truncation if the LLM condense
+    fails. Returns the caption unchanged if already within limits.
     """
-    spec = get_platform(platform)
-    limits = spec.char_limits
-    if not limits:
-        return caption
-    limit = limits.get(derivative_type) or limits.get("default")
+    limit = _char_limit(platform, derivative_type)
     if not limit or len(caption) <= limit:
         return caption
 
+    local = _extractive_condense(caption, limit)
+    if local is not None:
+        logger.info(
+            "Extractive condense for %s/%s: %d → %d chars (limit %d)",
+            platform, derivative_type, len(caption), len(local), limit,
+        )
+        return local
+
     logger.info(
         "Caption over limit (%d/%d) for %s/%s — smart condensing",
         len(caption), limit, platform, derivative_type,
@@ -131,7 +80,7 @@ async def _smart_condense(caption: str, platform: str, derivative_type: str) ->
     try:
         resp = await asyncio.to_thread(
             client.models.generate_content,
-            model=GEMINI_MODEL,
+            model=MODEL_ROUTES["condense"],
             contents=condense_prompt,
             config=types.GenerateContentConfig(temperature=0.3),
         )
@@ -148,25 +97,6 @@ async def _smart_condense(caption: str, platform: str, derivative_type: str) ->
     return _enforce_char_limit(caption, platform, derivative_type)
 
 
-def _sanitize_hashtags(raw_tags: list[str], platform: str) -> list[str]:
-    """Clean and validate hashtags, enforcing per-platform limits."""
-    limit = get_platform(platform).hashtag_limit
-    clean = []
-    for tag in raw_tags:
-        tag = tag.strip().lstrip("#").strip()
-        if len(tag) < 3:
-            continue
-        if tag.lower() in _HASHTAG_STOPWORDS:
-            continue
-        if not _VALID_HASHTAG_RE.match(tag):
-            continue
-        # Mastodon: CamelCase hashtags for screen reader accessibility
-        if platform == "mastodon":
-            tag = ''.join(word.capitalize() for word in re.findall(r'[a-zA-Z][a-z]*|[0-9]+', tag))
-        clean.append(tag)
-    return clean[:limit]
-
-
 _SLIDE_RE = re.compile(r"Slide\s*\d+\s*[:\-–]\s*", re.IGNORECASE)
 
 
@@ -178,102 +108,6 @@ def _parse_slide_descriptions(caption: str, max_slides: int = 3) -> list[str]:
     return slides[:max_slides]
 
 
-def _strip_markdown(text: str) -> str:
-    """Remove markdown formatting that social platforms can't render."""
-    text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
-    text = re.sub(r'\*(.+?)\*', r'\1', text)
-    text = re.sub(r'__(.+?)__', r'\1', text)
-    text = re.sub(r'_(.+?)_', r'\1', text)
-    text = re.sub(r'\[(.+?)\]\(.+?\)', r'\1', text)
-    text = re.sub(r'^#{1,6}\s+', '', text, flags=re.MULTILINE)
-    # Strip markdown bullet lists: "* item" or "- item" at line start
-    text = re.sub(r'^\s*[\*\-]\s+', '', text, flags=re.MULTILINE)
-    return text
-
-
-def _validate_format(caption: str, derivative_type: str) -> bool:
-    """Check if the caption follows the expected derivative format. Log warnings on mismatch."""
-    if derivative_type == "carousel":
-        ok = "Slide 1" in caption and "Slide 2" in caption
-        if not ok:
-            logger.warning("Carousel caption missing Slide 1/2 structure")
-        return ok
-    if derivative_type == "thread_hook":
-        ok = "1/" in caption or "1)" in caption
-        if not ok:
-            logger.warning("Thread caption missing numbered format (1/, 2/...)")
-        return ok
-    if derivative_type == "pin":
-        ok = "PIN TITLE" in caption.upper() or "PIN DESCRIPTION" in caption.upper()
-        if not ok:
-            logger.warning("Pin caption missing PIN TITLE / PIN DESCRIPTION labels")
-        return ok
-    return True
-
-
-# --- Fix 13: Regex safety net for literal quality violations ---
-
-_BANNED_OPENERS_RE = re.compile(
-    r"^(?:"
-    r"Are you\b|"
-    r"Did you know\b|"
-    r"What if\b|"
-    r"In today'?s\b|"
-    r"As a [a-z]|"
-    r"When it comes to\b|"
-    r"Here'?s the thing\b|"
-    r"The truth is\b|"
-    r"Let me tell you\b|"
-    r"Still [a-z]+ing\b|"
-    r"[A-Z][a-z]+ won'?t tell you\b|"
-    r"You might be [a-z]+ing\b|"
-    r"Imagine [a-z]+ing\b|"
-    r"What your [a-z]+ isn'?t telling\b"
-    r")",
-    re.IGNORECASE,
-)
-
-_VAGUE_SOCIAL_PROOF_RE = re.compile(
-    r"\b(?:countless|many (?:businesses|clients|owners|people|professionals)"
-    r"|so many (?:businesses|clients|owners|people)|numerous (?:clients|businesses))\b",
-    re.IGNORECASE,
-)
-
-# Fix 26: Discourse marker stripping — handles "But what if", "And did you know",
-# "So, are you" etc. without adding individual regex patterns.
-_DISCOURSE_MARKER_RE = re.compile(
-    r"^(?:(?:but|and|so|yet|or|now|well|look|hey|listen|"
-    r"honestly|actually|seriously|basically|simply|truly|"
-    r"really|frankly|clearly|obviously|ok(?:ay)?|right"
-    r")\b[,:\s]*)+",
-    re.IGNORECASE,
-)
-
-
-def _check_quality_violations(caption: str, platform: str, derivative_type: str) -> list[str]:
-    """Lightweight regex safety net for literal violations the self-review missed."""
-    violations = []
-    first_line = caption.split("\n")[0].strip()
-    if derivative_type == "carousel" and "Slide 1" in caption:
-        m = re.search(r"Slide\s*1[:\-\u2013]\s*(.*?)(?:\n|$)", caption, re.IGNORECASE)
-        if m:
-            first_line = m.group(1).strip()
-    if platform != "pinterest":
-        # Check each sentence in the opening line, stripping discourse markers
-        # to catch variants like "But what if" → "what if" (already banned)
-        for sentence in re.split(r'[.?!:]\s+', first_line):
-            cleaned = _DISCOURSE_MARKER_RE.sub("", sentence.strip())
-            if cleaned and _BANNED_OPENERS_RE.match(cleaned):
-                violations.append(f"BANNED_HOOK: '{sentence.strip()[:60]}'")
-                break
-    m = _VAGUE_SOCIAL_PROOF_RE.search(caption)
-    if m:
-        violations.append(f"VAGUE_SOCIAL_PROOF: '{m.group()}'")
-    if len(re.findall(r"!\s", caption + " ")) > 1:
-        violations.append("EXCLAMATION_SPAM")
-    return violations
-
-
 async def _quality_retry(final_caption: str, platform: str, derivative_type: str) -> str:
     """If regex safety net catches violations, do one targeted LLM retry."""
     violations = _check_quality_violations(final_caption, platform, derivative_type)
@@ -288,7 +122,7 @@ async def _quality_retry(final_caption: str, platform: str, derivative_type: str
         f"Output the corrected caption only, no hashtags, no explanation."
     )
     resp = await asyncio.to_thread(
-        client.models.generate_content, model=GEMINI_MODEL, contents=retry_prompt,
+        client.models.generate_content, model=MODEL_ROUTES["quality_retry"], contents=retry_prompt,
         config=types.GenerateContentConfig(temperature=0.3),
     )
     retried = _enforce_char_limit(_strip_markdown(_fix_mojibake(resp.text.strip())), platform, derivative_type)
@@ -308,8 +142,19 @@ async def _review_gate(
     derivative_type: str,
     brand_profile: dict,
     day_brief: dict,
+    review: dict | None = None,
+    hook_index: HookIndex | None = None,
 ) -> tuple[str, list[str], dict | None]:
-    """Run inline review; if score < 7, do one targeted rewrite using revision_notes.
+    """Run inline review; if score < 7, rewrite using revision_notes.
+
+    ``review`` skips the initial review when the caption was already scored
+    (e.g. while picking between generated candidates). Otherwise the local
+    pre-review scorer may settle clear passes and failures without the LLM.
+    A caption that nearly repeats a post in ``hook_index`` is rewritten
+    without being reviewed first.
+
+    A targeted rewrite and a from-scratch rewrite are tried either one after
+    the other or concurrently, depending on REVIEW_GATE_MODE.
 
     Returns (caption, hashtags, review_result). The review_result can be saved
     to Firestore so the frontend doesn't need a separate review API call.
@@ -326,10 +171,36 @@ async def _review_gate(
             "platform": platform,
             "derivative_type": derivative_type,
         }
-        review = await review_post(
-            post_for_review, brand_profile,
-            social_proof_tier=_proof_tier, cta_type=_cta_type,
-        )
+        duplicate = hook_index.near_duplicate(final_caption) if hook_index is not None else None
+        if duplicate is not None:
+            dup_entry, dup_score = duplicate
+            logger.warning("Near-duplicate of post %s (similarity %.2f) for %s/%s — rewriting",
+                           dup_entry.post_id, dup_score, platform, derivative_type)
+            review = {
+                "score": 5,
+                "approved": False,
+                "revision_notes": [
+                    f'This repeats an earlier post that opened with "{dup_entry.hook}". '
+                    "Write a new hook with a completely different angle, structure and wording, "
+                    "and don't reuse that post's examples.",
+                ],
+                "source": "near_duplicate",
+            }
+        if review is None and REVIEW_PRESCREEN_ENABLED:
+            # Clear passes keep the caption and clear failures go straight to
+            # a rewrite, both without an LLM review
+            prescreen = caption_scorer.score_caption(
+                final_caption, parsed_hashtags, platform, derivative_type, _cta_type,
+            )
+            if prescreen.verdict != "review":
+                logger.info("Pre-review %s (penalty=%d) for %s/%s — skipping LLM review",
+                            prescreen.verdict, prescreen.penalty, platform, derivative_type)
+                review = prescreen.as_review(caption_scorer.get_calibration())
+        if review is None:
+            review = await review_post(
+                post_for_review, brand_profile,
+                social_proof_tier=_proof_tier, cta_type=_cta_type,
+            )
         score = review.get("score", 7)
         logger.info("Review gate score: %d for %s/%s", score, platform, derivative_type)
 
@@ -379,9 +250,8 @@ async def _review_gate(
             )
 
         # Format preservation notes per derivative type
-        _spec = get_platform(platform)
-        _char_limit = (_spec.char_limits or {}).get(derivative_type) or (_spec.char_limits or {}).get("default", 0)
-        _limit_note = f" HARD LIMIT: {_char_limit} characters for {platform} {derivative_type}." if _char_limit else ""
+        _limit = _char_limit(platform, derivative_type)
+        _limit_note = f" HARD LIMIT: {_limit} characters for {platform} {derivative_type}." if _limit else ""
         _FORMAT_NOTES = {
             "carousel": "Preserve Slide 1:/Slide 2:/Slide 3: labels. Each slide on its own line. Slide 2 must have 2-4 sentences (insight + example). Use bullet points for multi-step explanations. Keep sentences short for mobile readability — break long ideas into bullets.",
             "thread_hook": "Preserve numbered post format (1/, 2/, 3/). Each post <=280 chars for X, <=300 for Bluesky.",
@@ -418,108 +288,106 @@ async def _review_gate(
             f"You may adjust the hook or shorten text if needed for mobile readability. "
             f"Output the corrected caption only. No explanation, no hashtags."
         )
-        resp = await asyncio.to_thread(
-            client.models.generate_content,
-            model=GEMINI_MODEL,
-            contents=retry_prompt,
-            config=types.GenerateContentConfig(temperature=0.4),
-        )
-        rewritten = _enforce_char_limit(
-            _strip_markdown(_fix_mojibake(resp.text.strip())),
-            platform,
-            derivative_type,
-        )
-        if revised_hashtags and isinstance(revised_hashtags, list):
-            parsed_hashtags = _sanitize_hashtags(revised_hashtags, platform)
-        logger.info("Review gate rewrite complete for %s/%s", platform, derivative_type)
-
-        # Re-review the rewritten caption so we have an accurate score to cache
-        rewritten_for_review = {
-            "caption": rewritten,
-            "hashtags": parsed_hashtags,
-            "platform": platform,
-            "derivative_type": derivative_type,
-        }
-        final_review = await review_post(
-            rewritten_for_review, brand_profile,
-            social_proof_tier=_proof_tier, cta_type=_cta_type,
-        )
-        final_score = final_review.get("score", 0)
-        logger.info("Review gate post-rewrite score: %d for %s/%s",
-                     final_score, platform, derivative_type)
-
-        if final_score >= 7:
-            return rewritten, parsed_hashtags, final_review
+        async def _rewrite(prompt: str, temperature: float) -> str:
+            resp = await _generate_caption(brand_profile, prompt, temperature=temperature)
+            return _enforce_char_limit(
+                _strip_markdown(_fix_mojibake(resp.text.strip())),
+                platform,
+                derivative_type,
+            )
 
-        # ── Attempt 2: stronger rewrite with full day brief context ──
-        logger.warning("Review gate attempt 2 (score=%d) — stronger rewrite for %s/%s",
-                       final_score, platform, derivative_type)
+        async def _rereview(caption: str) -> dict:
+            return await review_post(
+                {
+                    "caption": caption,
+                    "hashtags": parsed_hashtags,
+                    "platform": platform,
+                    "derivative_type": derivative_type,
+                },
+                brand_profile,
+                social_proof_tier=_proof_tier, cta_type=_cta_type,
+            )
 
         _pillar = day_brief.get("pillar", "")
         _theme = day_brief.get("content_theme", "")
         _hook_dir = day_brief.get("caption_hook", "")
         _key_msg = day_brief.get("key_message", "")
 
-        strong_notes = final_review.get("revision_notes", "")
-        if isinstance(strong_notes, list):
-            strong_notes = "\n".join(f"- {n}" for n in strong_notes)
-
-        strong_prompt = (
-            f"You are a {platform} content specialist for {_biz}"
-            f"{f' ({_ind})' if _ind else ''}, targeting {_aud}. Tone: {_tone}.\n\n"
-            f"The previous caption scored {final_score}/10 and FAILED quality review. "
-            f"You must write a SUBSTANTIALLY DIFFERENT version — do not patch the old one.\n\n"
-            f"CONTENT BRIEF (follow this closely):\n"
-            f"- Pillar: {_pillar}\n"
-            f"- Theme: {_theme}\n"
-            f"- Hook angle: {_hook_dir}\n"
-            f"- Key message: {_key_msg}\n"
-            f"- CTA type: {_cta_type or 'engagement'}\n\n"
-            f"REVIEWER FEEDBACK (these are the problems to avoid):\n{strong_notes}\n\n"
-            f"HARD RULES:\n{_rewrite_constraints}"
-            f"- BANNED HOOKS — do NOT open with: "
-            f"\"Are you...?\", \"Did you know...?\", \"What if...?\", \"In today's...\", "
-            f"\"As a...\", \"When it comes to...\", \"Here's the thing:\", \"The truth is:\"\n"
-            f"- Open with a SPECIFIC, CONCRETE statement or pattern-interrupt\n"
-            f"- Prove expertise by teaching, not claiming\n\n"
-            f"{_format_block}"
-            f"Write a complete new caption. Output the caption only — no explanation, no hashtags."
-        )
-        resp2 = await asyncio.to_thread(
-            client.models.generate_content,
-            model=GEMINI_MODEL,
-            contents=strong_prompt,
-            config=types.GenerateContentConfig(temperature=0.6),
-        )
-        strong_rewrite = _enforce_char_limit(
-            _strip_markdown(_fix_mojibake(resp2.text.strip())),
-            platform, derivative_type,
-        )
-
-        # Re-review attempt 2
-        strong_for_review = {
-            "caption": strong_rewrite,
-            "hashtags": parsed_hashtags,
-            "platform": platform,
-            "derivative_type": derivative_type,
-        }
-        strong_review = await review_post(
-            strong_for_review, brand_profile,
-            social_proof_tier=_proof_tier, cta_type=_cta_type,
-        )
-        strong_score = strong_review.get("score", 0)
-        logger.info("Review gate attempt 2 score: %d for %s/%s",
-                     strong_score, platform, derivative_type)
+        def _strong_prompt(failed_score: int, notes) -> str:
+            """Attempt 2: a substantially different caption from the full day brief."""
+            if isinstance(notes, list):
+                notes = "\n".join(f"- {n}" for n in notes)
+            return (
+                f"You are a {platform} content specialist for {_biz}"
+                f"{f' ({_ind})' if _ind else ''}, targeting {_aud}. Tone: {_tone}.\n\n"
+                f"The previous caption scored {failed_score}/10 and FAILED quality review. "
+                f"You must write a SUBSTANTIALLY DIFFERENT version — do not patch the old one.\n\n"
+                f"CONTENT BRIEF (follow this closely):\n"
+                f"- Pillar: {_pillar}\n"
+                f"- Theme: {_theme}\n"
+                f"- Hook angle: {_hook_dir}\n"
+                f"- Key message: {_key_msg}\n"
+                f"- CTA type: {_cta_type or 'engagement'}\n\n"
+                f"REVIEWER FEEDBACK (these are the problems to avoid):\n{notes}\n\n"
+                f"HARD RULES:\n{_rewrite_constraints}"
+                f"- BANNED HOOKS — do NOT open with: "
+                f"\"Are you...?\", \"Did you know...?\", \"What if...?\", \"In today's...\", "
+                f"\"As a...\", \"When it comes to...\", \"Here's the thing:\", \"The truth is:\"\n"
+                f"- Open with a SPECIFIC, CONCRETE statement or pattern-interrupt\n"
+                f"- Prove expertise by teaching, not claiming\n\n"
+                f"{_format_block}"
+                f"Write a complete new caption. Output the caption only — no explanation, no hashtags."
+            )
 
-        if strong_score >= 7:
-            if strong_review.get("revised_hashtags"):
-                parsed_hashtags = _sanitize_hashtags(strong_review["revised_hashtags"], platform)
-            return strong_rewrite, parsed_hashtags, strong_review
+        if revised_hashtags and isinstance(revised_hashtags, list):
+            parsed_hashtags = _sanitize_hashtags(revised_hashtags, platform)
 
-        # ── Attempt 2 also failed — return the best version we have ──
-        logger.warning("Review gate exhausted — best score %d for %s/%s",
-                       max(final_score, strong_score), platform, derivative_type)
+        if REVIEW_GATE_MODE == "parallel":
+            # Targeted fix and from-scratch rewrite at once, both steered by
+            # the first review: two round-trips instead of four, at the cost
+            # of always paying for both candidates
+            rewritten, strong_rewrite = await asyncio.gather(
+                _rewrite(retry_prompt, 0.4),
+                _rewrite(_strong_prompt(score, revision_notes), 0.6),
+            )
+            final_review, strong_review = await asyncio.gather(
+                _rereview(rewritten), _rereview(strong_rewrite),
+            )
+            final_score = final_review.get("score", 0)
+            strong_score = strong_review.get("score", 0)
+            logger.info("Review gate parallel scores: targeted=%d strong=%d for %s/%s",
+                        final_score, strong_score, platform, derivative_type)
+        else:
+            rewritten = await _rewrite(retry_prompt, 0.4)
+            logger.info("Review gate rewrite complete for %s/%s", platform, derivative_type)
+
+            # Re-review the rewritten caption so we have an accurate score to cache
+            final_review = await _rereview(rewritten)
+            final_score = final_review.get("score", 0)
+            logger.info("Review gate post-rewrite score: %d for %s/%s",
+                         final_score, platform, derivative_type)
+
+            if final_score >= 7:
+                return rewritten, parsed_hashtags, final_review
+
+            # ── Attempt 2: stronger rewrite with full day brief context ──
+            logger.warning("Review gate attempt 2 (score=%d) — stronger rewrite for %s/%s",
+                           final_score, platform, derivative_type)
+            strong_rewrite = await _rewrite(
+                _strong_prompt(final_score, final_review.get("revision_notes", "")), 0.6,
+            )
+            strong_review = await _rereview(strong_rewrite)
+            strong_score = strong_review.get("score", 0)
+            logger.info("Review gate attempt 2 score: %d for %s/%s",
+                         strong_score, platform, derivative_type)
+
+        if max(final_score, strong_score) < 7:
+            logger.warning("Review gate exhausted — best score %d for %s/%s",
+                           max(final_score, strong_score), platform, derivative_type)
+        # Ties go to the from-scratch rewrite
         if strong_score >= final_score:
+            if strong_score >= 7 and strong_review.get("revised_hashtags"):
+                parsed_hashtags = _sanitize_hashtags(strong_review["revised_hashtags"], platform)
             return strong_rewrite, parsed_hashtags, strong_review
         return rewritten, parsed_hashtags, final_review
 
@@ -528,12 +396,87 @@ async def _review_gate(
         return final_caption, parsed_hashtags, None
 
 
+def _split_caption_hashtags(text: str, platform: str) -> tuple[str, list[str] | None]:
+    """Split model output at HASHTAGS: into (caption, sanitized hashtags or None)."""
+    if "HASHTAGS:" not in text:
+        return text.strip(), None
+    caption_part, hashtag_part = text.split("HASHTAGS:", 1)
+    raw_tags = hashtag_part.strip().replace("\n", " ")
+    return caption_part.strip(), _sanitize_hashtags(
+        [t.strip() for t in raw_tags.split() if t.strip()], platform,
+    )
+
+
+def _local_caption_penalty(caption: str, platform: str, derivative_type: str) -> int:
+    """Pre-review ranking from the local checks only; 0 means none of them fired."""
+    penalty = 2 * len(_check_quality_violations(caption, platform, derivative_type))
+    if not _validate_format(caption, derivative_type):
+        penalty += 3
+    if _enforce_char_limit(caption, platform, derivative_type) != caption:
+        penalty += 1
+    return penalty
+
+
+async def _pick_caption_candidate(
+    candidates: list[tuple[str, list[str] | None]],
+    platform: str,
+    derivative_type: str,
+    brand_profile: dict,
+    day_brief: dict,
+    hashtags_hint: list[str],
+) -> tuple[str, list[str] | None, dict | None]:
+    """Choose among generated captions: rank locally, review only the clean survivors.
+
+    Returns (caption, hashtags, review). ``review`` is None when at most one
+    candidate passed the local checks — the review gate scores it as usual.
+    """
+    ranked = sorted(
+        (
+            (_local_caption_penalty(caption, platform, derivative_type), i, caption, tags)
+            for i, (caption, tags) in enumerate(candidates)
+            if caption
+        ),
+        key=lambda c: (c[0], c[1]),
+    )
+    if not ranked:
+        return "", None, None
+    survivors = [c for c in ranked if c[0] == 0][:CAPTION_REVIEW_SURVIVORS]
+    logger.info(
+        "Caption candidates for %s/%s: %d generated, %d passed local checks",
+        platform, derivative_type, len(ranked), len([c for c in ranked if c[0] == 0]),
+    )
+    if len(survivors) < 2:
+        _, _, caption, tags = ranked[0]
+        return caption, tags, None
+
+    _story = brand_profile.get("storytelling_strategy", {})
+    _proof_tier = _story.get("social_proof_tier") if isinstance(_story, dict) else None
+    # One batched request scores every survivor
+    reviews = await review_posts_batch(
+        [
+            {
+                "caption": caption,
+                "hashtags": tags or hashtags_hint,
+                "platform": platform,
+                "derivative_type": derivative_type,
+                "cta_type": day_brief.get("cta_type"),
+            }
+            for _, _, caption, tags in survivors
+        ],
+        brand_profile,
+        social_proof_tier=_proof_tier,
+    )
+    best = max(range(len(survivors)), key=lambda i: reviews[i].get("score", 0))
+    _, _, caption, tags = survivors[best]
+    return caption, tags, reviews[best]
+
+
 def _build_dedup_block(prior_hooks: list[str] | None) -> str:
-    """Build a prompt block listing hooks already used this week for deduplication."""
+    """Build a prompt block listing the brand's closest already-used hooks for deduplication."""
     if not prior_hooks:
         return ""
     return (
-        "CRITICAL — DO NOT repeat these hooks already used this week:\n"
+        "CRITICAL — DO NOT repeat these hooks already used by this brand:\n"
         + "\n".join(f"  - {h}" for h in prior_hooks)
         + "\nYour hook must be COMPLETELY DIFFERENT in angle, structure, and wording.\n\n"
     )
@@ -574,111 +517,413 @@ def _wrap_caption_style_directive(raw: str) -> str:
     )
 
 
-async def _generate_carousel_images(
-    slide_descriptions: list[str],
-    business_name: str,
-    visual_style: str,
-    color_hint: str,
-    image_style_directive: str,
-    style_ref_block: str,
-    platform: str,
-    post_id: str,
-    cover_image_bytes: bytes | None,
-) -> list[tuple[bytes, str]]:
-    """Generate images for carousel slides 2+ in parallel.
-
-    Returns list of (image_bytes, mime_type) tuples.
-    Skips slide 0 if cover_image_bytes is already provided (from the interleaved call).
-    """
-    start = 1 if cover_image_bytes else 0
-    slides_to_generate = slide_descriptions[start:3]  # max 2 additional
-    if not slides_to_generate:
-        return []
-
-    async def _gen_one(slide_text: str, slide_num: int) -> tuple[bytes, str] | None:
-        prompt = (
-            f"Generate a social media carousel slide image (slide {slide_num}).\n"
-            f"Brand: {business_name}. Visual style: {visual_style}.\n"
-            f"{color_hint}\n"
-            f"Slide content: {slide_text[:300]}\n"
-            f"{image_style_directive}\n"
-            f"{style_ref_block}"
-            "Create a clean, visually striking image that illustrates this slide's message.\n"
-            "Do NOT include any text, watermarks, or captions in the image."
-        )
-        try:
-            resp = await asyncio.to_thread(
-                client.models.generate_content,
-                model=GEMINI_IMAGE_MODEL,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    response_modalities=["IMAGE"],
-                    temperature=0.9,
-                ),
-            )
-            for part in resp.candidates[0].content.parts:
-                if part.inline_data:
-                    return (part.inline_data.data, part.inline_data.mime_type or "image/png")
-        except Exception as e:
-            logger.error("Carousel slide %d generation failed: %s", slide_num, e)
-        return None
-
-    results = await asyncio.gather(
-        *[_gen_one(text, i + start + 1) for i, text in enumerate(slides_to_generate)]
-    )
-    return [r for r in results if r is not None]
-
-
-async def generate_post(
-    plan_id: str,
-    day_brief: dict,
-    brand_profile: dict,
-    post_id: str,
-    custom_photo_bytes: bytes | None = None,
-    custom_photo_mime: str = "image/jpeg",
-    instructions: str | None = None,
-    prior_hooks: list[str] | None = None,
-) -> AsyncIterator[dict]:
-    """
-    Generate a social media post using Gemini 2.5 Flash.
-
-    If custom_photo_bytes is provided (BYOP mode): Gemini vision analyzes the
-    photo and writes a caption; the photo is used as the hero image (no image
-    generation budget consumed).
-
-    Otherwise: interleaved TEXT+IMAGE generation (normal mode).
+# ── Prompt blocks ──
+# Static instruction blocks are module constants; brand-derived blocks are
+# built once per brand revision by _brand_prompt_blocks and sent as a cached
+# system prompt. Only the per-brief sections are assembled inside generate_post.
+
+# Quality guardrails injected into every generation prompt
+_QUALITY_BLOCK = (
+    "QUALITY RULES:\n"
+    "FORMATTING: Write plain text only. No **bold**, *italic*, __underline__, or [links](url). "
+    "Use CAPS or emoji for emphasis sparingly.\n\n"
+    "BANNED PATTERNS (instant fail if any appear):\n"
+    "- \"Are you ready to...?\" / \"Did you know...?\" / \"What if...?\" / \"In today's [adjective] world...\"\n"
+    "- \"As a [profession]...\" / \"When it comes to...\" / \"Let's dive in\"\n"
+    "- \"Still [verb]-ing...?\" (e.g., \"Still handling your own marketing?\")\n"
+    "- \"[Role] won't tell you this about...\" (clickbait hook family)\n"
+    "- \"You might be [missing/leaving/losing]...\" (fear-based hook)\n"
+    "- \"Imagine [positive outcome]...\" (wish-casting hook)\n"
+    "- \"Game-changer\" / \"unlock your potential\" / \"take it to the next level\"\n"
+    "- \"Drop a comment below!\" / \"Follow for more!\" / \"Like and share\"\n"
+    "- \"Here's the thing:\" / \"The truth is:\" / \"Let me tell you something:\"\n"
+    "- \"Sound familiar?\" / \"Let's break it down\" / \"Here's why it matters\" / "
+    "\"Let's talk about it\" / \"Let me explain\" (momentum-killing filler after hooks)\n"
+    "- Starting 3+ sentences with \"It's\" or \"This is\"\n"
+    "- Emoji bullet lists (fire Point one, pin Point two, lightbulb Point three)\n"
+    "- More than 2 emojis in any single post\n"
+    "- Generic advice that could apply to any business in any industry\n"
+    "- Ending with an exclamation mark on more than 1 sentence\n"
+    "- Fabricated statistics, percentages, or specific numbers not from the brand profile\n"
+    "- \"We've seen countless...\" / \"Many businesses...\" / \"So many [people/clients/owners]...\" "
+    "(vague social proof — use the brand's real data or skip social proof entirely)\n\n"
+    "REQUIRED:\n"
+    "- VALUE FIRST: The caption must TEACH — a specific tip, fact, insight, "
+    "or perspective the reader didn't know. The brand is the NARRATOR, not the subject.\n"
+    "  BAD: 'At [Brand], we partner with [audience] to provide [service].' (brand-as-subject paragraph)\n"
+    "  GOOD: '[Specific insight]. We spotted this for a client last quarter.' (brand woven into the story)\n"
+    "- NO BRAND PARAGRAPHS: Never dedicate a full paragraph to describing the brand's services, "
+    "history, or value proposition. The brand name should appear at most ONCE, "
+    "embedded naturally in a sentence that's primarily about the reader's problem or the insight.\n"
+    "- At least one SPECIFIC detail (number, name, timeframe, scenario) from the brand profile\n"
+    "- A human perspective — first person (\"we\", \"I\", \"our clients\") not third person\n"
+    "- Content that could ONLY come from this brand, not a generic template\n"
+    "- CTA DISCIPLINE: End with ONE type of CTA — either an engagement question "
+    "(\"What's your approach?\") OR a conversion action (\"Book a call\" / \"DM us\"), NEVER both. "
+    "Engagement questions get more reach; conversion CTAs get more leads. Pick one per post.\n"
+    "  BY DERIVATIVE TYPE:\n"
+    "  - video_first: CTA is optional — a cliffhanger or curiosity hook works better than a forced CTA.\n"
+    "  - story: CTA required (swipe up / reply / DM — the CTA IS the point of a story).\n"
+    "  - pin: CTA is implicit in the action-oriented title ('How to...', 'Try this...'). "
+    "Do NOT add an explicit question or conversion CTA.\n"
+    "  - carousel/original/blog_snippet: CTA required.\n"
+    "  BY PLATFORM (overrides above when stricter):\n"
+    "  - Threads: ONLY engagement questions, NEVER conversion CTAs. A hot take that naturally "
+    "invites replies is better than an explicit question.\n"
+    "  - Mastodon: Do NOT include any CTA. No engagement questions, no conversion actions. "
+    "The community boosts genuinely useful content. Asking for engagement is considered spam.\n"
+    "  - Bluesky: Engagement questions must be SPECIFIC to the content topic. "
+    "Generic questions ('What do you think?', 'Thoughts?') are treated as spam.\n"
+    "  - Facebook: Engagement questions should be the default. Conversion CTAs get zero organic reach.\n"
+    "  - YouTube Shorts: 'Subscribe' is a valid CTA — not a generic CTA."
+)
 
-    Yields SSE-compatible event dicts: {"event": str, "data": dict}
+# Hook quality enforcement
+_HOOK_BLOCK = (
+    "HOOK RULES (your opening line determines if anyone reads the rest):\n"
+    "1. SPECIFICITY: Include a number, timeframe, or concrete detail from the brand's real experience.\n"
+    "   BAD: \"Growing your business is hard\"\n"
+    "   GOOD: \"After 20 years in this industry, here's the one mistake we still see every quarter\"\n"
+    "2. PATTERN INTERRUPT — use one of these structures (rotate across the week, never repeat):\n"
+    "   - Contrarian: \"Stop [common advice]. Here's what actually works.\"\n"
+    "   - Story opener: \"A client came to us last [season] because...\"\n"
+    "   - Number: \"[X] mistakes we see every [timeframe] in [industry]\"\n"
+    "   - Question: \"What would change if you [specific outcome]?\"\n"
+    "   - Confession: \"We almost made this mistake ourselves.\"\n"
+    "3. NEVER start with: \"Are you...?\", \"Did you know...?\", \"What if...?\", \"In today's...\", \"As a...\", \"When it comes to...\"\n"
+    "4. The hook from the brief is a STARTING POINT — rewrite it to be specific and surprising."
+)
 
-    Events emitted (in order):
-      {"event": "status",  "data": {"message": "..."}}
-      {"event": "caption", "data": {"text": "...", "chunk": True}}   # streamed chunks
-      {"event": "caption", "data": {"text": "...", "chunk": False, "hashtags": [...]}}  # final
-      {"event": "image",   "data": {"url": "...", "mime_type": "image/png"}}
-      {"event": "complete","data": {"post_id": "...", "caption": "...", "hashtags": [...], "image_url": "..."}}
-      {"event": "error",   "data": {"message": "..."}}  # on failure
-    """
+# Pinterest: SEO-driven titles, not social hook patterns
+_PIN_TITLE_BLOCK = (
+    "PIN TITLE RULES:\n"
+    "- Keyword-rich, action-oriented title under 100 characters\n"
+    "- Start with a verb or number ('5 Ways...', 'How to...', 'Try this...')\n"
+    "- Optimize for Pinterest search, not social engagement\n"
+    "- No question hooks, no contrarian takes — just clear, searchable value"
+)
 
-    platform = day_brief.get("platform", "instagram")
-    pillar = day_brief.get("pillar", "education")
-    content_theme = day_brief.get("content_theme", "")
-    caption_hook = day_brief.get("caption_hook", "")
-    key_message = day_brief.get("key_message", "")
-    image_prompt = day_brief.get("image_prompt", "")
-    hashtags_hint = _sanitize_hashtags(day_brief.get("hashtags", []), platform)
-    derivative_type = day_brief.get("derivative_type", "original")
+# ── Self-Review Checklist (appended to every prompt) ──
+_SELF_REVIEW_CHECKLIST = (
+    "\n--- SELF-REVIEW (run EVERY check before outputting. If ANY check fails, "
+    "rewrite BEFORE outputting. Output ONLY the final corrected caption — no drafts, "
+    "no explanations.) ---\n\n"
+
+    "☐ HOOK: Does my first line match a banned opener? "
+    "(Are you...?, Did you know...?, What if...?, In today's..., As a..., "
+    "When it comes to..., Still [verb]-ing...?, [Role] won't tell you..., "
+    "You might be [missing/leaving]..., Imagine [outcome]..., "
+    "[Number] ways/reasons/tips..., The secret to...)\n"
+    "  → REWRITE as a concrete, mid-story statement or a bold claim rooted in "
+    "the brand's specific domain. No rhetorical or clickbait questions. No direct address. "
+    "The hook must be a complete, compelling thought within the pre-fold window.\n"
+    "  PLATFORM EXCEPTIONS — X: a short provocative question or hot take (<60 chars) is native; "
+    "allow if not from the banned list. TikTok: 'Stop [verb]-ing' and lowercase imperatives are native. "
+    "Threads/Bluesky: a genuine, specific question is acceptable if not from the banned list. "
+    "Pinterest: rewrite as a keyword-rich descriptive phrase a user would search for — "
+    "no first person, no social hooks. YouTube Shorts: keep it short and curiosity-driven, "
+    "subordinate to the video.\n"
+    "  TONE — X: tight and opinionated, sentence fragments OK. "
+    "TikTok: lowercase and casual, if it reads like a press release rewrite as a text message. "
+    "Facebook: warm and relational, first-person stories over informational statements.\n\n"
+
+    "☐ BRAND PARAGRAPH & VOICE: Did I write a sentence where the brand is the subject "
+    "and the verb describes what the brand does, offers, or believes? "
+    "(e.g., '[Brand] specializes in...', '[Brand] has been helping...', 'At [Brand], we...') "
+    "Did I shift person (I/we/you/they/the brand) inconsistently within the caption? "
+    "Did I restate the brand's category as if it were a value proposition?\n"
+    "  → DELETE brand-as-subject sentences. The brand appears once, as the resolution to "
+    "the reader's problem, never as the topic. Pick one voice (first-person singular for "
+    "thought leadership, second-person for educational, first-person plural for brand voice) "
+    "and hold it for the entire caption. Pinterest: no first person in titles or descriptions.\n\n"
+
+    "☐ FORMATTING & HASHTAGS: Did I use emoji bullet lists, emoji as section markers, "
+    "more than 2 emoji total, markdown syntax (**bold**, ### headers, [links]()), "
+    "or numbered lists (LinkedIn permits short numbered lists ≤5 items)? "
+    "Did I use hashtags on Pinterest (deprecated — remove them), "
+    "lowercase hashtags on Mastodon (use #CamelCase for screen reader accessibility), "
+    "or #Shorts on YouTube Shorts (unnecessary — remove it)?\n"
+    "  → REMOVE all markdown. REMOVE emoji bullets and section markers. "
+    "Reduce to 0–2 emoji max. Keep paragraphs to 1–2 sentences for mobile readability. "
+    "TikTok carousel: up to 4 emoji permitted as inline visual rhythm. "
+    "Mastodon: fix all hashtags to #CamelCase. Pinterest: remove all hashtags.\n"
+    "  HASHTAG COUNTS — X: 0–2 inline only, never stacked at end. "
+    "TikTok: 3–5 niche-specific at caption end (never #fyp #viral). "
+    "Facebook: 0–1 max. Instagram: ≤5, in a separate block after the caption body, "
+    "no inline hashtags mid-sentence.\n\n"
+
+    "☐ FILLER & PACING: Did I include a stalling phrase? "
+    "(Here's the thing, Let's break it down, Here's why this matters, Here's the truth, "
+    "The reality is, Think about it, Let me explain, It's no secret that, It's simple, "
+    "The good news is, Sound familiar?)\n"
+    "  → DELETE the phrase. Start the sentence with the actual content that follows it.\n\n"
+
+    "☐ SPECIFICITY: Did I use a generic claim or advice not tied to this brand's actual data, "
+    "niche, or offering? (post consistently, engage with your audience, stay ahead of the curve, "
+    "take your business to the next level, in today's competitive landscape, unlock your potential, "
+    "it's a game-changer) Did I restate the brand's industry category as a value proposition?\n"
+    "  → REPLACE with a concrete detail from the brand brief or DELETE entirely. "
+    "If I cannot make it specific, it does not belong.\n\n"
+
+    "☐ SOCIAL PROOF: Did I use a vague quantifier? "
+    "(countless, many businesses, many clients, so many, numerous, a growing number of, "
+    "tons of, hundreds of)\n"
+    "  → REPLACE with a specific number from the brand profile. "
+    "If no number exists, REMOVE the claim — do not fabricate.\n\n"
+
+    "☐ FABRICATION: Did I invent a statistic, percentage, dollar amount, timeframe, "
+    "or regulatory/legal claim not provided in the brand brief?\n"
+    "  → DELETE and restate qualitatively (e.g., 'improved cash flow' not "
+    "'boosted revenue by 30%'). Never invent numbers.\n\n"
+
+    "☐ CTA: Do I have more than one call to action (engagement question + conversion CTA, "
+    "or two of either)? Does my CTA violate platform norms?\n"
+    "  PLATFORM RULES — Mastodon: ZERO CTAs, no engagement bait; prepend CW: [topic] for "
+    "food/diet, politics, mental health, or corporate content. "
+    "Threads: conversational only, no 'link in bio', no conversion language. "
+    "TikTok: embedded in narrative, not appended. "
+    "X: no appended links or 'check out' directives — embed as a reply prompt. "
+    "Facebook: conversational engagement questions only — no 'tag a friend', no link-pushing; "
+    "a light conversational question improves distribution, so keep one if natural. "
+    "Pinterest: action-verb CTAs only ('Try', 'Save', 'Make') — no 'Follow us' or 'Visit our site'. "
+    "YouTube Shorts: 'Subscribe' / 'Follow for more' are valid; no other conversion CTAs. "
+    "Bluesky: no generic engagement bait ('Thoughts?' = spam) — ask a specific question or omit. "
+    "LinkedIn: no raw URLs in caption body (suppresses reach).\n"
+    "  → KEEP only one. Match platform tone. When in doubt, cut the CTA entirely.\n\n"
+
+    "☐ LENGTH & FOLD: Does my caption fit the platform character limit? "
+    "Does my strongest hook land BEFORE the fold?\n"
+    "  LIMITS — X: 280 chars hard limit, no fold. "
+    "TikTok video: 200 chars max. TikTok carousel: up to 800 chars, keyword-rich. "
+    "Instagram: 125 chars before fold, best at <300 or 800–1200 total. "
+    "LinkedIn: 140 chars before fold, best at 1000–1800 total. "
+    "Facebook: 140 chars before fold. "
+    "Bluesky: 300 chars hard limit (not 280). "
+    "Threads: 500 chars limit, 200–300 sweet spot. "
+    "Pinterest: title ≤100 chars, front-load keywords in first 50 chars of description. "
+    "YouTube Shorts: ~100 chars visible before truncation. "
+    "Mastodon: 500 chars total, no fold.\n"
+    "  → CUT from the middle, never the hook or close. Front-load the hook into the "
+    "pre-fold window. Avoid the 400–700 char dead zone on Instagram. "
+    "For carousel slides: each slide carries one complete idea in ≤15 words; "
+    "do not split a sentence across slides.\n\n"
+
+    "--- END SELF-REVIEW ---\n"
+)
 
-    business_name = brand_profile.get("business_name", "Brand")
-    industry = brand_profile.get("industry", "")
-    target_audience = brand_profile.get("target_audience", "general audience")
-    tone = brand_profile.get("tone", "professional")
-    visual_style = brand_profile.get("visual_style", "")
-    image_style_directive = brand_profile.get("image_style_directive", "")
+# Social proof strategy per brand data tier ({years}/{clients} filled in per brand)
+_PROOF_STRATEGIES = {
+    "data_rich": (
+        "SOCIAL PROOF STRATEGY (your brand has strong data — USE IT):\n"
+        "- Lead with hard numbers: 'After {years} years and {clients}+ clients...'\n"
+        "- Reference real experience patterns: 'In {years} years, the #1 mistake we see is...'\n"
+        "- NEVER use vague framing ('many clients', 'countless businesses') — "
+        "you have real numbers, use them.\n"
+    ),
+    "partial_data": (
+        "SOCIAL PROOF STRATEGY (use what you have, don't inflate):\n"
+        "- Use available data specifically: 'After {years} years...' or "
+        "'Working with {clients}+ clients...'\n"
+        "- For missing data, use PROCESS AUTHORITY instead: 'The first thing we check is...' / "
+        "'In our experience, the pattern looks like...'\n"
+        "- NEVER inflate: no 'countless', 'many', or 'so many' — either cite the real number "
+        "or describe your process.\n"
+    ),
+    "thin_profile": (
+        "SOCIAL PROOF STRATEGY (NO volume claims — ZERO tolerance):\n"
+        "- You have NO data about years in business or client count. Do NOT reference either.\n"
+        "- ABSOLUTELY FORBIDDEN phrases: 'We've seen...', 'Our clients...', 'Over the years...', "
+        "'Many businesses...', 'Countless...', 'Time and again...', 'We've helped...', "
+        "'Clients tell us...', 'We see clients...', 'Clients typically...'\n"
+        "- Lead with EDUCATIONAL AUTHORITY: teach a specific, actionable insight. "
+        "The teaching IS the proof.\n"
+        "- Use PROCESS AUTHORITY: 'The first thing to check is...' / "
+        "'Here's what most people miss about...'\n"
+        "- If you catch yourself writing 'we' + a verb implying client volume, DELETE the sentence.\n"
+    ),
+}
+
+# CTA enforcement from strategy agent
+_CTA_ENFORCEMENT = {
+    "engagement": (
+        "CTA CONSTRAINT: This post uses an ENGAGEMENT CTA only.\n"
+        "End with ONE conversational question or discussion prompt.\n"
+        "Do NOT include any conversion language (no 'book', 'DM', 'link in bio', 'visit').\n"
+    ),
+    "conversion": (
+        "CTA CONSTRAINT: This post uses a CONVERSION CTA only.\n"
+        "End with ONE clear action step (book, DM, save, visit).\n"
+        "Do NOT also add an engagement question — one CTA only.\n"
+    ),
+    "implied": (
+        "CTA CONSTRAINT: This post uses an IMPLIED CTA.\n"
+        "The content should naturally lead the reader to want the brand's service.\n"
+        "Do NOT add any explicit CTA — no questions, no 'book a call', no 'DM us'.\n"
+    ),
+    "none": (
+        "CTA CONSTRAINT: This post has NO CTA.\n"
+        "Do NOT include any call to action — no questions, no conversion language, no 'thoughts?'\n"
+    ),
+}
+
+# Format-specific instructions for derivative post types
+_DERIVATIVE_INSTRUCTIONS: dict[str, str] = {
+    "carousel": (
+        "FORMAT: Instagram/LinkedIn CAROUSEL (3 slides)\n"
+        "Structure the caption as slide-by-slide copy:\n"
+        "  Slide 1: Hook (compelling, ≤10 words — this becomes the cover). "
+        "ALL hook rules above apply here — no 'Are you...?', 'Did you know...?', etc.\n"
+        "  Slide 2: Teach ONE specific insight — name a real technique, rule, or method. "
+        "Then give a CONCRETE EXAMPLE showing it in practice (a scenario, a number, a before/after). "
+        "NOT a platitude like 'plan proactively.' GIVE the actual insight AND show what it looks like.\n"
+        "  Slide 3: Actionable takeaway the reader can do TODAY + call to action. "
+        "Be specific: 'Compare X to Y this week' not 'Improve your operations.'\n"
+        "Label each slide clearly: 'Slide 1:', 'Slide 2:', 'Slide 3:'.\n"
+        "SUBSTANCE CHECK: If any slide could apply to every business in the industry, "
+        "it's too generic. Rewrite it."
+    ),
+    "thread_hook": (
+        "FORMAT: THREAD\n"
+        "Write 3-7 posts (use as many as the content requires — every post must carry a specific insight).\n"
+        "  1/ Hook that stops the scroll. "
+        "ALL hook rules above apply — no 'Are you...?', 'Did you know...?', etc.\n"
+        "  Middle posts: One key insight per post, concise and punchy. "
+        "No filler — if a post doesn't add a new fact or angle, cut it.\n"
+        "  Last post: A final INSIGHT or actionable takeaway — NOT a brand pitch. "
+        "Every post in the thread (including the last) must teach something. "
+        "If a CTA is assigned, weave it into the insight naturally. "
+        "BAD last post: 'Growing your business requires expert guidance. Contact us.' "
+        "GOOD last post: 'tl;dr — Track the 3 metrics that matter. Review them weekly. "
+        "Adjust before problems compound. Most issues are fixable when caught early.'\n"
+        "Per-post limit: X = 280 chars, Bluesky = 300 chars.\n"
+        "Separate each post with a blank line. Each must stand alone AND deliver standalone value.\n"
+        "Note: Bluesky threads don't need 1/2/3/ numbering (the UI handles threading). "
+        "X threads use 1/ 2/ 3/ numbering."
+    ),
+    "blog_snippet": (
+        "FORMAT: LinkedIn THOUGHT LEADERSHIP excerpt\n"
+        "Write 150–200 words total:\n"
+        "  - Bold opening: opinion-forward statement OR a specific, contrarian question "
+        "(NOT a generic 'Are you...?' question)\n"
+        "  - 2–3 short paragraphs expanding the idea with a real insight or example\n"
+        "  - Closing question to spark discussion in the comments\n"
+        "Professional but conversational tone."
+    ),
+    "story": (
+        "FORMAT: Instagram/Facebook STORY\n"
+        "Write ≤50 words total — short, punchy, immediate:\n"
+        "  - First line: big emotion, bold question, or surprising statement\n"
+        "  - One clear call to action (swipe up / reply / DM us)\n"
+        "No hashtags in the body — add them in the HASHTAGS section only."
+    ),
+    "pin": (
+        "FORMAT: Pinterest PIN\n"
+        "Write as two clearly labeled parts:\n"
+        "  PIN TITLE: ≤100 chars, keyword-rich, compelling headline\n"
+        "  PIN DESCRIPTION: 200-250 chars, SEO-optimized with natural keywords\n"
+        "No hashtags — use searchable keywords naturally."
+    ),
+    "video_first": (
+        "FORMAT: VIDEO-FIRST POST\n"
+        "The VIDEO is the content. Your caption is a teaser, not an article.\n"
+        "LENGTH: 1-3 sentences MAX.\n"
+        "- Instagram/TikTok Reels/YouTube Shorts: 50-150 chars ideal, 200 max. "
+        "Your caption appears ON TOP of the video — shorter is better.\n"
+        "- LinkedIn/Facebook video: under 500 chars. Give the reader a reason to press play.\n"
+        "Write a hook that makes people want to WATCH, not read.\n"
+        "Do NOT describe what happens in the video — create curiosity.\n"
+        "Do NOT include a brand paragraph — the video speaks for the brand."
+    ),
+    "original": (
+        "FORMAT: STANDARD POST (single image + caption)\n"
+        "Structure:\n"
+        "  - Hook: 1 sentence that stops the scroll — specific, mid-story, or contrarian. "
+        "Must land BEFORE the platform fold. ALL hook rules above apply.\n"
+        "  - Body: 2-4 short paragraphs (1-2 sentences each for mobile readability). "
+        "Teach something, share an insight, or tell a micro-story.\n"
+        "  - Close: CTA or takeaway matching the assigned cta_type.\n"
+        "LENGTH: Instagram 150-300 words (hook ≤125 chars), "
+        "LinkedIn 150-300 words (hook ≤140 chars), "
+        "Facebook 100-250 words (hook ≤140 chars), "
+        "TikTok under 500 chars, Threads 200-500 chars, "
+        "X under 280 chars (single punchy thought), "
+        "Bluesky under 300 chars, Mastodon under 500 chars, "
+        "YouTube Shorts under 300 chars.\n"
+        "Do NOT write a brand paragraph. The image supports the caption."
+    ),
+}
+
+# Thin-profile overrides: redirect "be specific" away from client stories
+_THIN_PROFILE_OVERRIDES: dict[str, str] = {
+    "carousel": (
+        "\nTHIN-PROFILE OVERRIDE (this brand has NO client data):\n"
+        "  Slide 2: Teach a CONCRETE TECHNIQUE — a step-by-step method, "
+        "a specific rule of thumb, or a named framework. "
+        "Do NOT invent client stories, dollar amounts, or case studies.\n"
+        "  Slide 3: Give the reader ONE thing they can do TODAY. "
+        "Do NOT say 'Book a consultation' unless the CTA type is 'conversion'.\n"
+        "  SUBSTANCE means TEACHING DEPTH, not brand-specific claims."
+    ),
+    "blog_snippet": (
+        "\nTHIN-PROFILE OVERRIDE (this brand has NO client data):\n"
+        "  Your 'real insight or example' must be a TECHNIQUE or INDUSTRY FACT — "
+        "not a client story. Teach something the reader can apply immediately.\n"
+        "  Do NOT reference clients, outcomes, or volume in any form."
+    ),
+    "thread_hook": (
+        "\nTHIN-PROFILE OVERRIDE (this brand has NO client data):\n"
+        "  Each post's 'key insight' must be a TECHNIQUE, FACT, or FRAMEWORK — "
+        "not a client story or outcome. Teach something concrete per post.\n"
+        "  Do NOT reference clients, outcomes, or volume in any form."
+    ),
+}
+
+# Derivative-type overrides for aspect ratio (e.g. story → 9:16, pin → 2:3)
+_DERIVATIVE_ASPECTS: dict[str, str] = {
+    "story": "9:16",
+    "pin": "2:3",
+    "blog_snippet": "1.91:1",
+}
+
+
+@dataclass(frozen=True)
+class _BrandPromptBlocks:
+    # Brand profile, quality rules, social proof strategy and self-review
+    # checklist: the shared system prompt for every caption call
+    system_prompt: str
+    # No verified years/client data: pillar and format rules tighten
+    thin_profile: bool
+
+
+# Bump when the system prompt template changes so cached prefixes are rebuilt
+_GENERATION_PROMPT_VERSION = "1"
+
+# (brand_id, updated_at) -> blocks; updated_at changes on every brand write
+_BRAND_BLOCK_CACHE_SIZE = 256
+_brand_block_cache: "OrderedDict[tuple, _BrandPromptBlocks]" = OrderedDict()
+
+
+def _brand_prompt_blocks(brand_profile: dict) -> _BrandPromptBlocks:
+    """Brand-derived prompt sections, memoized per brand revision."""
+    brand_id = brand_profile.get("brand_id")
+    key = (brand_id, brand_profile.get("updated_at"))
+    cached = _brand_block_cache.get(key) if brand_id else None
+    if cached is not None:
+        _brand_block_cache.move_to_end(key)
+        return cached
+
+    blocks = _build_brand_prompt_blocks(brand_profile)
+    if brand_id:
+        _brand_block_cache[key] = blocks
+        while len(_brand_block_cache) > _BRAND_BLOCK_CACHE_SIZE:
+            _brand_block_cache.popitem(last=False)
+    return blocks
+
+
+def _build_brand_prompt_blocks(brand_profile: dict) -> _BrandPromptBlocks:
     caption_style_directive = _wrap_caption_style_directive(
         brand_profile.get("caption_style_directive", "")
     )
-    colors = brand_profile.get("colors", [])
-    style_reference_gcs_uri = brand_profile.get("style_reference_gcs_uri")
 
     # Social voice block — injected when the user has connected a social account
     _sva = brand_profile.get("social_voice_analysis") or {}
@@ -700,202 +945,6 @@ async def generate_post(
     else:
         social_voice_block = ""
 
-    # Quality guardrails injected into every generation prompt
-    _QUALITY_BLOCK = (
-        "QUALITY RULES:\n"
-        "FORMATTING: Write plain text only. No **bold**, *italic*, __underline__, or [links](url). "
-        "Use CAPS or emoji for emphasis sparingly.\n\n"
-        "BANNED PATTERNS (instant fail if any appear):\n"
-        "- \"Are you ready to...?\" / \"Did you know...?\" / \"What if...?\" / \"In today's [adjective] world...\"\n"
-        "- \"As a [profession]...\" / \"When it comes to...\" / \"Let's dive in\"\n"
-        "- \"Still [verb]-ing...?\" (e.g., \"Still handling your own marketing?\")\n"
-        "- \"[Role] won't tell you this about...\" (clickbait hook family)\n"
-        "- \"You might be [missing/leaving/losing]...\" (fear-based hook)\n"
-        "- \"Imagine [positive outcome]...\" (wish-casting hook)\n"
-        "- \"Game-changer\" / \"unlock your potential\" / \"take it to the next level\"\n"
-        "- \"Drop a comment below!\" / \"Follow for more!\" / \"Like and share\"\n"
-        "- \"Here's the thing:\" / \"The truth is:\" / \"Let me tell you something:\"\n"
-        "- \"Sound familiar?\" / \"Let's break it down\" / \"Here's why it matters\" / "
-        "\"Let's talk about it\" / \"Let me explain\" (momentum-killing filler after hooks)\n"
-        "- Starting 3+ sentences with \"It's\" or \"This is\"\n"
-        "- Emoji bullet lists (fire Point one, pin Point two, lightbulb Point three)\n"
-        "- More than 2 emojis in any single post\n"
-        "- Generic advice that could apply to any business in any industry\n"
-        "- Ending with an exclamation mark on more than 1 sentence\n"
-        "- Fabricated statistics, percentages, or specific numbers not from the brand profile\n"
-        "- \"We've seen countless...\" / \"Many businesses...\" / \"So many [people/clients/owners]...\" "
-        "(vague social proof — use the brand's real data or skip social proof entirely)\n\n"
-        "REQUIRED:\n"
-        "- VALUE FIRST: The caption must TEACH — a specific tip, fact, insight, "
-        "or perspective the reader didn't know. The brand is the NARRATOR, not the subject.\n"
-        "  BAD: 'At [Brand], we partner with [audience] to provide [service].' (brand-as-subject paragraph)\n"
-        "  GOOD: '[Specific insight]. We spotted this for a client last quarter.' (brand woven into the story)\n"
-        "- NO BRAND PARAGRAPHS: Never dedicate a full paragraph to describing the brand's services, "
-        "history, or value proposition. The brand name should appear at most ONCE, "
-        "embedded naturally in a sentence that's primarily about the reader's problem or the insight.\n"
-        "- At least one SPECIFIC detail (number, name, timeframe, scenario) from the brand profile\n"
-        "- A human perspective — first person (\"we\", \"I\", \"our clients\") not third person\n"
-        "- Content that could ONLY come from this brand, not a generic template\n"
-        "- CTA DISCIPLINE: End with ONE type of CTA — either an engagement question "
-        "(\"What's your approach?\") OR a conversion action (\"Book a call\" / \"DM us\"), NEVER both. "
-        "Engagement questions get more reach; conversion CTAs get more leads. Pick one per post.\n"
-        "  BY DERIVATIVE TYPE:\n"
-        "  - video_first: CTA is optional — a cliffhanger or curiosity hook works better than a forced CTA.\n"
-        "  - story: CTA required (swipe up / reply / DM — the CTA IS the point of a story).\n"
-        "  - pin: CTA is implicit in the action-oriented title ('How to...', 'Try this...'). "
-        "Do NOT add an explicit question or conversion CTA.\n"
-        "  - carousel/original/blog_snippet: CTA required.\n"
-        "  BY PLATFORM (overrides above when stricter):\n"
-        "  - Threads: ONLY engagement questions, NEVER conversion CTAs. A hot take that naturally "
-        "invites replies is better than an explicit question.\n"
-        "  - Mastodon: Do NOT include any CTA. No engagement questions, no conversion actions. "
-        "The community boosts genuinely useful content. Asking for engagement is considered spam.\n"
-        "  - Bluesky: Engagement questions must be SPECIFIC to the content topic. "
-        "Generic questions ('What do you think?', 'Thoughts?') are treated as spam.\n"
-        "  - Facebook: Engagement questions should be the default. Conversion CTAs get zero organic reach.\n"
-        "  - YouTube Shorts: 'Subscribe' is a valid CTA — not a generic CTA."
-    )
-
-    # Hook quality enforcement
-    _HOOK_BLOCK = (
-        "HOOK RULES (your opening line determines if anyone reads the rest):\n"
-        "1. SPECIFICITY: Include a number, timeframe, or concrete detail from the brand's real experience.\n"
-        "   BAD: \"Growing your business is hard\"\n"
-        "   GOOD: \"After 20 years in this industry, here's the one mistake we still see every quarter\"\n"
-        "2. PATTERN INTERRUPT — use one of these structures (rotate across the week, never repeat):\n"
-        "   - Contrarian: \"Stop [common advice]. Here's what actually works.\"\n"
-        "   - Story opener: \"A client came to us last [season] because...\"\n"
-        "   - Number: \"[X] mistakes we see every [timeframe] in [industry]\"\n"
-        "   - Question: \"What would change if you [specific outcome]?\"\n"
-        "   - Confession: \"We almost made this mistake ourselves.\"\n"
-        "3. NEVER start with: \"Are you...?\", \"Did you know...?\", \"What if...?\", \"In today's...\", \"As a...\", \"When it comes to...\"\n"
-        "4. The hook from the brief is a STARTING POINT — rewrite it to be specific and surprising."
-    )
-
-    # Pinterest: SEO-driven titles, not social hook patterns
-    if platform == "pinterest":
-        _HOOK_BLOCK = (
-            "PIN TITLE RULES:\n"
-            "- Keyword-rich, action-oriented title under 100 characters\n"
-            "- Start with a verb or number ('5 Ways...', 'How to...', 'Try this...')\n"
-            "- Optimize for Pinterest search, not social engagement\n"
-            "- No question hooks, no contrarian takes — just clear, searchable value"
-        )
-
-    # ── Self-Review Checklist (appended to every prompt) ──
-    _SELF_REVIEW_CHECKLIST = (
-        "\n--- SELF-REVIEW (run EVERY check before outputting. If ANY check fails, "
-        "rewrite BEFORE outputting. Output ONLY the final corrected caption — no drafts, "
-        "no explanations.) ---\n\n"
-
-        "☐ HOOK: Does my first line match a banned opener? "
-        "(Are you...?, Did you know...?, What if...?, In today's..., As a..., "
-        "When it comes to..., Still [verb]-ing...?, [Role] won't tell you..., "
-        "You might be [missing/leaving]..., Imagine [outcome]..., "
-        "[Number] ways/reasons/tips..., The secret to...)\n"
-        "  → REWRITE as a concrete, mid-story statement or a bold claim rooted in "
-        "the brand's specific domain. No rhetorical or clickbait questions. No direct address. "
-        "The hook must be a complete, compelling thought within the pre-fold window.\n"
-        "  PLATFORM EXCEPTIONS — X: a short provocative question or hot take (<60 chars) is native; "
-        "allow if not from the banned list. TikTok: 'Stop [verb]-ing' and lowercase imperatives are native. "
-        "Threads/Bluesky: a genuine, specific question is acceptable if not from the banned list. "
-        "Pinterest: rewrite as a keyword-rich descriptive phrase a user would search for — "
-        "no first person, no social hooks. YouTube Shorts: keep it short and curiosity-driven, "
-        "subordinate to the video.\n"
-        "  TONE — X: tight and opinionated, sentence fragments OK. "
-        "TikTok: lowercase and casual, if it reads like a press release rewrite as a text message. "
-        "Facebook: warm and relational, first-person stories over informational statements.\n\n"
-
-        "☐ BRAND PARAGRAPH & VOICE: Did I write a sentence where the brand is the subject "
-        "and the verb describes what the brand does, offers, or believes? "
-        "(e.g., '[Brand] specializes in...', '[Brand] has been helping...', 'At [Brand], we...') "
-        "Did I shift person (I/we/you/they/the brand) inconsistently within the caption? "
-        "Did I restate the brand's category as if it were a value proposition?\n"
-        "  → DELETE brand-as-subject sentences. The brand appears once, as the resolution to "
-        "the reader's problem, never as the topic. Pick one voice (first-person singular for "
-        "thought leadership, second-person for educational, first-person plural for brand voice) "
-        "and hold it for the entire caption. Pinterest: no first person in titles or descriptions.\n\n"
-
-        "☐ FORMATTING & HASHTAGS: Did I use emoji bullet lists, emoji as section markers, "
-        "more than 2 emoji total, markdown syntax (**bold**, ### headers, [links]()), "
-        "or numbered lists (LinkedIn permits short numbered lists ≤5 items)? "
-        "Did I use hashtags on Pinterest (deprecated — remove them), "
-        "lowercase hashtags on Mastodon (use #CamelCase for screen reader accessibility), "
-        "or #Shorts on YouTube Shorts (unnecessary — remove it)?\n"
-        "  → REMOVE all markdown. REMOVE emoji bullets and section markers. "
-        "Reduce to 0–2 emoji max. Keep paragraphs to 1–2 sentences for mobile readability. "
-        "TikTok carousel: up to 4 emoji permitted as inline visual rhythm. "
-        "Mastodon: fix all hashtags to #CamelCase. Pinterest: remove all hashtags.\n"
-        "  HASHTAG COUNTS — X: 0–2 inline only, never stacked at end. "
-        "TikTok: 3–5 niche-specific at caption end (never #fyp #viral). "
-        "Facebook: 0–1 max. Instagram: ≤5, in a separate block after the caption body, "
-        "no inline hashtags mid-sentence.\n\n"
-
-        "☐ FILLER & PACING: Did I include a stalling phrase? "
-        "(Here's the thing, Let's break it down, Here's why this matters, Here's the truth, "
-        "The reality is, Think about it, Let me explain, It's no secret that, It's simple, "
-        "The good news is, Sound familiar?)\n"
-        "  → DELETE the phrase. Start the sentence with the actual content that follows it.\n\n"
-
-        "☐ SPECIFICITY: Did I use a generic claim or advice not tied to this brand's actual data, "
-        "niche, or offering? (post consistently, engage with your audience, stay ahead of the curve, "
-        "take your business to the next level, in today's competitive landscape, unlock your potential, "
-        "it's a game-changer) Did I restate the brand's industry category as a value proposition?\n"
-        "  → REPLACE with a concrete detail from the brand brief or DELETE entirely. "
-        "If I cannot make it specific, it does not belong.\n\n"
-
-        "☐ SOCIAL PROOF: Did I use a vague quantifier? "
-        "(countless, many businesses, many clients, so many, numerous, a growing number of, "
-        "tons of, hundreds of)\n"
-        "  → REPLACE with a specific number from the brand profile. "
-        "If no number exists, REMOVE the claim — do not fabricate.\n\n"
-
-        "☐ FABRICATION: Did I invent a statistic, percentage, dollar amount, timeframe, "
-        "or regulatory/legal claim not provided in the brand brief?\n"
-        "  → DELETE and restate qualitatively (e.g., 'improved cash flow' not "
-        "'boosted revenue by 30%'). Never invent numbers.\n\n"
-
-        "☐ CTA: Do I have more than one call to action (engagement question + conversion CTA, "
-        "or two of either)? Does my CTA violate platform norms?\n"
-        "  PLATFORM RULES — Mastodon: ZERO CTAs, no engagement bait; prepend CW: [topic] for "
-        "food/diet, politics, mental health, or corporate content. "
-        "Threads: conversational only, no 'link in bio', no conversion language. "
-        "TikTok: embedded in narrative, not appended. "
-        "X: no appended links or 'check out' directives — embed as a reply prompt. "
-        "Facebook: conversational engagement questions only — no 'tag a friend', no link-pushing; "
-        "a light conversational question improves distribution, so keep one if natural. "
-        "Pinterest: action-verb CTAs only ('Try', 'Save', 'Make') — no 'Follow us' or 'Visit our site'. "
-        "YouTube Shorts: 'Subscribe' / 'Follow for more' are valid; no other conversion CTAs. "
-        "Bluesky: no generic engagement bait ('Thoughts?' = spam) — ask a specific question or omit. "
-        "LinkedIn: no raw URLs in caption body (suppresses reach).\n"
-        "  → KEEP only one. Match platform tone. When in doubt, cut the CTA entirely.\n\n"
-
-        "☐ LENGTH & FOLD: Does my caption fit the platform character limit? "
-        "Does my strongest hook land BEFORE the fold?\n"
-        "  LIMITS — X: 280 chars hard limit, no fold. "
-        "TikTok video: 200 chars max. TikTok carousel: up to 800 chars, keyword-rich. "
-        "Instagram: 125 chars before fold, best at <300 or 800–1200 total. "
-        "LinkedIn: 140 chars before fold, best at 1000–1800 total. "
-        "Facebook: 140 chars before fold. "
-        "Bluesky: 300 chars hard limit (not 280). "
-        "Threads: 500 chars limit, 200–300 sweet spot. "
-        "Pinterest: title ≤100 chars, front-load keywords in first 50 chars of description. "
-        "YouTube Shorts: ~100 chars visible before truncation. "
-        "Mastodon: 500 chars total, no fold.\n"
-        "  → CUT from the middle, never the hook or close. Front-load the hook into the "
-        "pre-fold window. Avoid the 400–700 char dead zone on Instagram. "
-        "For carousel slides: each slide carries one complete idea in ≤15 words; "
-        "do not split a sentence across slides.\n\n"
-
-        "--- END SELF-REVIEW ---\n"
-    )
-
-    # Industry hook research context (from strategy agent web search)
-    _hook_research = day_brief.get("hook_research", "")
-    _hook_context = (
-        f"\nINDUSTRY HOOK RESEARCH (use these patterns as inspiration):\n{_hook_research}\n"
-    ) if _hook_research else ""
-
     # ── Storytelling + Social Proof Strategy ──
     _story_details = []
     _has_years = bool(brand_profile.get("years_in_business"))
@@ -922,37 +971,6 @@ async def generate_post(
     else:
         _proof_tier = "thin_profile"
 
-    _PROOF_STRATEGIES = {
-        "data_rich": (
-            "SOCIAL PROOF STRATEGY (your brand has strong data — USE IT):\n"
-            "- Lead with hard numbers: 'After {years} years and {clients}+ clients...'\n"
-            "- Reference real experience patterns: 'In {years} years, the #1 mistake we see is...'\n"
-            "- NEVER use vague framing ('many clients', 'countless businesses') — "
-            "you have real numbers, use them.\n"
-        ),
-        "partial_data": (
-            "SOCIAL PROOF STRATEGY (use what you have, don't inflate):\n"
-            "- Use available data specifically: 'After {years} years...' or "
-            "'Working with {clients}+ clients...'\n"
-            "- For missing data, use PROCESS AUTHORITY instead: 'The first thing we check is...' / "
-            "'In our experience, the pattern looks like...'\n"
-            "- NEVER inflate: no 'countless', 'many', or 'so many' — either cite the real number "
-            "or describe your process.\n"
-        ),
-        "thin_profile": (
-            "SOCIAL PROOF STRATEGY (NO volume claims — ZERO tolerance):\n"
-            "- You have NO data about years in business or client count. Do NOT reference either.\n"
-            "- ABSOLUTELY FORBIDDEN phrases: 'We've seen...', 'Our clients...', 'Over the years...', "
-            "'Many businesses...', 'Countless...', 'Time and again...', 'We've helped...', "
-            "'Clients tell us...', 'We see clients...', 'Clients typically...'\n"
-            "- Lead with EDUCATIONAL AUTHORITY: teach a specific, actionable insight. "
-            "The teaching IS the proof.\n"
-            "- Use PROCESS AUTHORITY: 'The first thing to check is...' / "
-            "'Here's what most people miss about...'\n"
-            "- If you catch yourself writing 'we' + a verb implying client volume, DELETE the sentence.\n"
-        ),
-    }
-
     _storytelling_block = ""
     if _story_details:
         _proof_strategy = _PROOF_STRATEGIES[_proof_tier]
@@ -991,9 +1009,11 @@ async def generate_post(
             "- The insight IS the credibility. Nothing else.\n"
         )
 
+    thin_profile = _proof_tier == "thin_profile" or not _story_details
+
     # ── Social proof prompt guard (thin profiles only) ──
     _social_proof_guard = ""
-    if _proof_tier == "thin_profile" or not _story_details:
+    if thin_profile:
         _social_proof_guard = (
             "\n⚠️ SOCIAL PROOF HARD BLOCK ⚠️\n"
             "This brand has NO verified client data. You MUST NOT:\n"
@@ -1004,10 +1024,160 @@ async def generate_post(
             "If your draft contains ANY of the above, DELETE those sentences before outputting.\n\n"
         )
 
+    _social_proof_checklist_item = ""
+    if thin_profile:
+        _social_proof_checklist_item = (
+            "☐ THIN-PROFILE SOCIAL PROOF (this brand has NO verified client data):\n"
+            "  Did I write ANY of these? → DELETE the entire sentence:\n"
+            "  - 'We've seen...' / 'We see...' / 'We find...'\n"
+            "  - 'Our clients...' / 'Clients tell us...' / 'Clients typically...'\n"
+            "  - 'We've helped...' / 'We've worked with...'\n"
+            "  - 'Over the years...' / 'In our experience...'\n"
+            "  - 'Many businesses...' / 'Countless...' / 'Time and again...'\n"
+            "  → You have ZERO client data. The ONLY proof is teaching something specific.\n\n"
+        )
+
+    _industry = brand_profile.get("industry", "")
+    system_prompt = (
+        f"You write social media content for {brand_profile.get('business_name', 'Brand')}"
+        f"{f' ({_industry})' if _industry else ''}, "
+        f"targeting {brand_profile.get('target_audience', 'general audience')}.\n"
+        f"Brand tone: {brand_profile.get('tone', 'professional')}\n"
+        f"Visual style: {brand_profile.get('visual_style', '')}\n"
+        f"{caption_style_directive}\n"
+        f"{social_voice_block}\n"
+        f"{_QUALITY_BLOCK}\n\n"
+        f"{_storytelling_block}\n"
+        f"{_social_proof_guard}{_SELF_REVIEW_CHECKLIST}\n"
+        f"{_social_proof_checklist_item}"
+    )
+    return _BrandPromptBlocks(system_prompt=system_prompt, thin_profile=thin_profile)
+
+
+async def _generate_caption(
+    brand_profile: dict, contents, route: str = "caption", **config_kwargs,
+):
+    """Caption-model call with the brand's system prompt served from the context cache.
+
+    ``route`` picks the model from MODEL_ROUTES.
+    """
+    return await context_cache.generate_content(
+        client,
+        kind="generate",
+        scope_id=brand_profile.get("brand_id", ""),
+        version=_GENERATION_PROMPT_VERSION,
+        model=MODEL_ROUTES[route],
+        system_instruction=_brand_prompt_blocks(brand_profile).system_prompt,
+        contents=contents,
+        **config_kwargs,
+    )
+
+
+async def _generate_carousel_slide(
+    slide_text: str,
+    slide_num: int,
+    business_name: str,
+    visual_style: str,
+    color_hint: str,
+    image_style_directive: str,
+    style_ref_block: str,
+) -> tuple[bytes, str] | None:
+    """Generate one carousel slide image (1-based ``slide_num``).
+
+    Returns (image_bytes, mime_type), or None if generation failed.
+    """
+    prompt = (
+        f"Generate a social media carousel slide image (slide {slide_num}).\n"
+        f"Brand: {business_name}. Visual style: {visual_style}.\n"
+        f"{color_hint}\n"
+        f"Slide content: {slide_text[:300]}\n"
+        f"{image_style_directive}\n"
+        f"{style_ref_block}"
+        "Create a clean, visually striking image that illustrates this slide's message.\n"
+        "Do NOT include any text, watermarks, or captions in the image."
+    )
+    try:
+        resp = await asyncio.to_thread(
+            client.models.generate_content,
+            model=GEMINI_IMAGE_MODEL,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                response_modalities=["IMAGE"],
+                temperature=0.9,
+            ),
+        )
+        for part in resp.candidates[0].content.parts:
+            if part.inline_data:
+                return (part.inline_data.data, part.inline_data.mime_type or "image/png")
+    except Exception as e:
+        logger.error("Carousel slide %d generation failed: %s", slide_num, e)
+    return None
+
+
+async def generate_post(
+    plan_id: str,
+    day_brief: dict,
+    brand_profile: dict,
+    post_id: str,
+    custom_photo_bytes: bytes | None = None,
+    custom_photo_mime: str = "image/jpeg",
+    instructions: str | None = None,
+    prior_hooks: list[str] | None = None,
+    hook_index: HookIndex | None = None,
+) -> AsyncIterator[dict]:
+    """
+    Generate a social media post using Gemini 2.5 Flash.
+
+    If custom_photo_bytes is provided (BYOP mode): Gemini vision analyzes the
+    photo and writes a caption; the photo is used as the hero image (no image
+    generation budget consumed).
+
+    Otherwise: interleaved TEXT+IMAGE generation (normal mode).
+
+    Yields SSE-compatible event dicts: {"event": str, "data": dict}
+
+    Events emitted (in order):
+      {"event": "status",  "data": {"message": "..."}}
+      {"event": "caption", "data": {"text": "...", "chunk": True}}   # streamed chunks
+      {"event": "caption", "data": {"text": "...", "chunk": False, "hashtags": [...]}}  # final
+      {"event": "image",   "data": {"url": "...", "mime_type": "image/png"}}
+      {"event": "complete","data": {"post_id": "...", "caption": "...", "hashtags": [...], "image_url": "..."}}
+      {"event": "error",   "data": {"message": "..."}}  # on failure
+    """
+
+    platform = day_brief.get("platform", "instagram")
+    pillar = day_brief.get("pillar", "education")
+    content_theme = day_brief.get("content_theme", "")
+    caption_hook = day_brief.get("caption_hook", "")
+    key_message = day_brief.get("key_message", "")
+    image_prompt = day_brief.get("image_prompt", "")
+    hashtags_hint = _sanitize_hashtags(day_brief.get("hashtags", []), platform)
+    derivative_type = day_brief.get("derivative_type", "original")
+
+    business_name = brand_profile.get("business_name", "Brand")
+    industry = brand_profile.get("industry", "")
+    target_audience = brand_profile.get("target_audience", "general audience")
+    visual_style = brand_profile.get("visual_style", "")
+    image_style_directive = brand_profile.get("image_style_directive", "")
+    colors = brand_profile.get("colors", [])
+    style_reference_gcs_uri = brand_profile.get("style_reference_gcs_uri")
+
+    # Brand tone, quality rules, social proof strategy and the self-review
+    # checklist go in the cached system prompt (_generate_caption)
+    _brand_blocks = _brand_prompt_blocks(brand_profile)
+    _hook_block = _PIN_TITLE_BLOCK if platform == "pinterest" else _HOOK_BLOCK
+
+    # Industry hook research context (from strategy agent web search)
+    _hook_research = day_brief.get("hook_research", "")
+    _hook_context = (
+        f"\nINDUSTRY HOOK RESEARCH (use these patterns as inspiration):\n{_hook_research}\n"
+    ) if _hook_research else ""
+
     # ── Pillar-aware social proof relaxation ──
+    _pillar_guard = ""
     _pillar = day_brief.get("pillar", "")
-    if _pillar == "behind_the_scenes" and (_proof_tier == "thin_profile" or not _story_details):
-        _social_proof_guard += (
+    if _pillar == "behind_the_scenes" and _brand_blocks.thin_profile:
+        _pillar_guard += (
             "PILLAR EXCEPTION — behind_the_scenes:\n"
             "You MAY describe the team's workflow, collaboration style, office environment, "
             "and professional process. 'Our team' and 'we' are fine for BTS content.\n"
@@ -1016,7 +1186,7 @@ async def generate_post(
         )
 
     # ── Education pillar boost for thin-profile brands ──
-    if _pillar == "education" and (_proof_tier == "thin_profile" or not _story_details):
+    if _pillar == "education" and _brand_blocks.thin_profile:
         _platform = day_brief.get("platform", "")
         _edu_tone = ""
         if _platform == "facebook":
@@ -1034,7 +1204,7 @@ async def generate_post(
                 "Use bullet points for multi-step processes. Max 2 sentences per paragraph. "
                 "No dense text blocks — break complex ideas into scannable chunks.\n"
             )
-        _social_proof_guard += (
+        _pillar_guard += (
             "EDUCATION PILLAR — THIN PROFILE BOOST:\n"
             "Education is this brand's PRIMARY trust signal. Go DEEP, not broad.\n"
             "- Name a SPECIFIC technique, rule, framework, or method — not general advice\n"
@@ -1046,178 +1216,26 @@ async def generate_post(
             f"{_edu_tone}\n"
         )
 
-    _social_proof_checklist_item = ""
-    if _proof_tier == "thin_profile" or not _story_details:
-        _social_proof_checklist_item = (
-            "☐ THIN-PROFILE SOCIAL PROOF (this brand has NO verified client data):\n"
-            "  Did I write ANY of these? → DELETE the entire sentence:\n"
-            "  - 'We've seen...' / 'We see...' / 'We find...'\n"
-            "  - 'Our clients...' / 'Clients tell us...' / 'Clients typically...'\n"
-            "  - 'We've helped...' / 'We've worked with...'\n"
-            "  - 'Over the years...' / 'In our experience...'\n"
-            "  - 'Many businesses...' / 'Countless...' / 'Time and again...'\n"
-            "  → You have ZERO client data. The ONLY proof is teaching something specific.\n\n"
-        )
-
     # ── CTA enforcement from strategy agent ──
     _cta_type = day_brief.get("cta_type", "engagement")
-    _CTA_ENFORCEMENT = {
-        "engagement": (
-            "CTA CONSTRAINT: This post uses an ENGAGEMENT CTA only.\n"
-            "End with ONE conversational question or discussion prompt.\n"
-            "Do NOT include any conversion language (no 'book', 'DM', 'link in bio', 'visit').\n"
-        ),
-        "conversion": (
-            "CTA CONSTRAINT: This post uses a CONVERSION CTA only.\n"
-            "End with ONE clear action step (book, DM, save, visit).\n"
-            "Do NOT also add an engagement question — one CTA only.\n"
-        ),
-        "implied": (
-            "CTA CONSTRAINT: This post uses an IMPLIED CTA.\n"
-            "The content should naturally lead the reader to want the brand's service.\n"
-            "Do NOT add any explicit CTA — no questions, no 'book a call', no 'DM us'.\n"
-        ),
-        "none": (
-            "CTA CONSTRAINT: This post has NO CTA.\n"
-            "Do NOT include any call to action — no questions, no conversion language, no 'thoughts?'\n"
-        ),
-    }
     _cta_block = _CTA_ENFORCEMENT.get(_cta_type, _CTA_ENFORCEMENT["engagement"])
 
     # Dynamic char limit for self-review checklist
     _spec = get_platform(platform)
-    _deriv_char_limit = (_spec.char_limits or {}).get(derivative_type) or (_spec.char_limits or {}).get("default", 0)
+    _deriv_char_limit = _char_limit(platform, derivative_type)
     _char_limit_reminder = (
         f"\nCHARACTER LIMIT FOR THIS POST: {platform} {derivative_type} = {_deriv_char_limit} chars max. "
         f"If your caption exceeds {_deriv_char_limit} characters, REWORD it to fit — "
         f"do NOT just cut off mid-sentence. The caption must be a complete thought.\n"
     ) if _deriv_char_limit else ""
 
-    # Format-specific instructions for derivative post types
-    _DERIVATIVE_INSTRUCTIONS: dict[str, str] = {
-        "carousel": (
-            "FORMAT: Instagram/LinkedIn CAROUSEL (3 slides)\n"
-            "Structure the caption as slide-by-slide copy:\n"
-            "  Slide 1: Hook (compelling, ≤10 words — this becomes the cover). "
-            "ALL hook rules above apply here — no 'Are you...?', 'Did you know...?', etc.\n"
-            "  Slide 2: Teach ONE specific insight — name a real technique, rule, or method. "
-            "Then give a CONCRETE EXAMPLE showing it in practice (a scenario, a number, a before/after). "
-            "NOT a platitude like 'plan proactively.' GIVE the actual insight AND show what it looks like.\n"
-            "  Slide 3: Actionable takeaway the reader can do TODAY + call to action. "
-            "Be specific: 'Compare X to Y this week' not 'Improve your operations.'\n"
-            "Label each slide clearly: 'Slide 1:', 'Slide 2:', 'Slide 3:'.\n"
-            "SUBSTANCE CHECK: If any slide could apply to every business in the industry, "
-            "it's too generic. Rewrite it."
-        ),
-        "thread_hook": (
-            "FORMAT: THREAD\n"
-            "Write 3-7 posts (use as many as the content requires — every post must carry a specific insight).\n"
-            "  1/ Hook that stops the scroll. "
-            "ALL hook rules above apply — no 'Are you...?', 'Did you know...?', etc.\n"
-            "  Middle posts: One key insight per post, concise and punchy. "
-            "No filler — if a post doesn't add a new fact or angle, cut it.\n"
-            "  Last post: A final INSIGHT or actionable takeaway — NOT a brand pitch. "
-            "Every post in the thread (including the last) must teach something. "
-            "If a CTA is assigned, weave it into the insight naturally. "
-            "BAD last post: 'Growing your business requires expert guidance. Contact us.' "
-            "GOOD last post: 'tl;dr — Track the 3 metrics that matter. Review them weekly. "
-            "Adjust before problems compound. Most issues are fixable when caught early.'\n"
-            "Per-post limit: X = 280 chars, Bluesky = 300 chars.\n"
-            "Separate each post with a blank line. Each must stand alone AND deliver standalone value.\n"
-            "Note: Bluesky threads don't need 1/2/3/ numbering (the UI handles threading). "
-            "X threads use 1/ 2/ 3/ numbering."
-        ),
-        "blog_snippet": (
-            "FORMAT: LinkedIn THOUGHT LEADERSHIP excerpt\n"
-            "Write 150–200 words total:\n"
-            "  - Bold opening: opinion-forward statement OR a specific, contrarian question "
-            "(NOT a generic 'Are you...?' question)\n"
-            "  - 2–3 short paragraphs expanding the idea with a real insight or example\n"
-            "  - Closing question to spark discussion in the comments\n"
-            "Professional but conversational tone."
-        ),
-        "story": (
-            "FORMAT: Instagram/Facebook STORY\n"
-            "Write ≤50 words total — short, punchy, immediate:\n"
-            "  - First line: big emotion, bold question, or surprising statement\n"
-            "  - One clear call to action (swipe up / reply / DM us)\n"
-            "No hashtags in the body — add them in the HASHTAGS section only."
-        ),
-        "pin": (
-            "FORMAT: Pinterest PIN\n"
-            "Write as two clearly labeled parts:\n"
-            "  PIN TITLE: ≤100 chars, keyword-rich, compelling headline\n"
-            "  PIN DESCRIPTION: 200-250 chars, SEO-optimized with natural keywords\n"
-            "No hashtags — use searchable keywords naturally."
-        ),
-        "video_first": (
-            "FORMAT: VIDEO-FIRST POST\n"
-            "The VIDEO is the content. Your caption is a teaser, not an article.\n"
-            "LENGTH: 1-3 sentences MAX.\n"
-            "- Instagram/TikTok Reels/YouTube Shorts: 50-150 chars ideal, 200 max. "
-            "Your caption appears ON TOP of the video — shorter is better.\n"
-            "- LinkedIn/Facebook video: under 500 chars. Give the reader a reason to press play.\n"
-            "Write a hook that makes people want to WATCH, not read.\n"
-            "Do NOT describe what happens in the video — create curiosity.\n"
-            "Do NOT include a brand paragraph — the video speaks for the brand."
-        ),
-        "original": (
-            "FORMAT: STANDARD POST (single image + caption)\n"
-            "Structure:\n"
-            "  - Hook: 1 sentence that stops the scroll — specific, mid-story, or contrarian. "
-            "Must land BEFORE the platform fold. ALL hook rules above apply.\n"
-            "  - Body: 2-4 short paragraphs (1-2 sentences each for mobile readability). "
-            "Teach something, share an insight, or tell a micro-story.\n"
-            "  - Close: CTA or takeaway matching the assigned cta_type.\n"
-            "LENGTH: Instagram 150-300 words (hook ≤125 chars), "
-            "LinkedIn 150-300 words (hook ≤140 chars), "
-            "Facebook 100-250 words (hook ≤140 chars), "
-            "TikTok under 500 chars, Threads 200-500 chars, "
-            "X under 280 chars (single punchy thought), "
-            "Bluesky under 300 chars, Mastodon under 500 chars, "
-            "YouTube Shorts under 300 chars.\n"
-            "Do NOT write a brand paragraph. The image supports the caption."
-        ),
-    }
     derivative_instruction = _DERIVATIVE_INSTRUCTIONS.get(derivative_type, "")
-
-    # Thin-profile overrides: redirect "be specific" away from client stories
-    if derivative_instruction and (_proof_tier in ("thin_profile",) or not _story_details):
-        _THIN_PROFILE_OVERRIDES: dict[str, str] = {
-            "carousel": (
-                "\nTHIN-PROFILE OVERRIDE (this brand has NO client data):\n"
-                "  Slide 2: Teach a CONCRETE TECHNIQUE — a step-by-step method, "
-                "a specific rule of thumb, or a named framework. "
-                "Do NOT invent client stories, dollar amounts, or case studies.\n"
-                "  Slide 3: Give the reader ONE thing they can do TODAY. "
-                "Do NOT say 'Book a consultation' unless the CTA type is 'conversion'.\n"
-                "  SUBSTANCE means TEACHING DEPTH, not brand-specific claims."
-            ),
-            "blog_snippet": (
-                "\nTHIN-PROFILE OVERRIDE (this brand has NO client data):\n"
-                "  Your 'real insight or example' must be a TECHNIQUE or INDUSTRY FACT — "
-                "not a client story. Teach something the reader can apply immediately.\n"
-                "  Do NOT reference clients, outcomes, or volume in any form."
-            ),
-            "thread_hook": (
-                "\nTHIN-PROFILE OVERRIDE (this brand has NO client data):\n"
-                "  Each post's 'key insight' must be a TECHNIQUE, FACT, or FRAMEWORK — "
-                "not a client story or outcome. Teach something concrete per post.\n"
-                "  Do NOT reference clients, outcomes, or volume in any form."
-            ),
-        }
+    if derivative_instruction and _brand_blocks.thin_profile:
         _override = _THIN_PROFILE_OVERRIDES.get(derivative_type, "")
         if _override:
             derivative_instruction += _override
 
-    _spec = get_platform(platform)
     platform_format = _spec.content_prompt
-    # Derivative-type overrides for aspect ratio (e.g. story → 9:16, pin → 2:3)
-    _DERIVATIVE_ASPECTS: dict[str, str] = {
-        "story": "9:16",
-        "pin": "2:3",
-        "blog_snippet": "1.91:1",
-    }
     _aspect = _DERIVATIVE_ASPECTS.get(derivative_type, _spec.image_aspect)
     aspect_hint = f"Generate a {_aspect} aspect ratio image." if _aspect != "1:1" else ""
 
@@ -1249,10 +1267,7 @@ async def generate_post(
         _voice_directive = f"\n{platform.upper()} VOICE: {_spec.voice}\n" if _spec.voice else ""
         byop_prompt = f"""You are a {platform} content specialist for {industry} brands. You write for {business_name}, targeting {target_audience}.
 {_voice_directive}
-Brand tone: {tone}
-Visual style: {visual_style}
-{caption_style_directive}
-{social_voice_block}{f"CONTENT FORMAT:{chr(10)}{derivative_instruction}{chr(10)}" if derivative_instruction else ""}{f"{platform_format}{chr(10)}" if platform_format else ""}
+{f"CONTENT FORMAT:{chr(10)}{derivative_instruction}{chr(10)}" if derivative_instruction else ""}{f"{platform_format}{chr(10)}" if platform_format else ""}
 {_build_dedup_block(prior_hooks)}Analyze this photo and write a {platform} post caption that:
 - Complements and describes what's in the photo
 - Fits the "{content_theme}" theme for the "{pillar}" content pillar
@@ -1260,11 +1275,9 @@ Visual style: {visual_style}
 - Carries this key message: {key_message}
 {instruction_hint}
 
-{_QUALITY_BLOCK}
-{_HOOK_BLOCK}
-{_hook_context}{_storytelling_block}
-{_social_proof_guard}{_SELF_REVIEW_CHECKLIST}{_char_limit_reminder}
-{_social_proof_checklist_item}{_cta_block}
+{_hook_block}
+{_hook_context}{_pillar_guard}{_char_limit_reminder}
+{_cta_block}
 After the caption, add relevant hashtags on a new line starting with HASHTAGS:
 CRITICAL: Only output real hashtags. Never convert sentence fragments into hashtags.
 """
@@ -1275,14 +1288,10 @@ CRITICAL: Only output real hashtags. Never convert sentence fragments into hasht
             )
             text_part = types.Part(text=byop_prompt)
 
-            response = await asyncio.to_thread(
-                client.models.generate_content,
-                model=GEMINI_MODEL,
-                contents=[image_part, text_part],
-                config=types.GenerateContentConfig(
-                    response_modalities=["TEXT"],
-                    temperature=0.7,
-                ),
+            response = await _generate_caption(
+                brand_profile, [image_part, text_part],
+                response_modalities=["TEXT"],
+                temperature=0.7,
             )
 
             full_text = "".join(
@@ -1305,10 +1314,13 @@ CRITICAL: Only output real hashtags. Never convert sentence fragments into hasht
             yield {"event": "status", "data": {"message": "Saving your photo..."}}
             image_url = None
             image_gcs_uri = None
+            image_renditions: dict = {}
             try:
-                image_url, image_gcs_uri = await upload_image_to_gcs(
-                    custom_photo_bytes, custom_photo_mime, post_id
+                image_url, image_gcs_uri, _renditions = await store_generated_image(
+                    custom_photo_bytes, custom_photo_mime, post_id, _aspect
                 )
+                if _renditions:
+                    image_renditions[image_gcs_uri] = _renditions
                 yield {
                     "event": "image",
                     "data": {"url": image_url, "mime_type": custom_photo_mime, "gcs_uri": image_gcs_uri},
@@ -1333,6 +1345,7 @@ CRITICAL: Only output real hashtags. Never convert sentence fragments into hasht
             yield {"event": "status", "data": {"message": "Reviewing content..."}}
             final_caption, parsed_hashtags, _gate_review = await _review_gate(
                 final_caption, parsed_hashtags, platform, derivative_type, brand_profile, day_brief,
+                hook_index=hook_index,
             )
             _gate_score = (_gate_review or {}).get("score", 0)
 
@@ -1342,11 +1355,8 @@ CRITICAL: Only output real hashtags. Never convert sentence fragments into hasht
                                _gate_score, platform, derivative_type)
                 yield {"event": "status", "data": {"message": "Regenerating content..."}}
                 try:
-                    regen_response = await asyncio.to_thread(
-                        client.models.generate_content,
-                        model=GEMINI_MODEL,
-                        contents=[image_part, text_part],
-                        config=types.GenerateContentConfig(temperature=0.8),
+                    regen_response = await _generate_caption(
+                        brand_profile, [image_part, text_part], temperature=0.8,
                     )
                     regen_text = "".join(
                         p.text for p in regen_response.candidates[0].content.parts if p.text
@@ -1399,6 +1409,7 @@ CRITICAL: Only output real hashtags. Never convert sentence fragments into hasht
                     "hashtags": parsed_hashtags,
                     "image_url": image_url,
                     "image_gcs_uri": image_gcs_uri,
+                    "image_renditions": image_renditions,
                     **({"review": _gate_review} if _gate_review else {}),
                 },
             }
@@ -1416,9 +1427,7 @@ CRITICAL: Only output real hashtags. Never convert sentence fragments into hasht
         _voice_directive = f"\n{platform.upper()} VOICE: {_spec.voice}\n" if _spec.voice else ""
         video_prompt = f"""You are a {platform} content specialist for {industry} brands. You write for {business_name}, targeting {target_audience}.
 {_voice_directive}
-Brand tone: {tone}
-{caption_style_directive}
-{social_voice_block}{f"CONTENT FORMAT:{chr(10)}{derivative_instruction}{chr(10)}" if derivative_instruction else ""}{f"{platform_format}{chr(10)}" if platform_format else ""}{trend_block}
+{f"CONTENT FORMAT:{chr(10)}{derivative_instruction}{chr(10)}" if derivative_instruction else ""}{f"{platform_format}{chr(10)}" if platform_format else ""}{trend_block}
 {_build_dedup_block(prior_hooks)}Create a {platform} video-first post for the "{pillar}" content pillar on the theme: "{content_theme}".
 
 Hook direction: "{caption_hook}" — use this ANGLE but rewrite it to be specific and surprising.
@@ -1427,24 +1436,18 @@ Key message: {key_message}
 Write a compelling caption to accompany a video clip. The video is the main content — the caption supports it.
 {instruction_hint}
 
-{_QUALITY_BLOCK}
-{_HOOK_BLOCK}
-{_hook_context}{_storytelling_block}
-{_social_proof_guard}{_SELF_REVIEW_CHECKLIST}{_char_limit_reminder}
-{_social_proof_checklist_item}{_cta_block}
+{_hook_block}
+{_hook_context}{_pillar_guard}{_char_limit_reminder}
+{_cta_block}
 After the caption, add relevant hashtags on a new line starting with HASHTAGS:
 CRITICAL: Only output real hashtags. Never convert sentence fragments into hashtags.
 """
 
         try:
-            response = await asyncio.to_thread(
-                client.models.generate_content,
-                model=GEMINI_MODEL,
-                contents=video_prompt,
-                config=types.GenerateContentConfig(
-                    response_modalities=["TEXT"],
-                    temperature=0.7,
-                ),
+            response = await _generate_caption(
+                brand_profile, video_prompt,
+                response_modalities=["TEXT"],
+                temperature=0.7,
             )
 
             full_text = "".join(
@@ -1470,6 +1473,7 @@ CRITICAL: Only output real hashtags. Never convert sentence fragments into hasht
             yield {"event": "status", "data": {"message": "Reviewing content..."}}
             final_caption, parsed_hashtags, _gate_review = await _review_gate(
                 final_caption, parsed_hashtags, platform, derivative_type, brand_profile, day_brief,
+                hook_index=hook_index,
             )
             _gate_score = (_gate_review or {}).get("score", 0)
 
@@ -1479,11 +1483,8 @@ CRITICAL: Only output real hashtags. Never convert sentence fragments into hasht
                                _gate_score, platform, derivative_type)
                 yield {"event": "status", "data": {"message": "Regenerating content..."}}
                 try:
-                    regen_response = await asyncio.to_thread(
-                        client.models.generate_content,
-                        model=GEMINI_MODEL,
-                        contents=video_prompt,
-                        config=types.GenerateContentConfig(temperature=0.8),
+                    regen_response = await _generate_caption(
+                        brand_profile, video_prompt, temperature=0.8,
                     )
                     regen_text = "".join(
                         p.text for p in regen_response.candidates[0].content.parts if p.text
@@ -1564,10 +1565,7 @@ CRITICAL: Only output real hashtags. Never convert sentence fragments into hasht
     _voice_directive = f"\n{platform.upper()} VOICE: {_spec.voice}\n" if _spec.voice else ""
     prompt = f"""You are a {platform} content specialist for {industry} brands. You write for {business_name}, targeting {target_audience}.
 {_voice_directive}
-Brand tone: {tone}
-Visual style: {visual_style}
-{caption_style_directive}
-{social_voice_block}{image_style_directive}
+{image_style_directive}
 {style_ref_block}{f"CONTENT FORMAT:{chr(10)}{derivative_instruction}{chr(10)}" if derivative_instruction else ""}{f"{platform_format}{chr(10)}" if platform_format else ""}{trend_block}
 {_build_dedup_block(prior_hooks)}Create a {platform} post for the "{pillar}" content pillar on the theme: "{content_theme}".
 
@@ -1577,11 +1575,9 @@ Key message: {key_message}
 Write the caption (following the format above if specified), engaging and on-brand.
 {instruction_hint}
 
-{_QUALITY_BLOCK}
-{_HOOK_BLOCK}
-{_hook_context}{_storytelling_block}
-{_social_proof_guard}{_SELF_REVIEW_CHECKLIST}{_char_limit_reminder}
-{_social_proof_checklist_item}{_cta_block}
+{_hook_block}
+{_hook_context}{_pillar_guard}{_char_limit_reminder}
+{_cta_block}
 After the caption, add relevant hashtags on a new line starting with HASHTAGS:
 CRITICAL: Only output real hashtags. Never convert sentence fragments into hashtags.
 """
@@ -1591,6 +1587,7 @@ CRITICAL: Only output real hashtags. Never convert sentence fragments into hasht
     image_mime = "image/png"
     image_url = None
     image_gcs_uri = None
+    all_image_renditions: dict = {}
     parsed_hashtags = None
 
     # Build multimodal contents: text prompt + brand reference images
@@ -1611,27 +1608,39 @@ CRITICAL: Only output real hashtags. Never convert sentence fragments into hasht
         logger.warning("Failed to load brand reference images: %s", e)
 
     try:
-        # ── Step 1: Text-only caption generation (GEMINI_MODEL — faster, cheaper) ──
-        response = await asyncio.to_thread(
-            client.models.generate_content,
-            model=GEMINI_MODEL,
-            contents=prompt,
-            config=types.GenerateContentConfig(temperature=0.7),
-        )
+        # ── Step 1: Text-only caption generation (caption model — faster, cheaper) ──
+        _candidate_review = None
+        if CAPTION_CANDIDATES > 1:
+            # Several candidates from one call; the local checks pick which
+            # ones are worth a review round-trip
+            response = await _generate_caption(
+                brand_profile, prompt, temperature=0.7, candidate_count=CAPTION_CANDIDATES,
+            )
+            candidates = [
+                _split_caption_hashtags(
+                    _strip_markdown(_fix_mojibake("".join(
+                        p.text for p in (cand.content.parts if cand.content else []) if p.text
+                    ))),
+                    platform,
+                )
+                for cand in response.candidates or []
+            ]
+            full_caption, parsed_hashtags, _candidate_review = await _pick_caption_candidate(
+                candidates, platform, derivative_type, brand_profile, day_brief, hashtags_hint,
+            )
+        else:
+            response = await _generate_caption(
+                brand_profile, prompt, temperature=0.7,
+            )
 
-        for part in response.candidates[0].content.parts:
-            if part.text:
-                text = part.text
-                if "HASHTAGS:" in text:
-                    caption_part, hashtag_part = text.split("HASHTAGS:", 1)
-                    full_caption += caption_part.strip()
-                    raw_tags = hashtag_part.strip().replace("\n", " ")
-                    parsed_hashtags = _sanitize_hashtags(
-                        [t.strip() for t in raw_tags.split() if t.strip()],
-                        platform,
-                    )
-                else:
-                    full_caption += text
+            for part in response.candidates[0].content.parts:
+                if part.text:
+                    text = part.text
+                    if "HASHTAGS:" in text:
+                        caption_part, parsed_hashtags = _split_caption_hashtags(text, platform)
+                        full_caption += caption_part
+                    else:
+                        full_caption += text
 
         final_hashtags = parsed_hashtags if parsed_hashtags else hashtags_hint
         # Fix mojibake, strip markdown, smart condense if over limit
@@ -1660,11 +1669,8 @@ CRITICAL: Only output real hashtags. Never convert sentence fragments into hasht
                 )
             retry_prompt += "After the caption, add relevant hashtags on a new line starting with HASHTAGS:"
             try:
-                retry_response = await asyncio.to_thread(
-                    client.models.generate_content,
-                    model=GEMINI_MODEL,
-                    contents=retry_prompt,
-                    config=types.GenerateContentConfig(temperature=0.4),
+                retry_response = await _generate_caption(
+                    brand_profile, retry_prompt, route="format_retry", temperature=0.4,
                 )
                 retry_text = ""
                 for rpart in retry_response.candidates[0].content.parts:
@@ -1691,8 +1697,11 @@ CRITICAL: Only output real hashtags. Never convert sentence fragments into hasht
 
         # ── Step 2: Review gate — hold caption until 7+ ──
         yield {"event": "status", "data": {"message": "Reviewing content..."}}
+        if _candidate_review is not None and final_caption != full_caption.strip():
+            _candidate_review = None  # caption changed after it was scored
         final_caption, final_hashtags, _gate_review = await _review_gate(
             final_caption, final_hashtags, platform, derivative_type, brand_profile, day_brief,
+            review=_candidate_review, hook_index=hook_index,
         )
         _gate_score = (_gate_review or {}).get("score", 0)
 
@@ -1702,11 +1711,8 @@ CRITICAL: Only output real hashtags. Never convert sentence fragments into hasht
                            _gate_score, platform, derivative_type)
             yield {"event": "status", "data": {"message": "Regenerating content..."}}
             try:
-                regen_response = await asyncio.to_thread(
-                    client.models.generate_content,
-                    model=GEMINI_MODEL,
-                    contents=prompt,
-                    config=types.GenerateContentConfig(temperature=0.8),
+                regen_response = await _generate_caption(
+                    brand_profile, prompt, temperature=0.8,
                 )
                 regen_text = regen_response.text.strip()
                 if "HASHTAGS:" in regen_text:
@@ -1778,82 +1784,134 @@ CRITICAL: Only output real hashtags. Never convert sentence fragments into hasht
         )
         img_contents.insert(0, img_prompt)
 
-        try:
-            img_response = await asyncio.to_thread(
-                client.models.generate_content,
-                model=GEMINI_IMAGE_MODEL,
-                contents=img_contents,
-                config=types.GenerateContentConfig(
-                    response_modalities=["IMAGE"],
-                    temperature=0.9,
-                ),
-            )
-            for img_part in img_response.candidates[0].content.parts:
-                if img_part.inline_data:
-                    image_bytes = img_part.inline_data.data
-                    image_mime = img_part.inline_data.mime_type or "image/png"
-                    break
-
-            if image_bytes:
+        async def _cover_image() -> dict:
+            """Generate + upload the hero image (slide 0 for carousels)."""
+            out: dict = {}
+            try:
+                img_response = await asyncio.to_thread(
+                    client.models.generate_content,
+                    model=GEMINI_IMAGE_MODEL,
+                    contents=img_contents,
+                    config=types.GenerateContentConfig(
+                        response_modalities=["IMAGE"],
+                        temperature=0.9,
+                    ),
+                )
+                for img_part in img_response.candidates[0].content.parts:
+                    if img_part.inline_data:
+                        out["bytes"] = img_part.inline_data.data
+                        out["mime"] = img_part.inline_data.mime_type or "image/png"
+                        break
+                if not out:
+                    logger.error("Image generation returned no image for post %s", post_id)
+                    return out
                 try:
-                    image_url, image_gcs_uri = await upload_image_to_gcs(image_bytes, image_mime, post_id)
+                    out["url"], out["gcs_uri"], out["renditions"] = await store_generated_image(
+                        out["bytes"], out["mime"], post_id, _aspect
+                    )
                     bt.budget_tracker.record_image()
-                    yield {
-                        "event": "image",
-                        "data": {"url": image_url, "mime_type": image_mime, "gcs_uri": image_gcs_uri}
-                    }
                 except Exception as upload_err:
                     logger.error("Image upload failed: %s", upload_err)
-                    b64 = base64.b64encode(image_bytes).decode()
+            except Exception as img_err:
+                logger.error("Image generation failed for post %s: %s", post_id, img_err)
+            return out
+
+        async def _carousel_slide(slide_index: int, slide_text: str) -> dict:
+            """Generate + upload one extra carousel slide; {} on failure."""
+            generated = await _generate_carousel_slide(
+                slide_text, slide_index + 1,
+                business_name=business_name,
+                visual_style=visual_style,
+                color_hint=color_hint,
+                image_style_directive=image_style_directive,
+                style_ref_block=style_ref_block,
+            )
+            if generated is None:
+                return {}
+            slide_bytes, slide_mime = generated
+            try:
+                url, gcs_uri, renditions = await store_generated_image(
+                    slide_bytes, slide_mime, post_id, _aspect
+                )
+            except Exception as upload_err:
+                logger.error("Carousel slide upload failed: %s", upload_err)
+                return {}
+            bt.budget_tracker.record_image()
+            return {"mime": slide_mime, "url": url, "gcs_uri": gcs_uri, "renditions": renditions}
+
+        # Carousel slides don't depend on the cover image, so they are generated
+        # alongside it and each is emitted as soon as it is uploaded.
+        slide_descriptions: list[str] = []
+        if derivative_type == "carousel" and final_caption:
+            slide_descriptions = _parse_slide_descriptions(final_caption)
+            if len(slide_descriptions) <= 1:
+                slide_descriptions = []
+        is_carousel = bool(slide_descriptions)
+
+        async def _tagged(slide_index: int, is_cover: bool, coro) -> tuple[int, bool, dict]:
+            return slide_index, is_cover, await coro
+
+        pending = {asyncio.ensure_future(_tagged(0, True, _cover_image()))}
+        for i, text in enumerate(slide_descriptions[1:3], start=1):  # max 2 additional
+            pending.add(asyncio.ensure_future(_tagged(i, False, _carousel_slide(i, text))))
+        if is_carousel:
+            yield {"event": "status", "data": {"message": "Generating carousel slides..."}}
+
+        slides: dict[int, dict] = {}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for fut in sorted(done, key=lambda f: f.result()[0]):
+                    slide_index, is_cover, result = fut.result()
+                    if is_cover:
+                        image_bytes = result.get("bytes")
+                        image_mime = result.get("mime", image_mime)
+                        image_url = result.get("url")
+                        image_gcs_uri = result.get("gcs_uri")
+                        if image_bytes and not image_gcs_uri:
+                            # Upload failed — show the image inline rather than nothing
+                            b64 = base64.b64encode(image_bytes).decode()
+                            yield {
+                                "event": "image",
+                                "data": {
+                                    "url": f"data:{image_mime};base64,{b64}",
+                                    "mime_type": image_mime,
+                                    "fallback": True,
+                                    **({"slide_index": 0} if is_carousel else {}),
+                                }
+                            }
+                        elif not image_bytes and is_carousel:
+                            # No cover: the first slide description stands in for it
+                            pending.add(asyncio.ensure_future(
+                                _tagged(0, False, _carousel_slide(0, slide_descriptions[0]))
+                            ))
+                        if not image_gcs_uri:
+                            continue
+                    elif not result:
+                        continue
+                    slides[slide_index] = result
+                    if result.get("renditions"):
+                        all_image_renditions[result["gcs_uri"]] = result["renditions"]
                     yield {
                         "event": "image",
                         "data": {
-                            "url": f"data:{image_mime};base64,{b64}",
-                            "mime_type": image_mime,
-                            "fallback": True,
+                            "url": result["url"],
+                            "mime_type": result["mime"],
+                            "gcs_uri": result["gcs_uri"],
+                            **({"slide_index": slide_index} if is_carousel else {}),
                         }
                     }
-            else:
-                logger.error("Image generation returned no image for post %s", post_id)
-        except Exception as img_err:
-            logger.error("Image generation failed for post %s: %s", post_id, img_err)
-
-        # ── Init image URL lists (carousel slides appended below) ──
-        all_image_urls: list[str] = []
-        all_image_gcs_uris: list[str] = []
-        if image_url:
-            all_image_urls.append(image_url)
-        if image_gcs_uri:
-            all_image_gcs_uris.append(image_gcs_uri)
-
-        # ── Carousel: generate additional slide images ──
-        if derivative_type == "carousel" and final_caption:
-            slide_descriptions = _parse_slide_descriptions(final_caption)
-            if len(slide_descriptions) > 1:
-                yield {"event": "status", "data": {"message": "Generating carousel slides..."}}
-                extra_slides = await _generate_carousel_images(
-                    slide_descriptions,
-                    business_name=business_name,
-                    visual_style=visual_style,
-                    color_hint=color_hint,
-                    image_style_directive=image_style_directive,
-                    style_ref_block=style_ref_block,
-                    platform=platform,
-                    post_id=post_id,
-                    cover_image_bytes=image_bytes,
-                )
-                for slide_bytes, slide_mime in extra_slides:
-                    try:
-                        slide_url, slide_gcs = await upload_image_to_gcs(slide_bytes, slide_mime, post_id)
-                        bt.budget_tracker.record_image()
-                        all_image_urls.append(slide_url)
-                        all_image_gcs_uris.append(slide_gcs)
-                        yield {
-                            "event": "image",
-                            "data": {"url": slide_url, "mime_type": slide_mime, "gcs_uri": slide_gcs}
-                        }
-                    except Exception as upload_err:
-                        logger.error("Carousel slide upload failed: %s", upload_err)
+        finally:
+            # Stream closed early: don't leave orphaned generations running
+            for fut in pending:
+                fut.cancel()
+
+        # ── Image URL lists, in slide order ──
+        all_image_urls = [slides[i]["url"] for i in sorted(slides)]
+        all_image_gcs_uris = [slides[i]["gcs_uri"] for i in sorted(slides)]
+        if not image_gcs_uri and all_image_urls:
+            # Cover failed but a stand-in slide 0 was generated
+            image_url, image_gcs_uri = all_image_urls[0], all_image_gcs_uris[0]
 
         yield {
             "event": "complete",
@@ -1865,6 +1923,7 @@ CRITICAL: Only output real hashtags. Never convert sentence fragments into hasht
                 "image_gcs_uri": image_gcs_uri,
                 "image_urls": all_image_urls,
                 "image_gcs_uris": all_image_gcs_uris,
+                "image_renditions": all_image_renditions,
                 **({"review": _gate_review} if _gate_review else {}),
             }
         }
@@ -6,9 +6,11 @@ import logging
 import uuid
 
 from PIL import Image
-from google.cloud import storage
 from google.genai import types
 
+from backend.services import media_cache
+from backend.services.storage_client import download_gcs_uri, get_storage_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,13 +27,8 @@ async def edit_image(
     """Edit an image using Gemini Flash Image generation.
     Returns new GCS URI of the edited image.
     """
-    # Download current image from GCS
-    storage_client = storage.Client()
-    bucket_name = image_gcs_uri.replace("gs://", "").split("/")[0]
-    blob_path = "/".join(image_gcs_uri.replace("gs://", "").split("/")[1:])
-    bucket = storage_client.bucket(bucket_name)
-    blob = bucket.blob(blob_path)
-    image_bytes = blob.download_as_bytes()
+    # Fetch current image (usually a media-cache hit for chained edits)
+    image_bytes = await download_gcs_uri(image_gcs_uri)
 
     # Open image with PIL (SDK accepts PIL.Image directly)
     pil_image = Image.open(io.BytesIO(image_bytes))
@@ -82,9 +79,11 @@ async def edit_image(
     # Save to GCS and return URI
     ext = "jpg" if "jpeg" in edited_mime else "png"
     new_blob_name = f"posts/edited_{uuid.uuid4().hex[:12]}.{ext}"
-    new_bucket = storage_client.bucket(gcs_bucket)
+    new_bucket = get_storage_client().bucket(gcs_bucket)
     new_blob = new_bucket.blob(new_blob_name)
-    new_blob.upload_from_string(edited_bytes, content_type=edited_mime)
+    await asyncio.to_thread(new_blob.upload_from_string, edited_bytes, content_type=edited_mime)
     new_uri = f"gs://{gcs_bucket}/{new_blob_name}"
+    # The next edit in the chain starts from this image
+    media_cache.put(new_uri, new_blob.generation, edited_bytes)
     logger.info("image_editor: saved edited image to %s", new_uri)
     return new_uri
@@ -2,9 +2,14 @@ import asyncio
 import json
 import logging
 from google import genai
-from google.genai import types
-from backend.config import GOOGLE_API_KEY, GEMINI_MODEL
+from backend.config import (
+    GOOGLE_API_KEY,
+    MODEL_ROUTES,
+    REVIEW_ESCALATE_MAX,
+    REVIEW_ESCALATE_MIN,
+)
 from backend.platforms import get_review_guidelines_block
+from backend.services import context_cache
 
 logger = logging.getLogger(__name__)
 client = genai.Client(api_key=GOOGLE_API_KEY)
@@ -160,22 +165,12 @@ _DERIVATIVE_CHECKS = {
 }
 
 
-async def review_post(
-    post: dict,
-    brand_profile: dict,
-    social_proof_tier: str | None = None,
-    cta_type: str | None = None,
-) -> dict:
-    """
-    AI review of a generated post against brand guidelines.
-    Returns a ReviewResult dict with scores and suggestions.
-    """
-    # Fix 11a: Extract derivative_type from post
-    derivative_type = post.get("derivative_type", "original")
-    platform = post.get("platform", "instagram")
-    caption = post.get("caption", "")
-    hashtags = post.get("hashtags", [])
+# Bump when the review system prompt changes so cached prefixes are rebuilt
+_REVIEW_PROMPT_VERSION = "1"
+
 
+def _review_system_prompt(brand_profile: dict) -> str:
+    """Brand context, rubric, mandatory checks and output format shared by every review."""
     business_name = brand_profile.get("business_name", "Brand")
     tone = brand_profile.get("tone", "professional")
     target_audience = brand_profile.get("target_audience", "general audience")
@@ -189,82 +184,7 @@ async def review_post(
         f"or 'include a CTA'):\n{_raw_style}" if _raw_style else ""
     )
 
-    # Build platform-specific and derivative-specific check blocks
-    platform_checks = _PLATFORM_REVIEW_CHECKS.get(platform, "")
-    derivative_checks = _DERIVATIVE_CHECKS.get(derivative_type, "")
-
-    # Conditional social proof check for thin-profile brands
-    social_proof_check = ""
-    if social_proof_tier in ("thin_profile", None) or not brand_profile.get("storytelling_strategy"):
-        social_proof_check = (
-            "THIN-PROFILE SOCIAL PROOF CHECK (CRITICAL — this brand has NO verified client data):\n"
-            "- ANY reference to clients, client counts, years of experience, or client outcomes "
-            "is FABRICATED — deduct 3 points\n"
-            "- Specific dollar amounts, percentages, or statistics not in the brand profile — "
-            "deduct 3 points (these are made up)\n"
-            "- 'We helped a client...', 'One client saved...', 'A local business...' — "
-            "ALL fabricated, deduct 3 points\n"
-            "- 'We've seen...', 'Our clients...', 'Many businesses...' — deduct 2 points\n"
-            "- The ONLY valid proof is teaching a specific, actionable insight\n"
-            "- SPECIFICITY for thin-profile brands means TEACHING DEPTH in the brand's industry — "
-            "not brand stories, client data, or unique approach claims. A post that teaches a concrete "
-            "technique IS specific, even if it doesn't mention the brand's track record.\n"
-            "- IMPORTANT FOR REVISION_NOTES: Do NOT suggest 'add brand-specific examples' or "
-            "'reference the brand's unique approach' — this brand has NO data for that. "
-            "Instead suggest: 'replace the fabricated claim with a specific, teachable insight' "
-            "or 'remove the client story and teach a concrete technique instead.'\n\n"
-        )
-
-    # Conditional CTA type enforcement
-    cta_check = ""
-    if cta_type:
-        _CTA_REVIEW = {
-            "engagement": (
-                "CTA TYPE CHECK: This post was assigned an ENGAGEMENT CTA.\n"
-                "- Must end with a conversational question or discussion prompt\n"
-                "- Any conversion language ('book', 'DM', 'link in bio', 'visit', 'save this') — deduct 2 points\n"
-                "- For cta_effectiveness scoring: score 8-10 if the post ends with a specific, "
-                "thought-provoking question relevant to the content. Score 5-7 if the question is generic "
-                "('What do you think?', 'Thoughts?'). Score 1-4 only if there's no question at all "
-                "or it includes conversion language.\n\n"
-            ),
-            "conversion": (
-                "CTA TYPE CHECK: This post was assigned a CONVERSION CTA.\n"
-                "- Must end with one clear action step (book, DM, save, visit)\n"
-                "- Should NOT also have an engagement question (dual CTA) — deduct 1 point\n"
-                "- For cta_effectiveness scoring: score 8-10 if the CTA is clear, specific, and has "
-                "one action step. Score 5-7 if the CTA is present but vague or there's a dual CTA. "
-                "Score 1-4 only if there's no conversion CTA at all.\n\n"
-            ),
-            "implied": (
-                "CTA TYPE CHECK: This post was assigned an IMPLIED CTA.\n"
-                "- Content should naturally lead reader to want the service\n"
-                "- Any explicit CTA (questions, 'book a call', 'DM us') — deduct 2 points\n"
-                "- For cta_effectiveness scoring: score 8-10 if the content naturally implies value or "
-                "next steps without any explicit ask. Score 5-7 if the implication is weak but no explicit "
-                "CTA exists. Do NOT score low for 'no explicit CTA' — implied is the intent.\n\n"
-            ),
-            "none": (
-                "CTA TYPE CHECK: This post was assigned NO CTA.\n"
-                "- Any call to action whatsoever (questions, conversion, 'thoughts?') — deduct 2 points\n"
-                "- For cta_effectiveness scoring: score 8-10 if the post correctly avoids CTAs. "
-                "Do NOT score low for 'no CTA' — that is the INTENDED behavior for this post.\n\n"
-            ),
-        }
-        cta_check = _CTA_REVIEW.get(cta_type, "")
-
-    # ── Thin-profile scoring rubric adjustment ──
-    _thin_profile_rubric = ""
-    if social_proof_tier in ("thin_profile", None) or not brand_profile.get("storytelling_strategy"):
-        _thin_profile_rubric = (
-            "\nTHIN-PROFILE SCORING NOTE:\n"
-            "This brand has no client data. Education depth IS the differentiator.\n"
-            "- Score 7+ REQUIRES teaching a specific, named technique or actionable insight\n"
-            "- Generic advice ('plan ahead', 'stay organized', 'consult a professional') caps at 6\n"
-            "- Content that could apply to any business in the industry without changes caps at 5\n"
-        )
-
-    prompt = f"""You are an objective social media content reviewer for {business_name}.
+    return f"""You are an objective social media content reviewer for {business_name}.
 Your job is to evaluate whether this content meets professional publishing standards.
 Be specific and evidence-based. Do NOT inflate scores to be polite — if the content
 is generic or has issues, say so directly with concrete reasons.
@@ -274,10 +194,6 @@ Industry: {industry}
 Target audience: {target_audience}
 {caption_style_directive}
 
-Review this {platform} post (derivative type: {derivative_type}):
-Caption: "{caption}"
-Hashtags: {hashtags}
-
 {get_review_guidelines_block()}
 
 SCORING RUBRIC (follow this strictly):
@@ -289,10 +205,9 @@ SCORING RUBRIC (follow this strictly):
 7: Good — no quality rule violations, genuine hook with a pattern interrupt,
    platform-appropriate format, specific to the brand
 8: Strong — teaches something actionable, hook creates a knowledge gap,
-   CTA matches post intent, would perform above average on {platform}
+   CTA matches post intent, would perform above average on its platform
 9-10: Exceptional — viral potential, perfectly crafted for platform algorithm,
    voice indistinguishable from best human creators
-{_thin_profile_rubric}
 Most AI-generated content should score 5-7. Scoring 8+ should be RARE.
 If you give 8+, you must explain exactly why in strengths.
 
@@ -323,13 +238,9 @@ MANDATORY CHECKS (flag these and reduce score accordingly):
 - MOMENTUM KILLERS: "Sound familiar?", "Let's break it down",
   "Here's why it matters", "Let me explain" — deduct 1 point
 
-{platform_checks}
-
-{derivative_checks}
-
-{social_proof_check}{cta_check}Flag captions that are too long for their platform. Check hashtags for junk (sentence fragments, common words like #the, #for, #your).
+Flag captions that are too long for their platform. Check hashtags for junk (sentence fragments, common words like #the, #for, #your).
 
-Evaluate and respond with JSON only:
+Respond with JSON only:
 {{
   "score": <integer 1-10, overall brand quality score — use the rubric above>,
   "brand_alignment": <"strong"|"moderate"|"weak">,
@@ -342,72 +253,350 @@ Evaluate and respond with JSON only:
     "hook_strength": <integer 1-10: how compelling the opening line is — will people stop scrolling?>,
     "relevance": <integer 1-10: how on-brand and relevant to target audience>,
     "cta_effectiveness": <integer 1-10: how clear and motivating the call-to-action is>,
-    "platform_fit": <integer 1-10: how well the format, length, and hashtag use fits {platform}>,
+    "platform_fit": <integer 1-10: how well the format, length, and hashtag use fits the post's platform>,
     "teaching_depth": <integer 1-10: does the post teach something SPECIFIC and ACTIONABLE?
       8-10: names a concrete technique, rule, framework, or step-by-step method.
       5-7: gives general advice but no specific method.
       1-4: purely promotional or no educational value.
       Score 0 for non-education posts (promotion, BTS).>
   }},
-  "engagement_prediction": <"low"|"medium"|"high"|"viral" — predicted relative engagement vs average for {platform}>
+  "engagement_prediction": <"low"|"medium"|"high"|"viral" — predicted relative engagement vs average for the post's platform>
 }}"""
 
+
+# Conditional social proof check for thin-profile brands
+_SOCIAL_PROOF_CHECK = (
+    "THIN-PROFILE SOCIAL PROOF CHECK (CRITICAL — this brand has NO verified client data):\n"
+    "- ANY reference to clients, client counts, years of experience, or client outcomes "
+    "is FABRICATED — deduct 3 points\n"
+    "- Specific dollar amounts, percentages, or statistics not in the brand profile — "
+    "deduct 3 points (these are made up)\n"
+    "- 'We helped a client...', 'One client saved...', 'A local business...' — "
+    "ALL fabricated, deduct 3 points\n"
+    "- 'We've seen...', 'Our clients...', 'Many businesses...' — deduct 2 points\n"
+    "- The ONLY valid proof is teaching a specific, actionable insight\n"
+    "- SPECIFICITY for thin-profile brands means TEACHING DEPTH in the brand's industry — "
+    "not brand stories, client data, or unique approach claims. A post that teaches a concrete "
+    "technique IS specific, even if it doesn't mention the brand's track record.\n"
+    "- IMPORTANT FOR REVISION_NOTES: Do NOT suggest 'add brand-specific examples' or "
+    "'reference the brand's unique approach' — this brand has NO data for that. "
+    "Instead suggest: 'replace the fabricated claim with a specific, teachable insight' "
+    "or 'remove the client story and teach a concrete technique instead.'\n\n"
+)
+
+# ── Thin-profile scoring rubric adjustment ──
+_THIN_PROFILE_RUBRIC = (
+    "\nTHIN-PROFILE SCORING NOTE:\n"
+    "This brand has no client data. Education depth IS the differentiator.\n"
+    "- Score 7+ REQUIRES teaching a specific, named technique or actionable insight\n"
+    "- Generic advice ('plan ahead', 'stay organized', 'consult a professional') caps at 6\n"
+    "- Content that could apply to any business in the industry without changes caps at 5\n"
+)
+
+# Conditional CTA type enforcement
+_CTA_REVIEW = {
+    "engagement": (
+        "CTA TYPE CHECK: This post was assigned an ENGAGEMENT CTA.\n"
+        "- Must end with a conversational question or discussion prompt\n"
+        "- Any conversion language ('book', 'DM', 'link in bio', 'visit', 'save this') — deduct 2 points\n"
+        "- For cta_effectiveness scoring: score 8-10 if the post ends with a specific, "
+        "thought-provoking question relevant to the content. Score 5-7 if the question is generic "
+        "('What do you think?', 'Thoughts?'). Score 1-4 only if there's no question at all "
+        "or it includes conversion language.\n\n"
+    ),
+    "conversion": (
+        "CTA TYPE CHECK: This post was assigned a CONVERSION CTA.\n"
+        "- Must end with one clear action step (book, DM, save, visit)\n"
+        "- Should NOT also have an engagement question (dual CTA) — deduct 1 point\n"
+        "- For cta_effectiveness scoring: score 8-10 if the CTA is clear, specific, and has "
+        "one action step. Score 5-7 if the CTA is present but vague or there's a dual CTA. "
+        "Score 1-4 only if there's no conversion CTA at all.\n\n"
+    ),
+    "implied": (
+        "CTA TYPE CHECK: This post was assigned an IMPLIED CTA.\n"
+        "- Content should naturally lead reader to want the service\n"
+        "- Any explicit CTA (questions, 'book a call', 'DM us') — deduct 2 points\n"
+        "- For cta_effectiveness scoring: score 8-10 if the content naturally implies value or "
+        "next steps without any explicit ask. Score 5-7 if the implication is weak but no explicit "
+        "CTA exists. Do NOT score low for 'no explicit CTA' — implied is the intent.\n\n"
+    ),
+    "none": (
+        "CTA TYPE CHECK: This post was assigned NO CTA.\n"
+        "- Any call to action whatsoever (questions, conversion, 'thoughts?') — deduct 2 points\n"
+        "- For cta_effectiveness scoring: score 8-10 if the post correctly avoids CTAs. "
+        "Do NOT score low for 'no CTA' — that is the INTENDED behavior for this post.\n\n"
+    ),
+}
+
+# Posts per batched review request; keeps the JSON array response comfortably
+# inside the output token limit
+_REVIEW_BATCH_SIZE = 6
+
+
+def _is_thin_profile(brand_profile: dict, social_proof_tier: str | None) -> bool:
+    return social_proof_tier in ("thin_profile", None) or not brand_profile.get("storytelling_strategy")
+
+
+def _parse_json(text: str):
+    raw = text.strip()
+    if raw.startswith("```"):
+        lines = raw.split("\n")
+        raw = "\n".join(lines[1:-1])
+    return json.loads(raw)
+
+
+def _normalize_review(result: dict) -> dict:
+    """Coerce a raw model review into the ReviewResult shape."""
+    raw_engagement = result.get("engagement_scores") or {}
+    final_score = int(result.get("score", 5))
+    # Hard-coded threshold — don't trust the model's approved field
+    approved = final_score >= 8
+    return {
+        "score": final_score,
+        "brand_alignment": result.get("brand_alignment", "moderate"),
+        "strengths": result.get("strengths", []),
+        "improvements": result.get("improvements", []),
+        "approved": approved,
+        "revision_notes": result.get("revision_notes"),
+        "revised_hashtags": result.get("revised_hashtags"),
+        "engagement_scores": {
+            "hook_strength": int(raw_engagement.get("hook_strength", 5)),
+            "relevance": int(raw_engagement.get("relevance", 5)),
+            "cta_effectiveness": int(raw_engagement.get("cta_effectiveness", 5)),
+            "platform_fit": int(raw_engagement.get("platform_fit", 5)),
+            "teaching_depth": int(raw_engagement.get("teaching_depth", 0)),
+        },
+        "engagement_prediction": result.get("engagement_prediction", "medium"),
+    }
+
+
+def _fallback_review() -> dict:
+    return {
+        "score": 5,
+        "brand_alignment": "moderate",
+        "strengths": ["Content generated successfully"],
+        "improvements": ["Review service temporarily unavailable"],
+        "approved": True,
+        "revision_notes": None,
+        "engagement_scores": {
+            "hook_strength": 5,
+            "relevance": 5,
+            "cta_effectiveness": 5,
+            "platform_fit": 5,
+            "teaching_depth": 0,
+        },
+        "engagement_prediction": "medium",
+    }
+
+
+def _needs_escalation(result: dict | None) -> bool:
+    """A pre-screen result that should be re-scored by the full review model."""
+    return result is None or REVIEW_ESCALATE_MIN <= result["score"] <= REVIEW_ESCALATE_MAX
+
+
+async def _generate_review(brand_profile: dict, prompt: str, model: str):
+    return await context_cache.generate_content(
+        client,
+        kind="review",
+        scope_id=brand_profile.get("brand_id", ""),
+        version=_REVIEW_PROMPT_VERSION,
+        model=model,
+        system_instruction=_review_system_prompt(brand_profile),
+        contents=prompt,
+        response_mime_type="application/json",
+        temperature=0.3,
+    )
+
+
+async def _review_single(
+    post: dict,
+    brand_profile: dict,
+    social_proof_tier: str | None,
+    cta_type: str | None,
+    model: str,
+) -> dict | None:
+    """One review request on ``model``; None if it fails."""
+    # Fix 11a: Extract derivative_type from post
+    derivative_type = post.get("derivative_type", "original")
+    platform = post.get("platform", "instagram")
+    caption = post.get("caption", "")
+    hashtags = post.get("hashtags", [])
+
+    # Build platform-specific and derivative-specific check blocks
+    platform_checks = _PLATFORM_REVIEW_CHECKS.get(platform, "")
+    derivative_checks = _DERIVATIVE_CHECKS.get(derivative_type, "")
+    thin_profile = _is_thin_profile(brand_profile, social_proof_tier)
+    social_proof_check = _SOCIAL_PROOF_CHECK if thin_profile else ""
+    _thin_profile_rubric = _THIN_PROFILE_RUBRIC if thin_profile else ""
+    cta_check = _CTA_REVIEW.get(cta_type, "") if cta_type else ""
+
+    prompt = f"""Review this {platform} post (derivative type: {derivative_type}):
+Caption: "{caption}"
+Hashtags: {hashtags}
+{_thin_profile_rubric}
+{platform_checks}
+
+{derivative_checks}
+
+{social_proof_check}{cta_check}Evaluate it against the rubric and checks above and respond with JSON only, in the format above."""
+
     try:
-        response = await asyncio.to_thread(
-            client.models.generate_content,
-            model=GEMINI_MODEL,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json",
-                temperature=0.3,
-            ),
-        )
-
-        raw = response.text.strip()
-        if raw.startswith("```"):
-            lines = raw.split("\n")
-            raw = "\n".join(lines[1:-1])
-
-        result = json.loads(raw)
-
-        # Normalize fields
-        raw_engagement = result.get("engagement_scores", {})
-        final_score = int(result.get("score", 5))
-        # Hard-coded threshold — don't trust the model's approved field
-        approved = final_score >= 8
-        return {
-            "score": final_score,
-            "brand_alignment": result.get("brand_alignment", "moderate"),
-            "strengths": result.get("strengths", []),
-            "improvements": result.get("improvements", []),
-            "approved": approved,
-            "revision_notes": result.get("revision_notes"),
-            "revised_hashtags": result.get("revised_hashtags"),
-            "engagement_scores": {
-                "hook_strength": int(raw_engagement.get("hook_strength", 5)),
-                "relevance": int(raw_engagement.get("relevance", 5)),
-                "cta_effectiveness": int(raw_engagement.get("cta_effectiveness", 5)),
-                "platform_fit": int(raw_engagement.get("platform_fit", 5)),
-                "teaching_depth": int(raw_engagement.get("teaching_depth", 0)),
-            },
-            "engagement_prediction": result.get("engagement_prediction", "medium"),
-        }
+        response = await _generate_review(brand_profile, prompt, model)
+        return _normalize_review(_parse_json(response.text))
+    except Exception as e:
+        logger.error(f"Review agent error ({model}): {e}")
+        return None
+
+
+async def review_post(
+    post: dict,
+    brand_profile: dict,
+    social_proof_tier: str | None = None,
+    cta_type: str | None = None,
+) -> dict:
+    """
+    AI review of a generated post against brand guidelines.
+    Returns a ReviewResult dict with scores and suggestions.
+
+    The pre-screen model scores first; borderline or failed pre-screens are
+    re-scored by the full review model.
+    """
+    prescreen_model = MODEL_ROUTES["review_prescreen"]
+    review_model = MODEL_ROUTES["review"]
+    result = await _review_single(post, brand_profile, social_proof_tier, cta_type, prescreen_model)
+    if review_model != prescreen_model and _needs_escalation(result):
+        escalated = await _review_single(post, brand_profile, social_proof_tier, cta_type, review_model)
+        if escalated is not None:
+            result = escalated
+    return result or _fallback_review()
+
+
+async def _review_chunk(
+    posts: list[dict], brand_profile: dict, thin_profile: bool, model: str,
+) -> list[dict | None]:
+    """One request for posts sharing a platform and CTA type; None where a result is missing."""
+    platform = posts[0].get("platform", "instagram")
+    cta_type = posts[0].get("cta_type")
+    derivative_types = list(dict.fromkeys(p.get("derivative_type", "original") for p in posts))
+    format_checks = "\n\n".join(
+        _DERIVATIVE_CHECKS[d] for d in derivative_types if d in _DERIVATIVE_CHECKS
+    )
+    if format_checks and len(derivative_types) > 1:
+        format_checks = "Apply the format check matching each post's derivative type.\n" + format_checks
+    post_blocks = "\n\n".join(
+        f"POST {n} (derivative type: {p.get('derivative_type', 'original')}):\n"
+        f"Caption: \"{p.get('caption', '')}\"\n"
+        f"Hashtags: {p.get('hashtags', [])}"
+        for n, p in enumerate(posts, start=1)
+    )
+
+    prompt = f"""Review each of these {len(posts)} {platform} posts independently. Score every post on its own merits — never relative to the others.
+
+{post_blocks}
+{_THIN_PROFILE_RUBRIC if thin_profile else ""}
+{_PLATFORM_REVIEW_CHECKS.get(platform, "")}
 
+{format_checks}
+
+{_SOCIAL_PROOF_CHECK if thin_profile else ""}{_CTA_REVIEW.get(cta_type, "") if cta_type else ""}Respond with a JSON array of exactly {len(posts)} objects, one per post in the order given. Each object uses the format above plus a "post_index" field (the POST number)."""
+
+    results: list[dict | None] = [None] * len(posts)
+    try:
+        response = await _generate_review(brand_profile, prompt, model)
+        raw = _parse_json(response.text)
     except Exception as e:
-        logger.error(f"Review agent error: {e}")
-        return {
-            "score": 5,
-            "brand_alignment": "moderate",
-            "strengths": ["Content generated successfully"],
-            "improvements": ["Review service temporarily unavailable"],
-            "approved": True,
-            "revision_notes": None,
-            "engagement_scores": {
-                "hook_strength": 5,
-                "relevance": 5,
-                "cta_effectiveness": 5,
-                "platform_fit": 5,
-                "teaching_depth": 0,
-            },
-            "engagement_prediction": "medium",
-        }
+        logger.error("Batched review failed for %d %s posts: %s", len(posts), platform, e)
+        return results
+    if not isinstance(raw, list):
+        logger.warning("Batched review returned %s instead of a list", type(raw).__name__)
+        return results
+    for position, item in enumerate(raw):
+        if not isinstance(item, dict) or "score" not in item:
+            continue
+        try:
+            index = int(item.get("post_index", position + 1)) - 1
+            if 0 <= index < len(posts) and results[index] is None:
+                results[index] = _normalize_review(item)
+        except (TypeError, ValueError):
+            continue
+    return results
+
+
+async def _review_batch_pass(
+    posts: list[dict],
+    brand_profile: dict,
+    social_proof_tier: str | None,
+    model: str,
+) -> list[dict | None]:
+    """Batched reviews on ``model``, in input order; None where a review is missing."""
+    groups: dict[tuple, list[int]] = {}
+    for i, post in enumerate(posts):
+        key = (post.get("platform", "instagram"), post.get("cta_type"))
+        groups.setdefault(key, []).append(i)
+    chunks = [
+        indexes[j:j + _REVIEW_BATCH_SIZE]
+        for indexes in groups.values()
+        for j in range(0, len(indexes), _REVIEW_BATCH_SIZE)
+    ]
+    thin_profile = _is_thin_profile(brand_profile, social_proof_tier)
+    results: list[dict | None] = [None] * len(posts)
+
+    async def _run(chunk: list[int]) -> None:
+        if len(chunk) == 1:
+            i = chunk[0]
+            results[i] = await _review_single(
+                posts[i], brand_profile, social_proof_tier, posts[i].get("cta_type"), model,
+            )
+            return
+        chunk_results = await _review_chunk([posts[i] for i in chunk], brand_profile, thin_profile, model)
+        for i, result in zip(chunk, chunk_results):
+            results[i] = result
+
+    await asyncio.gather(*[_run(chunk) for chunk in chunks])
+    return results
+
+
+async def review_posts_batch(
+    posts: list[dict],
+    brand_profile: dict,
+    social_proof_tier: str | None = None,
+) -> list[dict]:
+    """Review many posts in as few Gemini calls as possible.
+
+    Posts are grouped by (platform, cta_type) so each request states the
+    shared checks once, and chunks of up to _REVIEW_BATCH_SIZE run
+    concurrently. Each post's CTA type comes from its ``cta_type`` field.
+    Like review_post, borderline pre-screen scores are re-scored in a second
+    batched pass on the full review model. Returns one ReviewResult per post,
+    in input order; posts missing from the batch responses are reviewed
+    individually.
+    """
+    prescreen_model = MODEL_ROUTES["review_prescreen"]
+    review_model = MODEL_ROUTES["review"]
+    results = await _review_batch_pass(posts, brand_profile, social_proof_tier, prescreen_model)
+
+    if review_model != prescreen_model:
+        escalate = [i for i, result in enumerate(results) if _needs_escalation(result)]
+        if escalate:
+            logger.info("Escalating %d of %d reviews to %s", len(escalate), len(posts), review_model)
+            escalated = await _review_batch_pass(
+                [posts[i] for i in escalate], brand_profile, social_proof_tier, review_model,
+            )
+            for i, result in zip(escalate, escalated):
+                if result is not None:
+                    results[i] = result
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        logger.warning("Batched review missed %d of %d posts — reviewing individually",
+                       len(missing), len(posts))
+        singles = await asyncio.gather(*[
+            review_post(
+                posts[i], brand_profile,
+                social_proof_tier=social_proof_tier, cta_type=posts[i].get("cta_type"),
+            )
+            for i in missing
+        ])
+        for i, result in zip(missing, singles):
+            results[i] = result
+    return results
@@ -7,18 +7,25 @@ uploads the MP4 to GCS, and returns the signed URL.
 import asyncio
 import logging
 import uuid
+from typing import AsyncIterator
 from google import genai
 from google.genai import types
 
 from backend.config import GOOGLE_API_KEY
 from backend.platforms import get as get_platform
-from backend.services.storage_client import upload_video_to_gcs
+from backend.services import firestore_client
+from backend.services.storage_client import upload_video_stream_to_gcs
+from backend.services.veo_operations import operations_manager
 
 logger = logging.getLogger(__name__)
 
 # Veo polling ceiling: 20 minutes
 _VEO_POLL_TIMEOUT_S = 20 * 60
 
+# Read size when streaming a finished video from the Gemini Files API
+_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+_MAX_DOWNLOAD_REDIRECTS = 5
+
 
 def _get_model_and_aspect(
     platform: str, tier: str, has_image: bool = False,
@@ -94,11 +101,14 @@ async def generate_video_clip(
     post_id: str,
     tier: str = "fast",
     edit_prompt: str | None = None,
+    job_id: str | None = None,
 ) -> dict:
     """Generate a video clip using Veo 3.1, upload to GCS, and return metadata.
 
     Args:
         hero_image_bytes: Image bytes for image-to-video, or None for text-to-video.
+        job_id: Video job to record the Veo operation on, so a restarted
+            instance can resume it via ``resume_video_clip``.
 
     Returns:
         {
@@ -169,24 +179,46 @@ async def generate_video_clip(
             ),
         )
 
-    logger.info("Veo operation started, polling for completion...")
+    logger.info("Veo operation started: %s", operation.name)
+    if job_id:
+        await firestore_client.set_video_job_operation(job_id, {
+            "name": operation.name,
+            "post_id": post_id,
+            "model": model_name,
+            "aspect_ratio": aspect_ratio,
+        })
 
-    # Poll until the operation is complete, with a hard timeout ceiling
-    import time as _time
-    poll_start = _time.monotonic()
-    while not operation.done:
-        if _time.monotonic() - poll_start > _VEO_POLL_TIMEOUT_S:
-            raise TimeoutError(
-                f"Veo video generation timed out after {_VEO_POLL_TIMEOUT_S}s "
-                f"for post {post_id}"
-            )
-        await asyncio.sleep(10)
-        operation = await loop.run_in_executor(
-            None,
-            lambda: client.operations.get(operation),
-        )
-        logger.info("Veo operation status: done=%s", operation.done)
+    operation = await operations_manager.wait(operation, timeout=_VEO_POLL_TIMEOUT_S)
+    return await _finish_video_clip(client, operation, post_id, model_name, aspect_ratio)
+
+
+async def resume_video_clip(veo_operation: dict) -> dict:
+    """Finish a generation started by another process from its persisted record.
 
+    Args:
+        veo_operation: The ``veo_operation`` dict stored on the video job.
+
+    Returns:
+        Same shape as ``generate_video_clip``.
+    """
+    client = genai.Client(api_key=GOOGLE_API_KEY)
+    operation = await operations_manager.wait_for_name(
+        veo_operation["name"], timeout=_VEO_POLL_TIMEOUT_S,
+    )
+    return await _finish_video_clip(
+        client, operation, veo_operation["post_id"],
+        veo_operation.get("model", ""), veo_operation.get("aspect_ratio", ""),
+    )
+
+
+async def _finish_video_clip(
+    client: genai.Client,
+    operation,
+    post_id: str,
+    model_name: str,
+    aspect_ratio: str,
+) -> dict:
+    """Download a finished Veo operation's video and upload it to GCS."""
     logger.info("Veo operation complete, downloading video via files API...")
 
     # Use client.files.download() — Veo doesn't populate video_bytes directly
@@ -200,13 +232,11 @@ async def generate_video_clip(
             "This usually means the prompt was filtered or the generation failed silently."
         )
     gen_video = operation.response.generated_videos[0]
-    video_bytes = await loop.run_in_executor(
-        None,
-        lambda: client.files.download(file=gen_video),
-    )
 
-    # Upload MP4 to GCS and get signed URL + GCS URI
-    video_url, video_gcs_uri = await upload_video_to_gcs(video_bytes, post_id)
+    # Stream MP4 into GCS and get signed URL + GCS URI
+    video_url, video_gcs_uri = await upload_video_stream_to_gcs(
+        _iter_generated_video(client, gen_video), post_id,
+    )
 
     logger.info("Video uploaded to GCS: %s", video_gcs_uri)
 
@@ -217,3 +247,39 @@ async def generate_video_clip(
         "model": model_name,
         "aspect_ratio": aspect_ratio,
     }
+
+
+async def _iter_generated_video(client: genai.Client, gen_video) -> AsyncIterator[bytes]:
+    """Yield a generated video's bytes without holding the whole file in memory.
+
+    Veo returns a Files API download URI; it's fetched with a streaming GET.
+    Inline bytes (or an unexpected shape) fall back to the SDK download.
+    """
+    import httpx
+
+    video = getattr(gen_video, "video", None)
+    if video is not None and video.video_bytes:
+        yield video.video_bytes
+        return
+    uri = getattr(video, "uri", None) or ""
+    if not uri.startswith("https://"):
+        yield await asyncio.to_thread(client.files.download, file=gen_video)
+        return
+    # Redirects are followed by hand so the API key only goes to the host it
+    # was issued for, never to the storage host the download redirects to
+    url = httpx.URL(uri)
+    headers = {"x-goog-api-key": GOOGLE_API_KEY}
+    async with httpx.AsyncClient(timeout=httpx.Timeout(60.0, read=300.0)) as http:
+        for _ in range(_MAX_DOWNLOAD_REDIRECTS + 1):
+            async with http.stream("GET", url, headers=headers) as resp:
+                if resp.is_redirect:
+                    target = url.join(resp.headers["location"])
+                    if target.scheme != "https" or target.host != url.host:
+                        headers = {}
+                    url = target
+                    continue
+                resp.raise_for_status()
+                async for chunk in resp.aiter_bytes(_DOWNLOAD_CHUNK_SIZE):
+                    yield chunk
+                return
+    raise httpx.TooManyRedirects(f"Too many redirects downloading {uri}")
@@ -3,14 +3,20 @@ import json
 import logging
 import os
 import shutil
-import subprocess
 import tempfile
 import uuid
+from typing import Awaitable, Callable
 
 from google import genai
 from google.genai import types
 
-from backend.config import GEMINI_MODEL, GOOGLE_API_KEY
+from backend.config import (
+    FFMPEG_CRF,
+    FFMPEG_MAX_PARALLEL,
+    FFMPEG_PRESET,
+    GEMINI_MODEL,
+    GOOGLE_API_KEY,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +35,20 @@ _GEMINI_POLL_INTERVAL_S = 4
 # FFmpeg subprocess timeout per command (5 minutes)
 _FFMPEG_TIMEOUT_S = 300
 
+# Analysis proxy: Gemini samples video at ~1 fps, so a small low-bitrate
+# rendition yields the same timestamps for a fraction of the upload.
+_PROXY_HEIGHT = 360
+_PROXY_FPS = 10
+_PROXY_CRF = 32
+# Proxy encodes may read the source over HTTPS while it is still downloading
+_PROXY_TIMEOUT_S = 600
+
+# Concurrent FFmpeg encodes per process; shared across all repurpose jobs so
+# parallel uploads can't oversubscribe the CPU.
+_CPU_COUNT = os.cpu_count() or 1
+_FFMPEG_SLOTS = FFMPEG_MAX_PARALLEL if FFMPEG_MAX_PARALLEL > 0 else _CPU_COUNT
+_ffmpeg_semaphore: asyncio.Semaphore | None = None
+
 # Platform-specific max clip duration (seconds) — used for timestamp validation
 _PLATFORM_MAX_S: dict[str, float] = {
     "reels": 60, "tiktok": 60, "youtube_shorts": 60, "linkedin": 90,
@@ -37,20 +57,41 @@ _PLATFORM_MAX_S: dict[str, float] = {
 
 # ── FFmpeg helpers ─────────────────────────────────────────────────────────────
 
-def _run_ffmpeg(args: list[str]) -> None:
+def _get_ffmpeg_semaphore() -> asyncio.Semaphore:
+    global _ffmpeg_semaphore
+    if _ffmpeg_semaphore is None:
+        _ffmpeg_semaphore = asyncio.Semaphore(_FFMPEG_SLOTS)
+    return _ffmpeg_semaphore
+
+
+async def _run_ffmpeg(args: list[str], timeout: float = _FFMPEG_TIMEOUT_S) -> None:
     """Run an FFmpeg command; raises RuntimeError on non-zero exit or timeout."""
-    cmd = ["ffmpeg", "-y"] + args
+    cmd = ["ffmpeg", "-y", "-nostdin", "-loglevel", "error"] + args
     logger.debug("FFmpeg: %s", " ".join(cmd))
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=_FFMPEG_TIMEOUT_S)
-    except subprocess.TimeoutExpired:
-        raise RuntimeError(f"FFmpeg timed out after {_FFMPEG_TIMEOUT_S}s")
-    if result.returncode != 0:
-        logger.error("FFmpeg stderr: %s", result.stderr[-2000:])
-        raise RuntimeError(f"FFmpeg failed (exit {result.returncode})")
-
-
-def _extract_and_format_clip(
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        raise RuntimeError("FFmpeg is not installed")
+    try:
+        _, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise RuntimeError(f"FFmpeg timed out after {timeout:.0f}s")
+    except asyncio.CancelledError:
+        proc.kill()
+        await proc.wait()
+        raise
+    if proc.returncode != 0:
+        logger.error("FFmpeg stderr: %s", stderr.decode(errors="replace")[-2000:])
+        raise RuntimeError(f"FFmpeg failed (exit {proc.returncode})")
+
+
+async def _extract_and_format_clip(
     input_path: str,
     output_path: str,
     start: float,
@@ -65,15 +106,42 @@ def _extract_and_format_clip(
         f"scale={w}:{h}:force_original_aspect_ratio=decrease,"
         f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2:black"
     )
+    # Split cores between concurrent encodes instead of letting each x264
+    # instance spin up a thread per core
+    threads = max(1, _CPU_COUNT // _FFMPEG_SLOTS)
     # Place -ss before -i for fast keyframe seek; -t is relative to seek point
-    _run_ffmpeg([
-        "-ss", str(start),
-        "-i", input_path,
-        "-t", str(duration),
-        "-vf", vf,
-        "-c:v", "libx264", "-c:a", "aac",
-        output_path,
-    ])
+    async with _get_ffmpeg_semaphore():
+        await _run_ffmpeg([
+            "-ss", str(start),
+            "-i", input_path,
+            "-t", str(duration),
+            "-vf", vf,
+            "-c:v", "libx264", "-preset", FFMPEG_PRESET, "-crf", str(FFMPEG_CRF),
+            "-threads", str(threads),
+            "-c:a", "aac",
+            "-movflags", "+faststart",
+            output_path,
+        ])
+
+
+async def _make_analysis_proxy(input_src: str, output_path: str) -> None:
+    """Encode a downscaled, low-bitrate copy for Gemini analysis.
+
+    ``input_src`` may be a local path or an HTTPS URL. The timeline is kept
+    intact (no trimming, no speed change) so timestamps Gemini returns map
+    1:1 onto the full-resolution source.
+    """
+    async with _get_ffmpeg_semaphore():
+        await _run_ffmpeg([
+            "-i", input_src,
+            "-vf", f"scale=-2:{_PROXY_HEIGHT}",
+            "-r", str(_PROXY_FPS),
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", str(_PROXY_CRF),
+            "-threads", str(max(1, _CPU_COUNT // _FFMPEG_SLOTS)),
+            "-c:a", "aac", "-ac", "1", "-b:a", "48k",
+            "-movflags", "+faststart",
+            output_path,
+        ], timeout=_PROXY_TIMEOUT_S)
 
 
 # ── Gemini video analysis ──────────────────────────────────────────────────────
@@ -231,87 +299,162 @@ def _validate_clip_spec(spec: dict, index: int) -> tuple[float, float, str]:
 
 # ── Public API ─────────────────────────────────────────────────────────────────
 
-async def analyze_and_repurpose(
-    video_bytes: bytes,
+async def _find_clip_specs(analysis_path: str, mime_type: str, brand_profile: dict) -> list[dict]:
+    """Upload a local video to Gemini, ask for clip moments, then delete the file."""
+    logger.info(
+        "Uploading %d-byte video (%s) to Gemini Files API…",
+        os.path.getsize(analysis_path), mime_type,
+    )
+    video_file, client = await _upload_to_gemini_files(analysis_path, mime_type)
+    logger.info("Gemini file ready: %s", video_file.name)
+
+    clip_specs = await _analyze_video(video_file, client, brand_profile)
+    logger.info("Gemini identified %d clips", len(clip_specs))
+
+    # Clean up Gemini file (awaited, so errors don't swallow silently)
+    try:
+        await asyncio.to_thread(client.files.delete, name=video_file.name)
+    except Exception as e:
+        logger.warning("Failed to delete Gemini file %s: %s", video_file.name, e)
+
+    return clip_specs
+
+
+async def _extract_clips(
+    source_path: str,
+    tmpdir: str,
+    clip_specs: list[dict],
+    upload_clip: Callable[[str, str], Awaitable[str]],
+) -> list[dict]:
+    """Extract + format up to 3 clips concurrently, uploading each from disk when done."""
+    # Validate all specs up front so a bad one fails before any encoding
+    validated = [
+        (i, spec, *_validate_clip_spec(spec, i))
+        for i, spec in enumerate(clip_specs[:3])
+    ]
+
+    async def _process(i: int, spec: dict, start: float, end: float, platform: str) -> dict:
+        clip_tag = f"clip_{i + 1}_{platform}"
+        filename = f"{clip_tag}.mp4"
+        final_path = os.path.join(tmpdir, filename)
+
+        logger.info("Extracting clip %d: %.1f–%.1f → %s", i + 1, start, end, platform)
+        await _extract_and_format_clip(source_path, final_path, start, end, platform)
+
+        if os.path.getsize(final_path) == 0:
+            raise RuntimeError(f"FFmpeg produced an empty file for clip {i + 1}")
+
+        gcs_uri = await upload_clip(final_path, filename)
+        return {
+            "platform": platform,
+            "start_time": start,
+            "end_time": end,
+            "duration_seconds": round(end - start, 1),
+            "hook": spec.get("hook", ""),
+            "suggested_caption": spec.get("suggested_caption", ""),
+            "reason": spec.get("reason", ""),
+            "content_theme": spec.get("content_theme", ""),
+            "clip_gcs_uri": gcs_uri,
+            "filename": filename,
+        }
+
+    tasks = [asyncio.create_task(_process(*v)) for v in validated]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        # One failed clip fails the job — stop the sibling encodes
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def _cleanup_tmpdir(tmpdir: str) -> None:
+    try:
+        shutil.rmtree(tmpdir)
+    except Exception as cleanup_err:
+        logger.warning("Failed to clean up tmpdir %s: %s", tmpdir, cleanup_err)
+
+
+async def repurpose_from_gcs(
+    source_gcs_uri: str,
     brand_profile: dict,
+    upload_clip: Callable[[str, str], Awaitable[str]],
     mime_type: str = "video/mp4",
 ) -> list[dict]:
-    """
-    Analyze a raw video using Gemini and extract up to 3 platform-ready short clips.
+    """Pipelined repurpose straight from a GCS source.
+
+    The full-resolution source streams from GCS to local disk while FFmpeg
+    builds a small analysis proxy (reading the object over a signed URL when
+    one is available, otherwise from the finished local copy). Gemini only
+    ever sees the proxy; clip extraction uses the full-resolution file.
+    If the proxy can't be built, the source itself is uploaded for analysis.
+
+    Clips are encoded concurrently (bounded by FFMPEG_MAX_PARALLEL) and each is
+    handed to ``upload_clip`` as soon as it is finished, so clip bytes never
+    pass through memory.
 
     Args:
-        video_bytes: Raw MP4/MOV video bytes.
+        source_gcs_uri: gs:// URI of the uploaded MP4/MOV source.
         brand_profile: Brand Firestore document (needs business_name, tone, industry, etc.)
+        upload_clip: ``async (local_path, filename) -> gcs_uri`` called once per clip
+            before the temp directory is removed.
         mime_type: MIME type of the uploaded video ("video/mp4" or "video/quicktime").
 
     Returns:
-        List of clip dicts, each with keys:
+        List of clip dicts (in Gemini's ranking order), each with keys:
           platform, start_time, end_time, duration_seconds,
-          hook, suggested_caption, reason, clip_bytes, filename
+          hook, suggested_caption, reason, clip_gcs_uri, filename
 
     Raises:
         ValueError: Gemini analysis failed or no clips found.
         RuntimeError: FFmpeg not installed or processing failed.
         TimeoutError: Gemini file processing exceeded the timeout ceiling.
     """
+    from backend.services.storage_client import download_gcs_uri_to_file, get_signed_url
+
     ext = ".mp4" if mime_type == "video/mp4" else ".mov"
     tmpdir = tempfile.mkdtemp(prefix="vrepurpose_")
+    source_path = os.path.join(tmpdir, f"source_{uuid.uuid4().hex[:8]}{ext}")
+    proxy_path = os.path.join(tmpdir, "analysis_proxy.mp4")
+    download = asyncio.create_task(download_gcs_uri_to_file(source_gcs_uri, source_path))
     try:
-        # 1 ─ Write source video to disk
-        source_path = os.path.join(tmpdir, f"source_{uuid.uuid4().hex[:8]}{ext}")
-        with open(source_path, "wb") as f:
-            f.write(video_bytes)
-
-        # 2 ─ Upload to Gemini Files API
-        logger.info("Uploading %d-byte video (%s) to Gemini Files API…", len(video_bytes), mime_type)
-        video_file, client = await _upload_to_gemini_files(source_path, mime_type)
-        logger.info("Gemini file ready: %s", video_file.name)
-
-        # 3 ─ Analyze for clip-worthy moments
-        clip_specs = await _analyze_video(video_file, client, brand_profile)
-        logger.info("Gemini identified %d clips", len(clip_specs))
-
-        # 4 ─ Clean up Gemini file (awaited, so errors don't swallow silently)
+        # 1 ─ Proxy from the remote object, concurrently with the download
+        proxy_ready = False
         try:
-            await asyncio.to_thread(client.files.delete, name=video_file.name)
+            source_url = await get_signed_url(source_gcs_uri)
         except Exception as e:
-            logger.warning("Failed to delete Gemini file %s: %s", video_file.name, e)
-
-        # 5 ─ Extract, format, and collect each clip with FFmpeg
-        clips = []
-        for i, spec in enumerate(clip_specs[:3]):
-            start, end, platform = _validate_clip_spec(spec, i)
-            clip_tag = f"clip_{i + 1}_{platform}"
-            final_path = os.path.join(tmpdir, f"{clip_tag}.mp4")
-
-            logger.info("Extracting clip %d: %.1f–%.1f → %s", i + 1, start, end, platform)
-            await asyncio.to_thread(
-                _extract_and_format_clip, source_path, final_path, start, end, platform
-            )
-
-            with open(final_path, "rb") as f:
-                clip_bytes_data = f.read()
-
-            if len(clip_bytes_data) == 0:
-                raise RuntimeError(f"FFmpeg produced an empty file for clip {i + 1}")
-
-            clips.append({
-                "platform": platform,
-                "start_time": start,
-                "end_time": end,
-                "duration_seconds": round(end - start, 1),
-                "hook": spec.get("hook", ""),
-                "suggested_caption": spec.get("suggested_caption", ""),
-                "reason": spec.get("reason", ""),
-                "content_theme": spec.get("content_theme", ""),
-                "clip_bytes": clip_bytes_data,
-                "filename": f"{clip_tag}.mp4",
-            })
-
-        return clips
-
+            logger.warning("Could not sign %s for proxy input: %s", source_gcs_uri, e)
+            source_url = ""
+        if source_url.startswith("https://"):
+            try:
+                await _make_analysis_proxy(source_url, proxy_path)
+                proxy_ready = True
+            except RuntimeError as e:
+                logger.warning("Remote proxy encode failed, retrying from local copy: %s", e)
+
+        # 2 ─ Otherwise wait for the local copy and proxy from disk
+        if not proxy_ready:
+            await download
+            try:
+                await _make_analysis_proxy(source_path, proxy_path)
+                proxy_ready = True
+            except RuntimeError as e:
+                logger.warning("Proxy encode failed, analyzing full source: %s", e)
+
+        # 3 ─ Gemini analysis on the proxy (download keeps running meanwhile)
+        if proxy_ready:
+            clip_specs = await _find_clip_specs(proxy_path, "video/mp4", brand_profile)
+        else:
+            clip_specs = await _find_clip_specs(source_path, mime_type, brand_profile)
+
+        # 4 ─ Full-resolution extraction
+        await download
+        return await _extract_clips(source_path, tmpdir, clip_specs, upload_clip)
     finally:
-        try:
-            shutil.rmtree(tmpdir)
-        except Exception as cleanup_err:
-            logger.warning("Failed to clean up tmpdir %s: %s", tmpdir, cleanup_err)
+        # A cancelled download returns only after its worker has stopped
+        # writing, so the directory can go once the gather completes
+        if not download.done():
+            download.cancel()
+        await asyncio.gather(download, return_exceptions=True)
+        _cleanup_tmpdir(tmpdir)
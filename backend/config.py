@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -10,6 +11,66 @@ GCP_PROJECT_ID = os.environ.get("GCP_PROJECT_ID", "amplifi-hackathon")
 GCS_BUCKET_NAME = os.environ.get("GCS_BUCKET_NAME", f"{GCP_PROJECT_ID}-amplifi-assets")
 CORS_ORIGINS = os.environ.get("CORS_ORIGINS", "http://localhost:5173").split(",")
 
+# Seconds a completed brand profile may be served from the in-process cache
+# before re-reading Firestore. 0 disables the cache.
+BRAND_CACHE_TTL_S = float(os.environ.get("BRAND_CACHE_TTL_S", "30"))
+
+# Gemini explicit context caching for shared prompt prefixes (see
+# services/context_cache.py). Prefixes under the model's minimum cacheable
+# size are always sent inline.
+GEMINI_CONTEXT_CACHE_ENABLED = os.environ.get("GEMINI_CONTEXT_CACHE_ENABLED", "true").lower() == "true"
+GEMINI_CONTEXT_CACHE_TTL_S = float(os.environ.get("GEMINI_CONTEXT_CACHE_TTL_S", "3600"))
+GEMINI_CONTEXT_CACHE_MAX_ENTRIES = int(os.environ.get("GEMINI_CONTEXT_CACHE_MAX_ENTRIES", "200"))
+GEMINI_CONTEXT_CACHE_MIN_TOKENS = int(os.environ.get("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "1024"))
+
+# Review gate rewrite strategy when a caption scores below 7:
+#   "sequential" — targeted rewrite, re-review, then a full rewrite only if
+#                  still failing (fewest LLM calls)
+#   "parallel"   — both rewrites and their reviews run concurrently and the
+#                  better one wins (lowest latency, always pays for both)
+REVIEW_GATE_MODE = os.environ.get("REVIEW_GATE_MODE", "sequential")
+
+# Caption candidates requested per generate_post call. With more than one,
+# the candidates are ranked by the local quality/format/length checks and up
+# to CAPTION_REVIEW_SURVIVORS clean ones are reviewed; the best goes on to the
+# review gate.
+CAPTION_CANDIDATES = int(os.environ.get("CAPTION_CANDIDATES", "1"))
+CAPTION_REVIEW_SURVIVORS = int(os.environ.get("CAPTION_REVIEW_SURVIVORS", "2"))
+
+# Per-step model routing. Mechanical rewrites (condense, quality and format
+# fixes) run on a lighter tier. Reviews take a cheap first pass on
+# "review_prescreen" and escalate to "review" only when the score lands in
+# REVIEW_ESCALATE_MIN..REVIEW_ESCALATE_MAX, where the approve/rewrite decision
+# is made; set both review routes to the same model to disable the cascade.
+GEMINI_LITE_MODEL = os.environ.get("GEMINI_LITE_MODEL", "gemini-2.5-flash-lite")
+MODEL_ROUTES = {
+    "caption": os.environ.get("MODEL_ROUTE_CAPTION", GEMINI_MODEL),
+    "condense": os.environ.get("MODEL_ROUTE_CONDENSE", GEMINI_LITE_MODEL),
+    "quality_retry": os.environ.get("MODEL_ROUTE_QUALITY_RETRY", GEMINI_LITE_MODEL),
+    "format_retry": os.environ.get("MODEL_ROUTE_FORMAT_RETRY", GEMINI_LITE_MODEL),
+    "review_prescreen": os.environ.get("MODEL_ROUTE_REVIEW_PRESCREEN", GEMINI_LITE_MODEL),
+    "review": os.environ.get("MODEL_ROUTE_REVIEW", GEMINI_MODEL),
+}
+REVIEW_ESCALATE_MIN = int(os.environ.get("REVIEW_ESCALATE_MIN", "6"))
+REVIEW_ESCALATE_MAX = int(os.environ.get("REVIEW_ESCALATE_MAX", "8"))
+
+# Local rule-based pre-review (agents/caption_scorer.py). Captions the rules
+# call a clear pass or clear failure skip the LLM review in the review gate.
+# Thresholds come from the calibration file written by
+# scripts/calibrate_prescreen.py; without one no review is skipped.
+REVIEW_PRESCREEN_ENABLED = os.environ.get("REVIEW_PRESCREEN_ENABLED", "true").lower() == "true"
+REVIEW_PRESCREEN_CALIBRATION = os.environ.get(
+    "REVIEW_PRESCREEN_CALIBRATION", str(Path(__file__).parent / "prescreen_calibration.json")
+)
+
+# Per-brand hook index (services/hook_index.py). Prompts list the
+# HOOK_DEDUP_TOP_K indexed hooks most similar to the day's brief; a caption
+# whose hook or body matches an indexed post at HOOK_DUPLICATE_THRESHOLD
+# (estimated Jaccard similarity) or above is rewritten before review.
+HOOK_DEDUP_TOP_K = int(os.environ.get("HOOK_DEDUP_TOP_K", "8"))
+HOOK_DUPLICATE_THRESHOLD = float(os.environ.get("HOOK_DUPLICATE_THRESHOLD", "0.6"))
+HOOK_INDEX_MAX_ENTRIES = int(os.environ.get("HOOK_INDEX_MAX_ENTRIES", "400"))
+
 # Social Media Platform OAuth App Credentials
 # Used for the server-side OAuth redirect flow (future).
 # For the current implementation the frontend collects user OAuth tokens directly
@@ -26,6 +87,36 @@ NOTION_CLIENT_ID = os.environ.get("NOTION_CLIENT_ID", "")
 NOTION_CLIENT_SECRET = os.environ.get("NOTION_CLIENT_SECRET", "")
 NOTION_REDIRECT_URI = os.environ.get("NOTION_REDIRECT_URI", "http://localhost:5173/auth/notion/callback")
 
+# FFmpeg encoding for video repurposing. FFMPEG_MAX_PARALLEL=0 means one
+# concurrent encode per CPU core.
+FFMPEG_PRESET = os.environ.get("FFMPEG_PRESET", "veryfast")
+FFMPEG_CRF = os.environ.get("FFMPEG_CRF", "23")
+FFMPEG_MAX_PARALLEL = int(os.environ.get("FFMPEG_MAX_PARALLEL", "0"))
+
+# Process-local GCS media cache. On Cloud Run the disk tier lives in the
+# in-memory filesystem, so both budgets count against instance memory; an
+# object is held in only one tier.
+MEDIA_CACHE_DIR = os.environ.get(
+    "MEDIA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "amplifi-media-cache")
+)
+MEDIA_CACHE_DISK_BYTES = int(os.environ.get("MEDIA_CACHE_DISK_BYTES", str(256 * 1024 * 1024)))
+MEDIA_CACHE_MEMORY_BYTES = int(os.environ.get("MEDIA_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+MEDIA_CACHE_MAX_MEMORY_ITEM_BYTES = int(os.environ.get("MEDIA_CACHE_MAX_MEMORY_ITEM_BYTES", str(8 * 1024 * 1024)))
+# Storage-proxy objects larger than this bypass the cache and stream from GCS
+MEDIA_CACHE_MAX_OBJECT_BYTES = int(os.environ.get("MEDIA_CACHE_MAX_OBJECT_BYTES", str(128 * 1024 * 1024)))
+
+# Media garbage collection (services/media_gc.py, scripts/gc_media.py).
+# Unreferenced objects under MEDIA_GC_PREFIXES are collected once older than
+# MEDIA_GC_GRACE_HOURS, which covers uploads whose Firestore write is still in
+# flight. Deletes go out in batches of MEDIA_GC_BATCH_SIZE (max 100 per GCS
+# batch request), throttled to MEDIA_GC_MAX_OPS_PER_S objects per second.
+MEDIA_GC_PREFIXES = os.environ.get(
+    "MEDIA_GC_PREFIXES", "generated/,renditions/,posts/,byop/,repurpose/,brands/"
+).split(",")
+MEDIA_GC_GRACE_HOURS = float(os.environ.get("MEDIA_GC_GRACE_HOURS", "72"))
+MEDIA_GC_BATCH_SIZE = min(int(os.environ.get("MEDIA_GC_BATCH_SIZE", "100")), 100)
+MEDIA_GC_MAX_OPS_PER_S = float(os.environ.get("MEDIA_GC_MAX_OPS_PER_S", "50"))
+
 # Budget constants
 IMAGE_COST_PER_UNIT = 0.039   # ~$0.039 per generated image
 VIDEO_COST_FAST = 1.20         # $1.20 per 8-sec Veo Fast clip
@@ -1,9 +1,9 @@
 import asyncio
-import io
 import json
 import logging
 import os
 import re
+import tempfile
 import uuid
 import zipfile
 from datetime import datetime, timedelta
@@ -13,14 +13,17 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse, Response, StreamingResponse
 
-from backend.config import CORS_ORIGINS, GCS_BUCKET_NAME
+from backend.config import CORS_ORIGINS, GCS_BUCKET_NAME, HOOK_DEDUP_TOP_K, MEDIA_CACHE_MAX_OBJECT_BYTES
 from backend.models.brand import BrandProfileCreate, BrandProfile, BrandProfileUpdate
-from backend.services import firestore_client
+from backend.services import firestore_client, hook_index, media_cache
+from backend.services.media_pipeline import compact_uri, create_renditions, thumbnail_uris
 from backend.services.storage_client import (
     upload_brand_asset,
     get_signed_url,
     download_from_gcs,
     download_gcs_uri,
+    cache_blob_to_disk,
+    stream_blob,
     upload_byop_photo,
     upload_raw_video_source,
     upload_repurposed_clip,
@@ -53,6 +56,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+class FirestoreRequestScopeMiddleware:
+    """Give each HTTP request its own Firestore read-through identity map.
+
+    Plain ASGI (not BaseHTTPMiddleware) so SSE responses keep streaming.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with firestore_client.request_scope():
+            await self.app(scope, receive, send)
+
+
+app.add_middleware(FirestoreRequestScopeMiddleware)
+
 # ── Health ────────────────────────────────────────────────────
 
 @app.get("/health")
@@ -272,39 +295,174 @@ async def connect_social_account(
 
 
 # ── GCS proxy (local dev) ──────────────────────────────────────
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request
 from fastapi.responses import Response
 
 
+# Proxied objects are immutable in practice (generated paths carry a random
+# suffix); the short max-age plus ETag revalidation covers the few that aren't.
+_SERVE_CACHE_CONTROL = "private, max-age=3600"
+
+
+def _parse_byte_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parse a single ``bytes=`` range into inclusive (start, end).
+
+    Returns None for headers we don't honour (multi-range, other units), in
+    which case the full object is served. Raises ValueError when the range
+    is unsatisfiable.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            # Suffix range: last N bytes
+            length = int(last)
+            if length <= 0:
+                raise ValueError("empty suffix range")
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        raise ValueError(f"malformed range {header!r}")
+    if start >= size or end < start:
+        raise ValueError(f"range {header!r} outside object of {size} bytes")
+    return start, min(end, size - 1)
+
+
 @app.get("/api/storage/serve/{blob_path:path}")
-async def serve_storage_object(blob_path: str):
+async def serve_storage_object(blob_path: str, request: Request):
     """Proxy-serve a GCS object.  Used when signed URLs are unavailable
-    (e.g. local dev with ADC credentials that lack a private key)."""
+    (e.g. local dev with ADC credentials that lack a private key).
+
+    Streams from GCS in chunks and supports single byte ranges (video
+    scrubbing), ETag/Last-Modified validators and conditional GETs.
+    """
     try:
         bucket = get_bucket()
-        blob = bucket.blob(blob_path)
         loop = asyncio.get_running_loop()
-        data = await loop.run_in_executor(None, blob.download_as_bytes)
-        ct = blob.content_type or "application/octet-stream"
-        return Response(content=data, media_type=ct)
+        blob = await loop.run_in_executor(None, bucket.get_blob, blob_path)
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Object not found")
+
+    size = blob.size or 0
+    etag = f'"{blob.generation}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": _SERVE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+    if blob.updated:
+        headers["Last-Modified"] = format_datetime(blob.updated, usegmt=True)
+
+    # ── Conditional GET ──
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        if "*" in tags or etag in tags:
+            return Response(status_code=304, headers=headers)
+    elif blob.updated and (ims := request.headers.get("if-modified-since")):
+        try:
+            if blob.updated.replace(microsecond=0) <= parsedate_to_datetime(ims):
+                return Response(status_code=304, headers=headers)
+        except (TypeError, ValueError):
+            pass
+
+    ct = blob.content_type or "application/octet-stream"
+    gcs_uri = f"gs://{GCS_BUCKET_NAME}/{blob_path}"
+
+    # Serve cache hits from local disk. A miss streams straight from GCS so
+    # the first byte (or a small range probe) never waits on the whole
+    # object; the cache fills in the background for the next request.
+    cached = media_cache.get_memory(gcs_uri, blob.generation)
+    local_path = None if cached is not None else media_cache.get_disk_path(gcs_uri, blob.generation)
+    if cached is None and local_path is None and size <= MEDIA_CACHE_MAX_OBJECT_BYTES:
+        task = asyncio.create_task(_fill_media_cache(gcs_uri, blob.generation))
+        _cache_fill_tasks.add(task)
+        task.add_done_callback(_cache_fill_tasks.discard)
+
+    # ── Range ──
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and size and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = _parse_byte_range(range_header, size)
+        except ValueError:
+            return Response(
+                status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"},
+            )
+
+    if byte_range is None:
+        start, end, status = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(max(0, end - start + 1))
+    if cached is not None:
+        return Response(cached[start:end + 1], status_code=status, media_type=ct, headers=headers)
+    if local_path is not None:
+        body = _iter_file_range(local_path, start, end)
+    elif byte_range is None:
+        body = stream_blob(gcs_uri)
+    else:
+        body = stream_blob(gcs_uri, start=start, end=end)
+    return StreamingResponse(body, status_code=status, media_type=ct, headers=headers)
+
+
+# Strong refs so background cache fills aren't garbage-collected mid-flight
+_cache_fill_tasks: set[asyncio.Task] = set()
+
+
+async def _fill_media_cache(gcs_uri: str, generation: Optional[int]) -> None:
+    try:
+        await cache_blob_to_disk(gcs_uri, generation)
+    except Exception as e:
+        logger.warning("Media cache fill failed for %s: %s", gcs_uri, e)
+
+
+def _iter_file_range(path: str, start: int, end: int, chunk_size: int = 1024 * 1024):
+    """Yield bytes [start, end] of a local file (run in Starlette's threadpool)."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
 
 
 # ── Posts ─────────────────────────────────────────────────────
 
-async def _refresh_signed_urls(post: dict) -> dict:
-    """Re-sign expired GCS URLs so images always load."""
+async def _refresh_signed_urls(post: dict, compact: bool = False) -> dict:
+    """Re-sign expired GCS URLs so images always load.
+
+    With ``compact`` the image URLs point at the WebP renditions where the
+    post has them (list/grid views); the masters stay on ``image_gcs_uri(s)``.
+    """
+    def _display_uri(uri: str) -> str:
+        return (compact and compact_uri(post, uri)) or uri
+
     gcs_uri = post.get("image_gcs_uri")
     if gcs_uri:
         try:
-            post["image_url"] = await get_signed_url(gcs_uri)
+            post["image_url"] = await get_signed_url(_display_uri(gcs_uri))
         except Exception:
             pass
     for i, uri in enumerate(post.get("image_gcs_uris") or []):
         try:
             urls = post.setdefault("image_urls", [])
             if i < len(urls):
-                urls[i] = await get_signed_url(uri)
+                urls[i] = await get_signed_url(_display_uri(uri))
         except Exception:
             pass
     if post.get("thumbnail_gcs_uri"):
@@ -312,17 +470,68 @@ async def _refresh_signed_urls(post: dict) -> dict:
             post["thumbnail_url"] = await get_signed_url(post["thumbnail_gcs_uri"])
         except Exception:
             pass
+    await _refresh_thumbnail_urls(post)
     return post
 
 
+def _cover_gcs_uri(post: dict) -> str | None:
+    return post.get("image_gcs_uri") or (post.get("image_gcs_uris") or [None])[0]
+
+
+async def _refresh_thumbnail_urls(post: dict) -> None:
+    """Re-sign ``thumbnail_urls`` ({"256": url, "512": url}) for the cover image."""
+    uris = thumbnail_uris(post, _cover_gcs_uri(post))
+    if not uris:
+        return
+    signed = {}
+    for size, uri in uris.items():
+        try:
+            signed[size] = await get_signed_url(uri)
+        except Exception:
+            pass
+    post["thumbnail_urls"] = signed
+
+
+# Fields returned by /api/posts?view=grid — enough to render a calendar card
+_GRID_FIELDS = (
+    "post_id", "plan_id", "brief_index", "day_index", "platform",
+    "derivative_type", "status", "pillar", "created_at",
+)
+
+
+async def _grid_projection(post: dict) -> dict:
+    """Thumbnail-only view of a post for grid/calendar cards."""
+    card = {k: post.get(k) for k in _GRID_FIELDS}
+    card["caption_preview"] = (post.get("caption") or "")[:140]
+    card["has_video"] = bool(post.get("video") or post.get("video_url"))
+    card["slide_count"] = len(post.get("image_gcs_uris") or [])
+    await _refresh_thumbnail_urls(post)
+    card["thumbnail_urls"] = post.get("thumbnail_urls") or {}
+    if not card["thumbnail_urls"]:
+        # Posts created before thumbnails existed: fall back to the compact image
+        cover = _cover_gcs_uri(post)
+        if cover:
+            try:
+                card["image_url"] = await get_signed_url(compact_uri(post, cover) or cover)
+            except Exception:
+                card["image_url"] = None
+    return card
+
+
 @app.get("/api/posts")
 async def list_posts_endpoint(
     brand_id: str = Query(...),
     plan_id: str | None = Query(None),
+    view: str = Query("full", pattern="^(full|grid)$"),
 ):
-    """List all posts for a brand, optionally filtered by plan."""
+    """List all posts for a brand, optionally filtered by plan.
+
+    ``view=grid`` returns a thumbnail-only projection for calendar/history grids.
+    """
     posts = await firestore_client.list_posts(brand_id, plan_id)
-    await asyncio.gather(*[_refresh_signed_urls(p) for p in posts])
+    if view == "grid":
+        return {"posts": await asyncio.gather(*[_grid_projection(p) for p in posts])}
+    await asyncio.gather(*[_refresh_signed_urls(p, compact=True) for p in posts])
     return {"posts": posts}
 
 
@@ -341,6 +550,48 @@ async def get_post_endpoint(
 
 # ── Export / Download ─────────────────────────────────────────
 
+# Export archives stay in memory up to this size, then spill to a temp file
+_ZIP_SPOOL_BYTES = 32 * 1024 * 1024
+_ZIP_READ_CHUNK = 1024 * 1024
+
+
+async def _zip_write_blob(zf: zipfile.ZipFile, arcname: str, gcs_uri: str) -> bool:
+    """Stream a GCS object into a stored (uncompressed) ZIP entry.
+
+    MP4s are already compressed, so deflating them only costs CPU. Returns
+    False (and writes nothing) if the object can't be read.
+    """
+    if not gcs_uri.startswith(f"gs://{GCS_BUCKET_NAME}/"):
+        return False
+    chunks = stream_blob(gcs_uri)
+    try:
+        # Fetch the first chunk before opening the entry so a missing object
+        # doesn't leave a truncated file in the archive
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        return False
+    except Exception as exc:
+        logger.warning("Could not download %s for export: %s", gcs_uri, exc)
+        await chunks.aclose()
+        return False
+    info = zipfile.ZipInfo(arcname, date_time=datetime.now().timetuple()[:6])
+    info.compress_type = zipfile.ZIP_STORED
+    with zf.open(info, mode="w", force_zip64=True) as entry:
+        entry.write(first)
+        async for chunk in chunks:
+            entry.write(chunk)
+    return True
+
+
+def _iter_spooled(buffer):
+    """Yield a finished archive in chunks, closing (and deleting) it afterwards."""
+    try:
+        while chunk := buffer.read(_ZIP_READ_CHUNK):
+            yield chunk
+    finally:
+        buffer.close()
+
+
 @app.get("/api/posts/{post_id}/export")
 async def export_post(
     post_id: str,
@@ -372,21 +623,21 @@ async def export_post(
             logger.warning("Could not download %s for post %s: %s", uri, post_id, exc)
             return None
 
-    # Download image + video in parallel
-    img_bytes, vid_bytes = await asyncio.gather(
-        _dl(post.get("image_gcs_uri")),
-        _dl((post.get("video") or {}).get("video_gcs_uri")),
+    # Prefer the compact JPEG rendition; fall back to the master
+    img_bytes = await _dl(
+        compact_uri(post, post.get("image_gcs_uri"), "jpeg") or post.get("image_gcs_uri")
     )
 
-    # Build ZIP
-    zip_buffer = io.BytesIO()
+    # Build ZIP (spooled to disk once large; video streamed in chunks)
+    zip_buffer = tempfile.SpooledTemporaryFile(max_size=_ZIP_SPOOL_BYTES)
     archive_root = f"amplifi_{base_name}"
     with zipfile.ZipFile(zip_buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
         if img_bytes:
             ext = "png" if img_bytes[:4] == b"\x89PNG" else "jpg"
             zf.writestr(f"{archive_root}/{base_name}.{ext}", img_bytes)
-        if vid_bytes:
-            zf.writestr(f"{archive_root}/{base_name}.mp4", vid_bytes)
+        video_uri = (post.get("video") or {}).get("video_gcs_uri")
+        if video_uri:
+            await _zip_write_blob(zf, f"{archive_root}/{base_name}.mp4", video_uri)
         hashtag_block = "\n".join(f"#{tag.lstrip('#')}" for tag in hashtags)
         caption_text = caption
         if hashtag_block:
@@ -395,7 +646,7 @@ async def export_post(
 
     zip_buffer.seek(0)
     return StreamingResponse(
-        zip_buffer,
+        _iter_spooled(zip_buffer),
         media_type="application/zip",
         headers={"Content-Disposition": f"attachment; filename={archive_root}.zip"},
     )
@@ -434,7 +685,10 @@ async def export_plan_zip(
 
     # ── Download image bytes directly from GCS ──────────────────
     async def _download_post_image(post: dict) -> bytes | None:
-        gcs_uri: str | None = post.get("image_gcs_uri")
+        # Prefer the compact JPEG rendition; fall back to the master
+        gcs_uri: str | None = (
+            compact_uri(post, post.get("image_gcs_uri"), "jpeg") or post.get("image_gcs_uri")
+        )
         if not gcs_uri:
             return None
         prefix = f"gs://{GCS_BUCKET_NAME}/"
@@ -450,45 +704,19 @@ async def export_plan_zip(
             logger.warning("Could not download image for post %s: %s", post.get("post_id"), exc)
             return None
 
-    # ── Download video bytes directly from GCS ─────────────────
-    async def _download_post_video(post: dict) -> bytes | None:
-        video = post.get("video")
-        if not video:
-            return None
-        gcs_uri: str | None = video.get("video_gcs_uri")
-        if not gcs_uri:
-            return None
-        prefix = f"gs://{GCS_BUCKET_NAME}/"
-        if not gcs_uri.startswith(prefix):
-            return None
-        blob_path = gcs_uri[len(prefix):]
-        try:
-            bucket = get_bucket()
-            blob = bucket.blob(blob_path)
-            loop = asyncio.get_running_loop()
-            return await loop.run_in_executor(None, blob.download_as_bytes)
-        except Exception as exc:
-            logger.warning("Could not download video for post %s: %s", post.get("post_id"), exc)
-            return None
-
     image_bytes_list: list[bytes | None] = await asyncio.gather(
         *[_download_post_image(p) for p in posts]
     )
-    video_bytes_list: list[bytes | None] = await asyncio.gather(
-        *[_download_post_video(p) for p in posts]
-    )
 
-    # ── Build ZIP in memory ───────────────────────────────────
-    zip_buffer = io.BytesIO()
+    # ── Build ZIP (spooled to disk; videos streamed in chunks) ─
+    zip_buffer = tempfile.SpooledTemporaryFile(max_size=_ZIP_SPOOL_BYTES)
     archive_root = f"amplifi_export_{plan_id}"
 
     # Collect clean metadata for content_plan.json (strip internal GCS URIs)
     plan_metadata: list[dict] = []
 
     with zipfile.ZipFile(zip_buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-        for index, (post, img_bytes, vid_bytes) in enumerate(
-            zip(posts, image_bytes_list, video_bytes_list)
-        ):
+        for index, (post, img_bytes) in enumerate(zip(posts, image_bytes_list)):
             platform: str = post.get("platform", "post")
             caption: str = post.get("caption", "")
             hashtags: list[str] = post.get("hashtags", [])
@@ -500,8 +728,9 @@ async def export_plan_zip(
                 zf.writestr(f"{archive_root}/{base_name}.{ext}", img_bytes)
 
             # Video file
-            if vid_bytes:
-                zf.writestr(f"{archive_root}/{base_name}.mp4", vid_bytes)
+            video_uri = (post.get("video") or {}).get("video_gcs_uri")
+            if video_uri:
+                await _zip_write_blob(zf, f"{archive_root}/{base_name}.mp4", video_uri)
 
             # Caption + hashtags text file
             hashtag_block = "\n".join(f"#{tag.lstrip('#')}" for tag in hashtags)
@@ -529,7 +758,7 @@ async def export_plan_zip(
     zip_buffer.seek(0)
 
     return StreamingResponse(
-        zip_buffer,
+        _iter_spooled(zip_buffer),
         media_type="application/zip",
         headers={
             "Content-Disposition": f"attachment; filename=amplifi_export_{plan_id}.zip"
@@ -806,40 +1035,58 @@ async def stream_generate(
             logger.warning("Could not download custom photo for day %s: %s", day_index, e)
             custom_photo_bytes = None  # fall back to normal generation
 
-    # Delete any existing post for this plan+day+platform (regeneration replaces, not duplicates)
+    # The brief's post has a deterministic ID, so (re)generation is a single
+    # transactional upsert: it starts a new version, and the replaced
+    # version's media is queued for cleanup.
     brief_platform = day_brief.get("platform", "instagram")
-    existing_posts = await firestore_client.list_posts(brand_id, plan_id)
-    for ep in existing_posts:
-        if ep.get("brief_index") == day_index and ep.get("platform", "") == brief_platform:
-            try:
-                await firestore_client.delete_post(brand_id, ep["post_id"])
-            except Exception:
-                pass  # best-effort cleanup
-
-    # Extract prior hooks from already-generated posts for deduplication
-    prior_hooks = [
-        p.get("caption", "").split("\n")[0][:100]
-        for p in existing_posts
-        if p.get("status") in ("complete", "approved") and p.get("caption")
-        and not (p.get("brief_index") == day_index and p.get("platform", "") == brief_platform)  # exclude the post we just deleted
-    ]
+    post_id, post_version = await firestore_client.upsert_generating_post(
+        brand_id, plan_id, day_index, brief_platform, {
+            "day_index": day_brief.get("day_index", day_index),
+            "pillar": day_brief.get("pillar"),
+            "format": day_brief.get("format"),
+            "cta_type": day_brief.get("cta_type"),
+            "derivative_type": day_brief.get("derivative_type", "original"),
+            "status": "generating",
+            "caption": "",
+            "hashtags": [],
+            "image_url": None,
+            "byop": custom_photo_bytes is not None,
+        },
+    )
 
-    # Create a pending post record in Firestore.
-    # save_post(brand_id, plan_id, data) generates and returns its own post_id.
-    post_id = await firestore_client.save_post(brand_id, plan_id, {
-        "day_index": day_brief.get("day_index", day_index),
-        "brief_index": day_index,
-        "platform": day_brief.get("platform", "instagram"),
-        "pillar": day_brief.get("pillar"),
-        "format": day_brief.get("format"),
-        "cta_type": day_brief.get("cta_type"),
-        "derivative_type": day_brief.get("derivative_type", "original"),
-        "status": "generating",
-        "caption": "",
-        "hashtags": [],
-        "image_url": None,
-        "byop": custom_photo_bytes is not None,
-    })
+    # Hook dedup draws on the brand's whole history via the hook index: the
+    # prompt gets the indexed hooks closest to today's brief, and the review
+    # gate checks the caption for near-duplicates. The post being replaced
+    # is dropped from the index; a brand without an index yet is seeded from
+    # this plan's completed posts.
+    try:
+        hooks = await hook_index.load(brand_id)
+    except Exception as e:
+        logger.warning("Hook index load failed for brand %s: %s", brand_id, e)
+        hooks = hook_index.HookIndex(brand_id, {})
+    replaced = [post_id] if post_id in hooks else []
+    hooks.discard(replaced)
+    backfill: list = []
+    if not len(hooks):
+        backfill = [
+            hook_index.build_entry(p["post_id"], p["caption"], plan_id, p.get("platform"), p.get("created_at"))
+            for p in await firestore_client.list_posts(brand_id, plan_id)
+            if p.get("status") in ("complete", "approved") and p.get("caption")
+            and p.get("post_id") and p["post_id"] != post_id
+        ]
+        for entry in backfill:
+            hooks.add(entry)
+    if backfill or replaced:
+        try:
+            await hook_index.save(brand_id, backfill, removed=replaced)
+        except Exception as e:
+            logger.warning("Hook index update failed for brand %s: %s", brand_id, e)
+    prior_hooks = hooks.similar_hooks(
+        " ".join(filter(None, (
+            day_brief.get("caption_hook"), day_brief.get("content_theme"), day_brief.get("key_message"),
+        ))),
+        HOOK_DEDUP_TOP_K,
+    )
 
     # Run generation as a background task so it completes (and saves to
     # Firestore) even if the user navigates away and the SSE stream closes.
@@ -875,6 +1122,7 @@ async def stream_generate(
                     custom_photo_mime=custom_photo_mime,
                     instructions=instructions,
                     prior_hooks=prior_hooks,
+                    hook_index=hooks,
                 ):
                     _last_event_time = asyncio.get_event_loop().time()
                     event_name = event["event"]
@@ -884,7 +1132,8 @@ async def stream_generate(
                     if event_name == "caption" and not event_data.get("chunk"):
                         final_caption = event_data.get("text", "")
                         final_hashtags = event_data.get("hashtags", [])
-                    elif event_name == "image":
+                    elif event_name == "image" and not event_data.get("slide_index"):
+                        # Carousel slides arrive out of order; only the cover is the hero
                         final_image_url = event_data.get("url")
                         final_image_gcs_uri = event_data.get("gcs_uri")
                     elif event_name == "complete":
@@ -909,17 +1158,35 @@ async def stream_generate(
                             update_data["image_urls"] = carousel_urls
                         if carousel_gcs:
                             update_data["image_gcs_uris"] = carousel_gcs
+                        if event_data.get("image_renditions"):
+                            update_data["image_renditions"] = event_data["image_renditions"]
+                            await _refresh_thumbnail_urls(update_data)
                         # Save review from inline review gate (if present)
                         gate_review = event_data.get("review")
                         if gate_review:
                             update_data["review"] = gate_review
                         try:
-                            await firestore_client.update_post(brand_id, post_id, update_data)
+                            current = await firestore_client.update_post_if_version(
+                                brand_id, post_id, post_version, update_data,
+                            )
+                            if current:
+                                await hook_index.record(
+                                    brand_id, post_id, final_caption, plan_id, brief_platform,
+                                )
+                            else:
+                                # A newer regeneration owns the post; this run's media is orphaned
+                                logger.warning("Post %s v%d superseded — discarding its results",
+                                               post_id, post_version)
+                                await firestore_client.queue_media_cleanup(
+                                    brand_id, {**update_data, "post_id": post_id, "version": post_version},
+                                )
                         except Exception as fs_err:
                             logger.error("Firestore update failed for post %s: %s", post_id, fs_err)
                     elif event_name == "error":
                         try:
-                            await firestore_client.update_post(brand_id, post_id, {"status": "failed"})
+                            await firestore_client.update_post_if_version(
+                                brand_id, post_id, post_version, {"status": "failed"},
+                            )
                         except Exception as fs_err:
                             logger.error("Firestore error-update failed for post %s: %s", post_id, fs_err)
 
@@ -959,7 +1226,7 @@ async def stream_generate(
                             tier="fast",
                         )
                         # Update Firestore with video metadata
-                        await firestore_client.update_post(brand_id, post_id, {
+                        video_update = {
                             "video_url": video_result["video_url"],
                             "video": {
                                 "url": video_result["video_url"],
@@ -967,7 +1234,13 @@ async def stream_generate(
                                 "duration_seconds": 8,
                                 "model": video_result.get("model", "veo-3.1"),
                             },
-                        })
+                        }
+                        if not await firestore_client.update_post_if_version(
+                            brand_id, post_id, post_version, video_update,
+                        ):
+                            await firestore_client.queue_media_cleanup(
+                                brand_id, {**video_update, "post_id": post_id, "version": post_version},
+                            )
                         await event_queue.put({
                             "event": "video_complete",
                             "data": {
@@ -988,7 +1261,9 @@ async def stream_generate(
         except Exception as exc:
             logger.error("Generation task error for post %s: %s", post_id, exc)
             try:
-                await firestore_client.update_post(brand_id, post_id, {"status": "failed"})
+                await firestore_client.update_post_if_version(
+                    brand_id, post_id, post_version, {"status": "failed"},
+                )
             except Exception:
                 pass
             await event_queue.put({"event": "error", "data": {"message": str(exc)}})
@@ -1015,7 +1290,7 @@ async def stream_generate(
 
 
 # ── Post Review ───────────────────────────────────────────────
-from backend.agents.review_agent import review_post as _run_review
+from backend.agents.review_agent import review_post as _run_review, review_posts_batch as _run_review_batch
 
 from datetime import datetime, timezone
 
@@ -1023,6 +1298,7 @@ from datetime import datetime, timezone
 class PatchPostBody(_PydanticBaseModel):
     caption: str | None = None
     hashtags: list[str] | None = None
+    version: int | None = None          # post version the edit was made on
 
 
 class EditMediaBody(_PydanticBaseModel):
@@ -1044,15 +1320,46 @@ async def patch_post_endpoint(brand_id: str, post_id: str, data: PatchPostBody):
         allowed["hashtags"] = data.hashtags
     if not allowed:
         raise HTTPException(status_code=400, detail="No patchable fields provided")
-    await firestore_client.update_post(brand_id, post_id, {
+    version = data.version if data.version is not None else post.get("version", 0)
+    if not await firestore_client.update_post_if_version(brand_id, post_id, version, {
         **allowed,
         "user_edited": True,
         "edited_at": datetime.now(timezone.utc).isoformat(),
-    })
+    }):
+        raise HTTPException(status_code=409, detail=_POST_REGENERATED)
     updated = await firestore_client.get_post(brand_id, post_id)
     return {"post": updated}
 
 
+# Conflict detail when a post was regenerated under an in-flight request
+_POST_REGENERATED = "Post was regenerated while this request was in progress"
+
+
+def _has_llm_review(post: dict) -> bool:
+    review = post.get("review")
+    return bool(review) and review.get("source") != "prescreen"
+
+
+def _review_update(post: dict, result: dict) -> dict:
+    """Post fields a review result updates."""
+    update: dict = {"review": result}
+
+    # If approved, update post status
+    if result.get("approved"):
+        update["status"] = "approved"
+
+    # Store revision notes (specific edit instructions, not full rewrites)
+    if result.get("revision_notes"):
+        update["revision_notes"] = result["revision_notes"]
+
+    # If revised hashtags provided, sanitize before saving
+    if result.get("revised_hashtags"):
+        from backend.agents.caption_text import sanitize_hashtags
+        platform = post.get("platform", "instagram")
+        update["hashtags"] = sanitize_hashtags(result["revised_hashtags"], platform)
+    return update
+
+
 @app.post("/api/brands/{brand_id}/posts/{post_id}/review")
 async def review_post_endpoint(brand_id: str, post_id: str, force: bool = Query(False)):
     """AI-review a generated post against brand guidelines."""
@@ -1060,8 +1367,9 @@ async def review_post_endpoint(brand_id: str, post_id: str, force: bool = Query(
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    # Return cached review if one exists (unless force=true for re-review)
-    if not force and post.get("review"):
+    # Return cached review if one exists (unless force=true for re-review).
+    # Local pre-review verdicts don't count — the user asked for a real review.
+    if not force and _has_llm_review(post):
         return {"review": post["review"], "post_id": post_id}
 
     brand = await firestore_client.get_brand(brand_id)
@@ -1070,38 +1378,60 @@ async def review_post_endpoint(brand_id: str, post_id: str, force: bool = Query(
 
     result = await _run_review(post, brand)
 
-    # Save review to Firestore
-    await firestore_client.save_review(brand_id, post_id, result)
+    # Review, status, revision notes and hashtags all land in one write,
+    # and only on the version of the post that was reviewed
+    if not await firestore_client.update_post_if_version(
+        brand_id, post_id, post.get("version", 0), _review_update(post, result),
+    ):
+        raise HTTPException(status_code=409, detail=_POST_REGENERATED)
 
-    # If approved, update post status
-    if result.get("approved"):
-        await firestore_client.update_post(brand_id, post_id, {"status": "approved"})
+    return {"review": result, "post_id": post_id}
 
-    # Store revision notes (specific edit instructions, not full rewrites)
-    if result.get("revision_notes"):
-        await firestore_client.update_post(brand_id, post_id, {
-            "revision_notes": result["revision_notes"],
-        })
 
-    # If revised hashtags provided, sanitize before saving
-    if result.get("revised_hashtags"):
-        from backend.agents.content_creator import _sanitize_hashtags
-        platform = post.get("platform", "instagram")
-        cleaned = _sanitize_hashtags(result["revised_hashtags"], platform)
-        await firestore_client.update_post(brand_id, post_id, {
-            "hashtags": cleaned,
-        })
+@app.post("/api/brands/{brand_id}/plans/{plan_id}/review")
+async def review_plan_endpoint(brand_id: str, plan_id: str, force: bool = Query(False)):
+    """AI-review every generated post in a plan with batched review requests."""
+    brand = await firestore_client.get_brand(brand_id)
+    if not brand:
+        raise HTTPException(status_code=404, detail="Brand not found")
 
-    return {"review": result, "post_id": post_id}
+    posts = await firestore_client.list_posts(brand_id, plan_id)
+    reviews: dict[str, dict] = {}
+    pending: list[dict] = []
+    for post in posts:
+        if not post.get("post_id") or not post.get("caption") or post.get("status") == "generating":
+            continue
+        # Keep cached reviews (unless force=true for re-review)
+        if not force and _has_llm_review(post):
+            reviews[post["post_id"]] = post["review"]
+        else:
+            pending.append(post)
+
+    applied: set[str] = set()
+    if pending:
+        results = await _run_review_batch(pending, brand)
+        # Posts regenerated while the batch ran keep their new state
+        applied = await firestore_client.update_posts_if_version(brand_id, [
+            (post["post_id"], post.get("version", 0), _review_update(post, result))
+            for post, result in zip(pending, results)
+        ])
+        for post, result in zip(pending, results):
+            if post["post_id"] in applied:
+                reviews[post["post_id"]] = result
+
+    return {"reviews": reviews, "reviewed": len(applied), "plan_id": plan_id}
 
 
 @app.post("/api/brands/{brand_id}/posts/{post_id}/approve")
-async def approve_post_endpoint(brand_id: str, post_id: str):
-    """Manually approve a post (user override)."""
+async def approve_post_endpoint(brand_id: str, post_id: str, version: Optional[int] = Query(None)):
+    """Manually approve a post (user override), optionally pinned to the version shown."""
     post = await firestore_client.get_post(brand_id, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
-    await firestore_client.update_post(brand_id, post_id, {"status": "approved"})
+    if version is None:
+        version = post.get("version", 0)
+    if not await firestore_client.update_post_if_version(brand_id, post_id, version, {"status": "approved"}):
+        raise HTTPException(status_code=409, detail=_POST_REGENERATED)
     return {"status": "approved", "post_id": post_id}
 
 
@@ -1116,6 +1446,9 @@ async def edit_post_media(brand_id: str, post_id: str, body: EditMediaBody):
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
+    # Edits land only on the version they were made from
+    post_version = post.get("version", 0)
+
     # Enforce 8-edit cap per image
     edit_count = post.get("edit_count", 0)
     if edit_count >= 8:
@@ -1146,9 +1479,10 @@ async def edit_post_media(brand_id: str, post_id: str, body: EditMediaBody):
         _platform = post.get("platform", "instagram")
         tier = video_data.get("tier", "fast")
 
-        # Snapshot original video on first edit
+        # Snapshot original video on first edit (written with the result below)
+        video_update: dict = {}
         if edit_count == 0 and not post.get("original_video_url"):
-            await firestore_client.update_post(brand_id, post_id, {"original_video_url": video_data.get("url")})
+            video_update["original_video_url"] = video_data.get("url")
 
         try:
             result = await generate_video_clip(
@@ -1167,7 +1501,7 @@ async def edit_post_media(brand_id: str, post_id: str, body: EditMediaBody):
 
         new_edit_count = edit_count + 1
         new_edit_history = post.get("edit_history", []) + [body.edit_prompt]
-        await firestore_client.update_post(brand_id, post_id, {
+        video_update.update({
             "video": {
                 **video_data,
                 "url": result["video_url"],
@@ -1177,13 +1511,19 @@ async def edit_post_media(brand_id: str, post_id: str, body: EditMediaBody):
             "edit_count": new_edit_count,
             "edit_history": new_edit_history[-10:],
         })
+        if not await firestore_client.update_post_if_version(brand_id, post_id, post_version, video_update):
+            await firestore_client.queue_media_cleanup(
+                brand_id, {"post_id": post_id, "video": {"video_gcs_uri": result["video_gcs_uri"]}},
+            )
+            raise HTTPException(status_code=409, detail=_POST_REGENERATED)
         return {"image_url": result["video_url"], "edit_count": new_edit_count}
 
-    # Snapshot original on first edit
+    # Snapshot original on first edit (written together with the edit result)
+    original_update: dict = {}
     if edit_count == 0:
         original_key = "original_thumbnail_gcs_uri" if body.target == "thumbnail" else "original_image_gcs_uri"
         if not post.get(original_key):
-            await firestore_client.update_post(brand_id, post_id, {original_key: gcs_uri})
+            original_update[original_key] = gcs_uri
 
     # Get edit history for context
     edit_history = post.get("edit_history", [])
@@ -1219,6 +1559,7 @@ async def edit_post_media(brand_id: str, post_id: str, body: EditMediaBody):
     new_edit_count = edit_count + 1
     new_edit_history = edit_history + [body.edit_prompt]
     update_data: dict = {
+        **original_update,
         "edit_count": new_edit_count,
         "edit_history": new_edit_history[-10:],  # keep last 10
     }
@@ -1232,7 +1573,28 @@ async def edit_post_media(brand_id: str, post_id: str, body: EditMediaBody):
     else:
         update_data["image_gcs_uri"] = new_gcs_uri
 
-    await firestore_client.update_post(brand_id, post_id, update_data)
+    if body.target != "thumbnail":
+        try:
+            # edit_image seeds the media cache, so this read is local
+            edited_bytes = await download_gcs_uri(new_gcs_uri)
+            renditions = await create_renditions(new_gcs_uri, edited_bytes, _aspect)
+        except Exception as e:
+            logger.warning("Renditions for edited image %s failed: %s", new_gcs_uri, e)
+            renditions = {}
+        if renditions:
+            update_data["image_renditions"] = {
+                **(post.get("image_renditions") or {}), new_gcs_uri: renditions,
+            }
+            if _cover_gcs_uri({**post, **update_data}) == new_gcs_uri:
+                await _refresh_thumbnail_urls(update_data)
+
+    if not await firestore_client.update_post_if_version(brand_id, post_id, post_version, update_data):
+        await firestore_client.queue_media_cleanup(brand_id, {
+            "post_id": post_id,
+            "image_gcs_uris": [new_gcs_uri],
+            "image_renditions": {new_gcs_uri: (update_data.get("image_renditions") or {}).get(new_gcs_uri) or {}},
+        })
+        raise HTTPException(status_code=409, detail=_POST_REGENERATED)
 
     # Return signed URL for frontend
     signed_url = await get_signed_url(new_gcs_uri)
@@ -1250,21 +1612,23 @@ async def reset_post_media(brand_id: str, post_id: str, target: str | None = Non
         original_uri = post.get("original_thumbnail_gcs_uri")
         if not original_uri:
             raise HTTPException(status_code=422, detail="No original thumbnail to restore")
-        await firestore_client.update_post(brand_id, post_id, {
+        if not await firestore_client.update_post_if_version(brand_id, post_id, post.get("version", 0), {
             "thumbnail_gcs_uri": original_uri,
             "edit_count": 0,
             "edit_history": [],
-        })
+        }):
+            raise HTTPException(status_code=409, detail=_POST_REGENERATED)
         signed_url = await get_signed_url(original_uri)
     else:
         original_uri = post.get("original_image_gcs_uri")
         if not original_uri:
             raise HTTPException(status_code=422, detail="No original image to restore")
-        await firestore_client.update_post(brand_id, post_id, {
+        if not await firestore_client.update_post_if_version(brand_id, post_id, post.get("version", 0), {
             "image_gcs_uri": original_uri,
             "edit_count": 0,
             "edit_history": [],
-        })
+        }):
+            raise HTTPException(status_code=409, detail=_POST_REGENERATED)
         signed_url = await get_signed_url(original_uri)
 
     return {"image_url": signed_url}
@@ -1276,6 +1640,40 @@ from backend.agents.video_creator import generate_video_clip
 import backend.services.budget_tracker as bt
 
 
+# Holder ID for this instance's video job leases
+_INSTANCE_ID = uuid.uuid4().hex
+# Renew well inside the lease so one slow write can't let it lapse
+_VIDEO_LEASE_RENEW_S = firestore_client.VIDEO_JOB_LEASE_S / 3
+
+
+async def _renew_video_lease(job_id: str) -> None:
+    while True:
+        await asyncio.sleep(_VIDEO_LEASE_RENEW_S)
+        try:
+            if not await firestore_client.claim_video_job(job_id, _INSTANCE_ID):
+                logger.warning("Lost the lease on video job %s", job_id)
+                return
+        except Exception as e:
+            logger.warning("Lease renewal failed for video job %s: %s", job_id, e)
+
+
+async def _drive_video_job(
+    job_id: str, post_id: str, brand_id: str, tier: str, post_version: Optional[int], produce,
+) -> None:
+    """Await ``produce()`` while holding the job's lease, then record the outcome."""
+    renewer = asyncio.create_task(_renew_video_lease(job_id))
+    try:
+        result = await produce()
+    except Exception as e:
+        logger.error("Video generation failed for job %s: %s", job_id, e)
+        if not await firestore_client.finish_video_job(job_id, _INSTANCE_ID, "failed", {"error": str(e)}):
+            logger.info("Video job %s was settled by another instance; not marking it failed", job_id)
+        return
+    finally:
+        renewer.cancel()
+    await _complete_video_job(job_id, post_id, brand_id, tier, post_version, result)
+
+
 async def _run_video_generation(
     job_id: str,
     post_id: str,
@@ -1286,20 +1684,28 @@ async def _run_video_generation(
     tier: str,
 ):
     """Background task that runs Veo generation and updates Firestore."""
-    try:
-        await firestore_client.update_video_job(job_id, "generating")
-        result = await generate_video_clip(
-            hero_image_bytes=hero_image_bytes,
-            caption=post.get("caption", ""),
-            brand_profile=brand,
-            platform=post.get("platform", "instagram"),
-            post_id=post_id,
-            tier=tier,
-        )
-        bt.budget_tracker.record_video(tier)
-        await firestore_client.update_video_job(job_id, "complete", result)
-        # Also update the post with video metadata
-        await firestore_client.update_post(brand_id, post_id, {
+    if not await firestore_client.claim_video_job(job_id, _INSTANCE_ID):
+        logger.warning("Video job %s is held by another instance; not starting it", job_id)
+        return
+    await _drive_video_job(job_id, post_id, brand_id, tier, post.get("version", 0), lambda: generate_video_clip(
+        hero_image_bytes=hero_image_bytes,
+        caption=post.get("caption", ""),
+        brand_profile=brand,
+        platform=post.get("platform", "instagram"),
+        post_id=post_id,
+        tier=tier,
+        job_id=job_id,
+    ))
+
+
+async def _complete_video_job(
+    job_id: str, post_id: str, brand_id: str, tier: str, post_version: Optional[int], result: dict,
+):
+    # Job completion and post video metadata commit in one transaction, and
+    # only while this instance still holds the job and the post hasn't been
+    # regenerated since the job started
+    status = await firestore_client.finish_video_job(
+        job_id, _INSTANCE_ID, "complete", result, brand_id, post_id, {
             "video": {
                 "url": result["video_url"],
                 "video_gcs_uri": result.get("video_gcs_uri"),
@@ -1307,10 +1713,69 @@ async def _run_video_generation(
                 "model": result["model"],
                 "job_id": job_id,
             }
-        })
+        },
+        post_version=post_version,
+    )
+    if status is not None:
+        # The operation was paid for even if the post has moved on
+        bt.budget_tracker.record_video(tier)
+    if status == "complete":
+        return
+    if status is None:
+        logger.info("Video job %s was settled by another instance; discarding this result", job_id)
+    else:
+        logger.info("Post %s was regenerated during video job %s; discarding the video", post_id, job_id)
+    await firestore_client.queue_media_cleanup(
+        brand_id, {"post_id": post_id, "video": {"video_gcs_uri": result.get("video_gcs_uri")}},
+    )
+
+
+async def _resume_video_job(job: dict):
+    """Finish a video job whose Veo operation was started before a restart."""
+    from backend.agents.video_creator import resume_video_clip
+
+    job_id = job["job_id"]
+    # A live lease means another instance is still polling the operation;
+    # take over only if that lease lapses before the job settles
+    try:
+        while not await firestore_client.claim_video_job(job_id, _INSTANCE_ID):
+            current = await firestore_client.get_video_job(job_id)
+            if not current or current.get("status") != "generating":
+                return
+            lease = current.get("lease_until")
+            wait = (
+                (lease - datetime.now(timezone.utc)).total_seconds()
+                if isinstance(lease, datetime) else firestore_client.VIDEO_JOB_LEASE_S
+            )
+            await asyncio.sleep(max(wait, 0) + 5)
+    except Exception as e:
+        logger.error("Could not claim video job %s for resume: %s", job_id, e)
+        return
+    logger.info("Resuming video job %s (%s)", job_id, job["veo_operation"]["name"])
+    await _drive_video_job(
+        job_id, job["post_id"], job["brand_id"], job.get("tier", "fast"), job.get("post_version"),
+        lambda: resume_video_clip(job["veo_operation"]),
+    )
+
+
+@app.on_event("startup")
+async def _resume_pending_video_jobs():
+    """Re-attach to paid Veo operations left in flight by a previous instance."""
+    try:
+        jobs = await firestore_client.list_resumable_video_jobs()
     except Exception as e:
-        logger.error(f"Video generation failed for job {job_id}: {e}")
-        await firestore_client.update_video_job(job_id, "failed", {"error": str(e)})
+        logger.warning("Could not list resumable video jobs: %s", e)
+        return
+    for job in jobs:
+        if not job.get("brand_id"):
+            continue
+        task = asyncio.create_task(_resume_video_job(job))
+        _resumed_video_tasks.add(task)
+        task.add_done_callback(_resumed_video_tasks.discard)
+
+
+# Strong refs so resumed jobs aren't garbage-collected mid-flight
+_resumed_video_tasks: set[asyncio.Task] = set()
 
 
 @app.post("/api/posts/{post_id}/generate-video")
@@ -1348,13 +1813,18 @@ async def start_video_generation(
     hero_image_bytes: bytes | None = None
     if image_gcs_uri:
         try:
-            hero_image_bytes = await download_gcs_uri(image_gcs_uri)
+            # The platform-sized JPEG rendition is plenty for Veo and far smaller
+            hero_image_bytes = await download_gcs_uri(
+                compact_uri(post, image_gcs_uri, "jpeg") or image_gcs_uri
+            )
         except Exception as e:
             logger.error("Failed to download hero image for post %s: %s", post_id, e)
             raise HTTPException(status_code=500, detail=f"Failed to fetch hero image: {e}")
 
     # Create job record in Firestore
-    job_id = await firestore_client.create_video_job(post_id, tier)
+    job_id = await firestore_client.create_video_job(
+        post_id, tier, brand_id=brand_id, post_version=post.get("version", 0),
+    )
 
     # Fire background task; store reference to prevent GC before completion
     _veo_task = asyncio.create_task(
@@ -1385,9 +1855,73 @@ async def get_video_job_status(job_id: str):
     return job
 
 
+# Terminal job statuses close the event stream
+_JOB_TERMINAL_STATUSES = ("complete", "failed")
+# Subscribers re-read the job doc this often in case it is being processed
+# by another instance (in-process events only cover local writers)
+_JOB_EVENTS_RESYNC_S = 15
+
+
+def _job_event_stream(job_id: str, job: dict, load_job, present):
+    """SSE generator pushing job status transitions until a terminal status.
+
+    ``job`` is the already-loaded document; ``load_job()`` re-reads it for the
+    resync fallback and ``present(job)`` shapes each outgoing payload.
+    """
+    from backend.services import job_events
+
+    async def event_stream():
+        nonlocal job
+        try:
+            async with job_events.subscribe(job_id) as queue:
+                # Re-read after subscribing so a transition between the caller's
+                # read and the subscription isn't lost
+                job = await load_job() or job
+                last_status = job.get("status")
+                yield {"event": "status", "data": json.dumps(await present(job), default=str)}
+                while last_status not in _JOB_TERMINAL_STATUSES:
+                    try:
+                        changes = await asyncio.wait_for(queue.get(), timeout=_JOB_EVENTS_RESYNC_S)
+                        job = {**job, **changes}
+                    except asyncio.TimeoutError:
+                        fresh = await load_job()
+                        if not fresh:
+                            break
+                        job = fresh
+                    if job.get("status") == last_status:
+                        continue
+                    last_status = job.get("status")
+                    yield {"event": "status", "data": json.dumps(await present(job), default=str)}
+        except asyncio.CancelledError:
+            # Client disconnected — the job itself keeps running
+            pass
+
+    return EventSourceResponse(event_stream())
+
+
+async def _present_video_job(job: dict) -> dict:
+    return job
+
+
+@app.get("/api/video-jobs/{job_id}/events")
+async def stream_video_job_status(job_id: str):
+    """Server-sent events for a video job: one ``status`` event per transition.
+
+    Replaces polling /api/video-jobs/{job_id}; the stream ends once the job
+    is complete or failed.
+    """
+    job = await firestore_client.get_video_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Video job not found")
+    return _job_event_stream(
+        job_id, job, lambda: firestore_client.get_video_job(job_id), _present_video_job,
+    )
+
+
 # ── Video Repurposing ──────────────────────────────────────────
 
 _MAX_VIDEO_BYTES = 500 * 1024 * 1024  # 500 MB
+_UPLOAD_CHUNK_BYTES = 8 * 1024 * 1024
 
 
 def _is_valid_video_header(data: bytes) -> bool:
@@ -1412,37 +1946,22 @@ async def _run_video_repurposing(
     source_gcs_uri: str,
     brand: dict,
 ) -> None:
-    """Background task: download source video, run Gemini analysis + FFmpeg, upload clips."""
-    from backend.agents.video_repurpose_agent import analyze_and_repurpose
-    from backend.services.storage_client import download_gcs_uri
+    """Background task: stream source video, run Gemini analysis + FFmpeg, upload clips."""
+    from backend.agents.video_repurpose_agent import repurpose_from_gcs
 
     try:
         await firestore_client.update_repurpose_job(job_id, "processing")
 
-        video_bytes = await download_gcs_uri(source_gcs_uri)
-
         # Infer MIME type from the stored GCS path extension
         mime_type = "video/quicktime" if source_gcs_uri.lower().endswith(".mov") else "video/mp4"
-        raw_clips = await analyze_and_repurpose(video_bytes, brand, mime_type=mime_type)
 
-        clips_out = []
-        for clip in raw_clips:
-            # Store only gcs_uri — signed URLs are generated fresh at query time
-            gcs_uri = await upload_repurposed_clip(
-                brand_id, job_id, clip["clip_bytes"], clip["filename"]
-            )
-            clips_out.append({
-                "platform": clip["platform"],
-                "duration_seconds": clip["duration_seconds"],
-                "start_time": clip["start_time"],
-                "end_time": clip["end_time"],
-                "hook": clip["hook"],
-                "suggested_caption": clip["suggested_caption"],
-                "reason": clip["reason"],
-                "content_theme": clip.get("content_theme", ""),
-                "clip_gcs_uri": gcs_uri,
-                "filename": clip["filename"],
-            })
+        # Store only gcs_uri — signed URLs are generated fresh at query time
+        async def _upload_clip(clip_path: str, filename: str) -> str:
+            return await upload_repurposed_clip(brand_id, job_id, clip_path, filename)
+
+        clips_out = await repurpose_from_gcs(
+            source_gcs_uri, brand, _upload_clip, mime_type=mime_type
+        )
 
         await firestore_client.update_repurpose_job(job_id, "complete", clips=clips_out)
         logger.info("Video repurposing complete for job %s: %d clips", job_id, len(clips_out))
@@ -1472,17 +1991,26 @@ async def upload_video_for_repurpose(
     if ext not in ("mp4", "mov"):
         raise HTTPException(status_code=400, detail="Only .mp4 and .mov files are accepted")
 
-    video_bytes = await file.read()
-    if len(video_bytes) == 0:
+    # Validate the container header before streaming the rest to GCS
+    head = await file.read(_UPLOAD_CHUNK_BYTES)
+    if len(head) == 0:
         raise HTTPException(status_code=400, detail="Uploaded file is empty")
-    if len(video_bytes) > _MAX_VIDEO_BYTES:
-        raise HTTPException(status_code=413, detail="Video must be under 500 MB")
-    if not _is_valid_video_header(video_bytes):
+    if not _is_valid_video_header(head):
         raise HTTPException(status_code=400, detail="File does not appear to be a valid MP4/MOV video")
 
+    async def _chunks():
+        yield head
+        while chunk := await file.read(_UPLOAD_CHUNK_BYTES):
+            yield chunk
+
     # Generate job_id up front so it's consistent across GCS path + Firestore
     job_id = str(uuid.uuid4())
-    source_gcs_uri = await upload_raw_video_source(brand_id, job_id, video_bytes, filename)
+    try:
+        source_gcs_uri, _ = await upload_raw_video_source(
+            brand_id, job_id, _chunks(), filename, max_bytes=_MAX_VIDEO_BYTES,
+        )
+    except ValueError:
+        raise HTTPException(status_code=413, detail="Video must be under 500 MB")
     await firestore_client.create_repurpose_job(brand_id, source_gcs_uri, filename, job_id)
 
     # Fire background processing task with done-callback for exception logging
@@ -1509,7 +2037,28 @@ async def get_video_repurpose_job(job_id: str, brand_id: str = Query(...)):
         raise HTTPException(status_code=404, detail="Repurpose job not found")
     if job.get("brand_id") != brand_id:
         raise HTTPException(status_code=403, detail="Access denied")
+    return await _present_repurpose_job(job)
 
+
+@app.get("/api/video-repurpose-jobs/{job_id}/events")
+async def stream_video_repurpose_job(job_id: str, brand_id: str = Query(...)):
+    """Server-sent events for a repurpose job: one ``status`` event per transition.
+
+    Clip URLs are signed once, on the ``complete`` event, rather than on every
+    poll. The stream ends once the job is complete or failed.
+    """
+    job = await firestore_client.get_repurpose_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Repurpose job not found")
+    if job.get("brand_id") != brand_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    return _job_event_stream(
+        job_id, job, lambda: firestore_client.get_repurpose_job(job_id), _present_repurpose_job,
+    )
+
+
+async def _present_repurpose_job(job: dict) -> dict:
+    """Client view of a repurpose job, with fresh clip URLs once complete."""
     # Strip internal-only fields before returning
     response = {k: v for k, v in job.items() if k not in ("source_gcs_uri",)}
 
@@ -1823,10 +2372,30 @@ async def notion_select_database(
     return {"status": "selected", "database_id": database_id}
 
 
+def _notion_slot_key(post: dict) -> str:
+    """Stable key for a plan slot — survives regeneration, which replaces post_id."""
+    brief_index = post.get("brief_index", post.get("day_index", 0))
+    return f"{brief_index}:{post.get('platform', 'instagram')}"
+
+
 @app.post("/api/brands/{brand_id}/plans/{plan_id}/export/notion")
-async def export_plan_to_notion(brand_id: str, plan_id: str):
-    """Export all posts from a plan to the connected Notion database."""
-    from backend.services.notion_client import create_page
+async def export_plan_to_notion(
+    brand_id: str,
+    plan_id: str,
+    mode: str = Query("sync", pattern="^(sync|full)$"),
+    archive_removed: bool = Query(False),
+):
+    """Export all posts from a plan to the connected Notion database.
+
+    ``mode=sync`` (default) is incremental and idempotent: posts that already
+    have a Notion page are PATCHed only when their content hash changed,
+    missing pages are created, and — with ``archive_removed=true`` — pages whose
+    plan slot no longer has a post are archived. ``mode=full`` re-creates a page
+    for every post (the legacy behaviour).
+    """
+    from backend.services.notion_client import (
+        create_page, update_page, archive_page, content_hash, body_hash,
+    )
 
     brand = await firestore_client.get_brand(brand_id)
     if not brand:
@@ -1854,10 +2423,16 @@ async def export_plan_to_notion(brand_id: str, plan_id: str):
     access_token = notion["access_token"]
     database_id = notion["database_id"]
 
+    # Slot → page index persisted on the plan; only entries for the currently
+    # selected database are reusable.
+    stored_pages: dict = dict(plan.get("notion_pages") or {})
+    synced_pages: dict = {}
+
     for post in posts:
         post_id = post.get("post_id", "")
         day_index = post.get("day_index", 0)
         platform = post.get("platform", "instagram")
+        slot = _notion_slot_key(post)
 
         # Merge theme from day brief into post for property building
         day_brief = day_lookup.get(day_index, {})
@@ -1865,28 +2440,95 @@ async def export_plan_to_notion(brand_id: str, plan_id: str):
         if not post.get("content_type"):
             post_with_theme["content_type"] = day_brief.get("content_type", "photo")
 
+        new_hash = content_hash(post_with_theme, day_index, platform)
+        new_body_hash = body_hash(post_with_theme)
+
+        existing = None
+        if mode == "sync":
+            existing = stored_pages.get(slot)
+            if not existing:
+                prior = (post.get("publish_status") or {}).get("notion") or {}
+                if prior.get("notion_page_id"):
+                    existing = {**prior, "database_id": prior.get("database_id", database_id)}
+            if existing and existing.get("database_id") != database_id:
+                existing = None
+
         try:
-            page = await create_page(access_token, database_id, post_with_theme, day_index, platform)
-            notion_page_id = page.get("id", "")
-            results.append({"post_id": post_id, "status": "exported", "notion_page_id": notion_page_id})
-
-            # Update post's publish_status
-            publish_status = post.get("publish_status", {}) or {}
-            publish_status["notion"] = {
-                "status": "exported",
+            status = "created"
+            notion_page_id = ""
+            if existing and existing.get("notion_page_id"):
+                notion_page_id = existing["notion_page_id"]
+                if existing.get("content_hash") == new_hash:
+                    status = "unchanged"
+                else:
+                    try:
+                        await update_page(
+                            access_token, notion_page_id, post_with_theme, day_index, platform,
+                            replace_body=existing.get("body_hash") != new_body_hash,
+                        )
+                        status = "updated"
+                    except LookupError:
+                        # Page was deleted/archived on the Notion side — recreate it
+                        notion_page_id = ""
+            if not notion_page_id:
+                page = await create_page(access_token, database_id, post_with_theme, day_index, platform)
+                notion_page_id = page.get("id", "")
+                status = "created"
+
+            results.append({"post_id": post_id, "status": status, "notion_page_id": notion_page_id})
+            synced_pages[slot] = {
+                "post_id": post_id,
                 "notion_page_id": notion_page_id,
-                "published_at": datetime.utcnow().isoformat(),
+                "database_id": database_id,
+                "content_hash": new_hash,
+                "body_hash": new_body_hash,
             }
-            await firestore_client.update_post(brand_id, post_id, {"publish_status": publish_status})
+
+            # Update post's publish_status (skip the write when nothing moved)
+            prior_status = (post.get("publish_status") or {}).get("notion") or {}
+            if status != "unchanged" or prior_status.get("notion_page_id") != notion_page_id:
+                publish_status = post.get("publish_status", {}) or {}
+                publish_status["notion"] = {
+                    "status": "exported",
+                    "notion_page_id": notion_page_id,
+                    "database_id": database_id,
+                    "content_hash": new_hash,
+                    "published_at": datetime.utcnow().isoformat(),
+                }
+                # A regenerated post keeps no export record, so the next sync updates its page
+                await firestore_client.update_post_if_version(
+                    brand_id, post_id, post.get("version", 0), {"publish_status": publish_status},
+                )
 
         except Exception as e:
             logger.error("Failed to export post %s to Notion: %s", post_id, e)
             results.append({"post_id": post_id, "status": "failed", "error": str(e)})
+            if slot in stored_pages:
+                synced_pages[slot] = stored_pages[slot]
+
+    # Pages whose slot no longer has a post (e.g. brief removed from the plan)
+    archived = 0
+    for slot, entry in stored_pages.items():
+        if slot in synced_pages:
+            continue
+        if archive_removed and entry.get("database_id") == database_id:
+            try:
+                await archive_page(access_token, entry["notion_page_id"])
+                archived += 1
+                continue
+            except Exception as e:
+                logger.warning("Failed to archive Notion page %s: %s", entry.get("notion_page_id"), e)
+        synced_pages[slot] = entry
+
+    if synced_pages != stored_pages:
+        await firestore_client.update_plan(brand_id, plan_id, {"notion_pages": synced_pages})
 
-    exported = sum(1 for r in results if r["status"] == "exported")
+    counts = {s: sum(1 for r in results if r["status"] == s) for s in ("created", "updated", "unchanged")}
     return {
-        "exported": exported,
+        "exported": sum(counts.values()),
         "total": len(posts),
+        **counts,
+        "archived": archived,
         "results": results,
     }
 
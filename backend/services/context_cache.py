@@ -0,0 +1,235 @@
+"""Gemini explicit context caching for long, shared prompt prefixes.
+
+Generation and review prompts repeat the same instructions (quality rules,
+self-review checklist, review rubric, brand profile) on every call. Callers
+pass that prefix as a system instruction keyed by (kind, brand, template
+version); the first call stores it as a Gemini cached-content object and later
+calls reference it by name, so the prefix is billed at the cached-token rate.
+
+Entries are process-local: a changed prefix (brand edited, template bumped)
+replaces its entry, caches are extended while in use, and entries beyond the
+LRU limit are deleted. Whenever caching is unavailable the prefix is sent
+inline, so callers get the same prompt either way.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from google import genai
+from google.genai import types
+
+from backend.config import (
+    GEMINI_CONTEXT_CACHE_ENABLED,
+    GEMINI_CONTEXT_CACHE_MAX_ENTRIES,
+    GEMINI_CONTEXT_CACHE_MIN_TOKENS,
+    GEMINI_CONTEXT_CACHE_TTL_S,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token for English prompts; only used to skip prefixes that
+# are obviously below the API's minimum cacheable size
+_CHARS_PER_TOKEN = 4
+
+# A cached-content reference that no longer resolves comes back as one of
+# these statuses with a message naming the cached content ("CachedContent not
+# found", "Cache content ... is expired"). Other 400s — a bad prompt, invalid
+# config, a safety block — would fail again inline, so they're not retried.
+_CACHE_MISS_CODES = (400, 403, 404)
+_CACHE_MISS_RE = re.compile(r"cached?[ _]?content", re.IGNORECASE)
+
+# After a failed create, send the prefix inline for this long before retrying
+_CREATE_RETRY_S = 300.0
+
+# Extend a cache once less than this fraction of its TTL remains
+_REFRESH_FRACTION = 0.25
+
+
+@dataclass
+class _Entry:
+    digest: str
+    # None: the prefix could not be cached; send it inline until expires_at
+    name: Optional[str]
+    expires_at: float
+    refreshing: bool = False
+
+
+_entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+_locks: dict[tuple, asyncio.Lock] = {}
+# Strong refs so fire-and-forget deletes and refreshes aren't garbage-collected mid-flight
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _spawn(coro) -> None:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def _is_cache_miss(e: Exception) -> bool:
+    return getattr(e, "code", None) in _CACHE_MISS_CODES and bool(_CACHE_MISS_RE.search(str(e)))
+
+
+def _digest(model: str, system_instruction: str) -> str:
+    return hashlib.sha256(f"{model}\0{system_instruction}".encode()).hexdigest()
+
+
+def _delete_later(client: genai.Client, name: str) -> None:
+    async def _delete() -> None:
+        try:
+            await asyncio.to_thread(client.caches.delete, name=name)
+        except Exception as e:
+            # Expired or already gone — the server-side TTL cleans up regardless
+            logger.debug("context_cache: delete %s failed: %s", name, e)
+    _spawn(_delete())
+
+
+def _store(client: genai.Client, key: tuple, entry: _Entry) -> None:
+    old = _entries.pop(key, None)
+    if old is not None and old.name and old.name != entry.name:
+        _delete_later(client, old.name)
+    _entries[key] = entry
+    while len(_entries) > GEMINI_CONTEXT_CACHE_MAX_ENTRIES:
+        evicted_key, evicted = _entries.popitem(last=False)
+        _locks.pop(evicted_key, None)
+        if evicted.name:
+            _delete_later(client, evicted.name)
+
+
+def _refresh_later(client: genai.Client, entry: _Entry) -> None:
+    """Push a hot cache's expiry out by another TTL without blocking the caller."""
+    entry.refreshing = True
+
+    async def _refresh() -> None:
+        try:
+            await asyncio.to_thread(
+                client.caches.update,
+                name=entry.name,
+                config=types.UpdateCachedContentConfig(ttl=f"{int(GEMINI_CONTEXT_CACHE_TTL_S)}s"),
+            )
+            entry.expires_at = time.monotonic() + GEMINI_CONTEXT_CACHE_TTL_S
+        except Exception as e:
+            logger.warning("context_cache: TTL refresh failed for %s: %s", entry.name, e)
+        finally:
+            entry.refreshing = False
+    _spawn(_refresh())
+
+
+async def _create(
+    client: genai.Client, model: str, key: tuple, system_instruction: str,
+) -> Optional[str]:
+    try:
+        cache = await asyncio.to_thread(
+            client.caches.create,
+            model=model,
+            config=types.CreateCachedContentConfig(
+                display_name=":".join(str(k) for k in key[:3])[:120],
+                system_instruction=system_instruction,
+                ttl=f"{int(GEMINI_CONTEXT_CACHE_TTL_S)}s",
+            ),
+        )
+    except Exception as e:
+        logger.warning("context_cache: create failed for %s, sending prefix inline: %s", key, e)
+        return None
+    logger.info("context_cache: created %s for %s", cache.name, key)
+    return cache.name
+
+
+async def get_cache_name(
+    client: genai.Client,
+    kind: str,
+    scope_id: str,
+    version: str,
+    model: str,
+    system_instruction: str,
+) -> Optional[str]:
+    """Cached-content name holding ``system_instruction``, or None to send it inline.
+
+    Args:
+        kind: Prompt family, e.g. "generate" or "review".
+        scope_id: Usually the brand_id; one cache per brand and prompt family.
+        version: Prompt template version — bump it when the template changes.
+    """
+    if not GEMINI_CONTEXT_CACHE_ENABLED or not scope_id:
+        return None
+    if len(system_instruction) < GEMINI_CONTEXT_CACHE_MIN_TOKENS * _CHARS_PER_TOKEN:
+        return None
+
+    key = (kind, scope_id, version, model)
+    digest = _digest(model, system_instruction)
+    now = time.monotonic()
+    entry = _entries.get(key)
+    if entry is not None and entry.digest == digest and entry.expires_at > now:
+        _entries.move_to_end(key)
+        if (
+            entry.name
+            and not entry.refreshing
+            and entry.expires_at - now < GEMINI_CONTEXT_CACHE_TTL_S * _REFRESH_FRACTION
+        ):
+            _refresh_later(client, entry)
+        return entry.name
+
+    # Single-flight per key: concurrent posts for one brand share one create
+    lock = _locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        entry = _entries.get(key)
+        if entry is not None and entry.digest == digest and entry.expires_at > time.monotonic():
+            return entry.name
+        name = await _create(client, model, key, system_instruction)
+        # Leave a margin so a request never references a cache that just expired
+        ttl = GEMINI_CONTEXT_CACHE_TTL_S * 0.9 if name else _CREATE_RETRY_S
+        _store(client, key, _Entry(digest=digest, name=name, expires_at=time.monotonic() + ttl))
+        return name
+
+
+def invalidate(name: str) -> None:
+    """Forget a cache the API no longer recognises (deleted or expired early)."""
+    for key, entry in list(_entries.items()):
+        if entry.name == name:
+            _entries.pop(key, None)
+
+
+async def generate_content(
+    client: genai.Client,
+    *,
+    kind: str,
+    scope_id: str,
+    version: str,
+    model: str,
+    system_instruction: str,
+    contents,
+    **config_kwargs,
+):
+    """``client.models.generate_content`` with ``system_instruction`` served from cache.
+
+    ``config_kwargs`` are passed to ``types.GenerateContentConfig``. If the
+    cache has expired or vanished server-side, it is dropped and the call is
+    retried once with the prefix inline.
+    """
+    name = await get_cache_name(client, kind, scope_id, version, model, system_instruction)
+    if name:
+        try:
+            return await asyncio.to_thread(
+                client.models.generate_content,
+                model=model,
+                contents=contents,
+                config=types.GenerateContentConfig(cached_content=name, **config_kwargs),
+            )
+        except Exception as e:
+            # Only a missing/expired cache is worth an inline retry
+            if not _is_cache_miss(e):
+                raise
+            logger.warning("context_cache: request against %s failed, retrying inline: %s", name, e)
+            invalidate(name)
+    return await asyncio.to_thread(
+        client.models.generate_content,
+        model=model,
+        contents=contents,
+        config=types.GenerateContentConfig(system_instruction=system_instruction, **config_kwargs),
+    )
@@ -1,11 +1,16 @@
+import copy
+import time
 import uuid
 import logging
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timezone, timedelta
-from typing import Optional
+from typing import AsyncIterator, Iterator, Optional
 from google.cloud import firestore
 from google.cloud.firestore_v1.async_client import AsyncClient
 from google.cloud.firestore_v1.base_query import FieldFilter
-from backend.config import GCP_PROJECT_ID
+from backend.config import GCP_PROJECT_ID, BRAND_CACHE_TTL_S
+from backend.services import job_events
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +22,222 @@ def get_client() -> AsyncClient:
         _client = firestore.AsyncClient(project=GCP_PROJECT_ID)
     return _client
 
+# ── Read-through caches ───────────────────────────────────────
+#
+# Two layers, both keyed by Firestore document path:
+#   1. A request-scoped identity map (set up per HTTP request by the server
+#      middleware via request_scope()). Repeated get_brand/get_plan/get_post
+#      calls inside one request hit Firestore once; writes made through this
+#      module are applied to the map so read-after-write stays consistent.
+#   2. A short-TTL process cache for brand profiles only — they are large and
+#      read on nearly every request. Invalidated on any brand write from this
+#      process; cross-instance staleness is bounded by BRAND_CACHE_TTL_S.
+#
+# Callers always receive deep copies, so mutating a returned dict never
+# leaks into the cache.
+
+_MISSING = object()
+_CLOSED = object()
+
+_request_cache: ContextVar[Optional[dict]] = ContextVar("firestore_request_cache", default=None)
+
+_brand_cache: dict[str, tuple[float, dict]] = {}
+
+
+@contextmanager
+def request_scope() -> Iterator[None]:
+    """Open a fresh identity map for the current task (and tasks it spawns)."""
+    cache: dict = {}
+    token = _request_cache.set(cache)
+    try:
+        yield
+    finally:
+        _request_cache.reset(token)
+        # Background tasks spawned during the request inherit this context;
+        # close the map so they don't keep serving request-era snapshots.
+        cache.clear()
+        cache[_CLOSED] = True
+
+
+def _scope_cache() -> Optional[dict]:
+    cache = _request_cache.get()
+    if cache is None or _CLOSED in cache:
+        return None
+    return cache
+
+
+def _cache_get(path: str):
+    """Return a copy of the cached doc, None for a known-missing doc, or _MISSING."""
+    cache = _scope_cache()
+    if cache is None or path not in cache:
+        return _MISSING
+    doc = cache[path]
+    return copy.deepcopy(doc) if doc is not None else None
+
+
+def _cache_put(path: str, doc: Optional[dict]) -> None:
+    cache = _scope_cache()
+    if cache is not None:
+        cache[path] = copy.deepcopy(doc) if doc is not None else None
+
+
+def _cache_merge(path: str, data: dict) -> None:
+    """Apply an update() payload to a cached doc; unknown docs stay unknown."""
+    cache = _scope_cache()
+    if cache is None or cache.get(path) is None:
+        return
+    if any("." in key for key in data):
+        # Dotted field paths can't be applied locally; re-read on next access
+        cache.pop(path, None)
+    else:
+        cache[path].update(copy.deepcopy(data))
+
+
+def _brand_cache_get(brand_id: str) -> Optional[dict]:
+    entry = _brand_cache.get(brand_id)
+    if entry is None:
+        return None
+    expires, doc = entry
+    if time.monotonic() > expires:
+        _brand_cache.pop(brand_id, None)
+        return None
+    return copy.deepcopy(doc)
+
+
+def _brand_cache_put(brand_id: str, doc: dict) -> None:
+    # Only settled brands are cached: the dashboard polls analysis_status every
+    # few seconds while analysis runs, possibly against another instance.
+    if BRAND_CACHE_TTL_S > 0 and doc.get("analysis_status") == "complete":
+        _brand_cache[brand_id] = (time.monotonic() + BRAND_CACHE_TTL_S, copy.deepcopy(doc))
+
+
+def invalidate_brand(brand_id: str) -> None:
+    """Drop a brand from the process cache (e.g. after an out-of-band write)."""
+    _brand_cache.pop(brand_id, None)
+
+
+_JOB_COLLECTIONS = ("video_jobs", "repurpose_jobs")
+
+
+def _note_write(op: str, path: str, data: Optional[dict] = None) -> None:
+    """Keep caches and job-event subscribers in sync with a write made here."""
+    if op == "delete":
+        _cache_put(path, None)
+    elif op == "set":
+        _cache_put(path, data)
+    else:
+        _cache_merge(path, data or {})
+    parts = path.split("/")
+    if len(parts) == 2 and parts[0] == "brands":
+        invalidate_brand(parts[1])
+    if len(parts) == 2 and parts[0] in _JOB_COLLECTIONS and op != "delete":
+        job_events.publish(parts[1], data or {})
+
+# ── Write coalescing ──────────────────────────────────────────
+
+# Firestore caps a single batch commit at 500 writes
+_MAX_BATCH_OPS = 500
+
+
+class WriteBatch:
+    """Unit of work that coalesces writes into as few Firestore commits as possible.
+
+    Field updates to the same document are merged into a single ``update``
+    (later keys win, matching sequential ``update_post`` calls), a ``set``
+    absorbs later updates to the same document, and a ``delete`` supersedes
+    anything queued before it. All queued writes are sent in one batch commit.
+
+    Use via :func:`batch`::
+
+        async with firestore_client.batch() as wb:
+            wb.save_review(brand_id, post_id, review)
+            wb.update_post(brand_id, post_id, {"status": "approved"})
+    """
+
+    def __init__(self) -> None:
+        self._db = get_client()
+        # doc path -> [op, doc_ref, data]; dict preserves first-queued order
+        self._ops: dict[str, list] = {}
+
+    def __len__(self) -> int:
+        return len(self._ops)
+
+    def _queue(self, op: str, ref, data: Optional[dict] = None) -> None:
+        key = ref.path
+        current = self._ops.get(key)
+        if op == "delete" or current is None or current[0] == "delete":
+            # A set after a delete recreates the doc; an update after a delete
+            # would fail at commit time exactly as it would unbatched.
+            self._ops[key] = [op, ref, dict(data or {})]
+            return
+        if op == "set":
+            current[0], current[2] = "set", dict(data or {})
+        else:
+            current[2].update(data or {})
+
+    # ── Post writes ──
+
+    def save_post(self, brand_id: str, plan_id: str, data: dict) -> str:
+        post_id = str(uuid.uuid4())
+        now = datetime.now(timezone.utc)
+        doc = {**data, "post_id": post_id, "brand_id": brand_id, "plan_id": plan_id,
+               "created_at": now, "updated_at": now}
+        self._queue("set", _post_ref(self._db, brand_id, post_id), doc)
+        return post_id
+
+    def update_post(self, brand_id: str, post_id: str, data: dict) -> None:
+        self._queue("update", _post_ref(self._db, brand_id, post_id), {
+            **data,
+            "updated_at": datetime.now(timezone.utc),
+        })
+
+    def save_review(self, brand_id: str, post_id: str, review: dict) -> None:
+        self.update_post(brand_id, post_id, {"review": review})
+
+    def delete_post(self, brand_id: str, post_id: str) -> None:
+        self._queue("delete", _post_ref(self._db, brand_id, post_id))
+
+    async def commit(self) -> None:
+        """Flush queued writes. Single-document units skip the batch wrapper."""
+        ops = list(self._ops.values())
+        self._ops.clear()
+        if not ops:
+            return
+        if len(ops) == 1:
+            op, ref, data = ops[0]
+            if op == "delete":
+                await ref.delete()
+            elif op == "set":
+                await ref.set(data)
+            else:
+                await ref.update(data)
+        else:
+            for i in range(0, len(ops), _MAX_BATCH_OPS):
+                wb = self._db.batch()
+                for op, ref, data in ops[i:i + _MAX_BATCH_OPS]:
+                    if op == "delete":
+                        wb.delete(ref)
+                    elif op == "set":
+                        wb.set(ref, data)
+                    else:
+                        wb.update(ref, data)
+                await wb.commit()
+        for op, ref, data in ops:
+            _note_write(op, ref.path, data)
+
+
+@asynccontextmanager
+async def batch() -> AsyncIterator[WriteBatch]:
+    """Open a :class:`WriteBatch`; commits on clean exit, discards on error."""
+    wb = WriteBatch()
+    yield wb
+    await wb.commit()
+
+
+def _post_ref(db: AsyncClient, brand_id: str, post_id: str):
+    return (db.collection("brands").document(brand_id)
+              .collection("posts").document(post_id))
+
 # ── Brand operations ──────────────────────────────────────────
 
 async def create_brand(data: dict) -> str:
@@ -34,9 +255,19 @@ async def create_brand(data: dict) -> str:
     return brand_id
 
 async def get_brand(brand_id: str) -> Optional[dict]:
-    db = get_client()
-    doc = await db.collection("brands").document(brand_id).get()
-    return doc.to_dict() if doc.exists else None
+    path = f"brands/{brand_id}"
+    cached = _cache_get(path)
+    if cached is not _MISSING:
+        return cached
+    brand = _brand_cache_get(brand_id)
+    if brand is None:
+        db = get_client()
+        doc = await db.collection("brands").document(brand_id).get()
+        brand = doc.to_dict() if doc.exists else None
+        if brand is not None:
+            _brand_cache_put(brand_id, brand)
+    _cache_put(path, brand)
+    return brand
 
 async def list_brands_by_owner(owner_uid: str) -> list:
     """Return all brands owned by a given anonymous UID, newest first."""
@@ -65,19 +296,23 @@ async def claim_brand(brand_id: str, owner_uid: str) -> bool:
     data = doc.to_dict()
     if data.get("owner_uid"):
         return data["owner_uid"] == owner_uid
-    await doc_ref.update({
+    update = {
         "owner_uid": owner_uid,
         "updated_at": datetime.now(timezone.utc),
-    })
+    }
+    await doc_ref.update(update)
+    _note_write("update", doc_ref.path, update)
     return True
 
 
 async def update_brand(brand_id: str, data: dict) -> None:
     db = get_client()
-    await db.collection("brands").document(brand_id).update({
+    update = {
         **data,
         "updated_at": datetime.now(timezone.utc),
-    })
+    }
+    await db.collection("brands").document(brand_id).update(update)
+    _note_write("update", f"brands/{brand_id}", update)
 
 async def remove_brand_asset(brand_id: str, asset_index: int) -> dict | None:
     """Remove an asset from uploaded_assets by index. Returns the removed asset or None."""
@@ -91,10 +326,12 @@ async def remove_brand_asset(brand_id: str, asset_index: int) -> dict | None:
     if asset_index < 0 or asset_index >= len(assets):
         return None
     removed = assets.pop(asset_index)
-    await doc_ref.update({
+    update = {
         "uploaded_assets": assets,
         "updated_at": datetime.now(timezone.utc),
-    })
+    }
+    await doc_ref.update(update)
+    _note_write("update", doc_ref.path, update)
     return removed
 
 # ── Content plan operations ───────────────────────────────────
@@ -117,27 +354,47 @@ async def list_plans(brand_id: str) -> list:
     return [d.to_dict() for d in docs]
 
 async def get_plan(plan_id: str, brand_id: str) -> Optional[dict]:
+    path = f"brands/{brand_id}/content_plans/{plan_id}"
+    cached = _cache_get(path)
+    if cached is not _MISSING:
+        return cached
     db = get_client()
-    # Try to find plan across all brands if brand_id not provided
     doc = await (db.collection("brands").document(brand_id)
                    .collection("content_plans").document(plan_id).get())
-    return doc.to_dict() if doc.exists else None
+    plan = doc.to_dict() if doc.exists else None
+    _cache_put(path, plan)
+    return plan
 
 async def update_plan(brand_id: str, plan_id: str, data: dict) -> None:
     db = get_client()
     await (db.collection("brands").document(brand_id)
              .collection("content_plans").document(plan_id).update(data))
+    _note_write("update", f"brands/{brand_id}/content_plans/{plan_id}", data)
 
 async def update_plan_day(brand_id: str, plan_id: str, day_index: int, data: dict) -> None:
+    """Merge ``data`` into one day of a plan.
+
+    ``days`` is rewritten as a whole, so the read-modify-write runs in a
+    transaction against the stored plan rather than a cached copy; a
+    concurrent edit to another day is retried over instead of overwritten.
+    """
     db = get_client()
-    plan_ref = (db.collection("brands").document(brand_id)
-                  .collection("content_plans").document(plan_id))
-    plan_doc = await plan_ref.get()
-    if plan_doc.exists:
-        days = plan_doc.to_dict().get("days", [])
-        if 0 <= day_index < len(days):
-            days[day_index].update(data)
-            await plan_ref.update({"days": days})
+    ref = (db.collection("brands").document(brand_id)
+             .collection("content_plans").document(plan_id))
+
+    @firestore.async_transactional
+    async def _update(tx) -> Optional[list]:
+        snap = await ref.get(transaction=tx)
+        days = (snap.to_dict() or {}).get("days", []) if snap.exists else []
+        if not 0 <= day_index < len(days):
+            return None
+        days[day_index].update(data)
+        tx.update(ref, {"days": days})
+        return days
+
+    days = await _update(db.transaction())
+    if days is not None:
+        _note_write("update", f"brands/{brand_id}/content_plans/{plan_id}", {"days": days})
 
 # ── Post operations ───────────────────────────────────────────
 
@@ -149,26 +406,202 @@ async def save_post(brand_id: str, plan_id: str, data: dict) -> str:
            "created_at": now, "updated_at": now}
     await (db.collection("brands").document(brand_id)
              .collection("posts").document(post_id).set(doc))
+    _note_write("set", f"brands/{brand_id}/posts/{post_id}", doc)
     return post_id
 
+def post_doc_id(plan_id: str, brief_index: int, platform: str) -> str:
+    """Deterministic post ID: one document per plan brief and platform."""
+    return f"{plan_id}_{brief_index}_{platform}"
+
+def post_media_uris(post: dict) -> list[str]:
+    """Every gs:// URI a post document references (masters, slides, renditions, video)."""
+    uris = [
+        post.get("image_gcs_uri"),
+        post.get("thumbnail_gcs_uri"),
+        post.get("original_image_gcs_uri"),
+        post.get("original_thumbnail_gcs_uri"),
+        (post.get("video") or {}).get("video_gcs_uri"),
+        *(post.get("image_gcs_uris") or []),
+    ]
+    for renditions in (post.get("image_renditions") or {}).values():
+        uris.extend((entry or {}).get("gcs_uri") for entry in (renditions or {}).values())
+    return list(dict.fromkeys(u for u in uris if isinstance(u, str) and u.startswith("gs://")))
+
+def _queue_media_cleanup(tx, db: AsyncClient, brand_id: str, post: dict) -> None:
+    uris = post_media_uris(post)
+    if uris:
+        tx.set(db.collection("media_cleanup").document(), {
+            "gcs_uris": uris,
+            "brand_id": brand_id,
+            "post_id": post.get("post_id"),
+            "version": post.get("version", 0),
+            "queued_at": datetime.now(timezone.utc),
+        })
+
+async def queue_media_cleanup(brand_id: str, post: dict) -> None:
+    """Queue a post's media for cleanup, e.g. output of a superseded generation."""
+    if not post_media_uris(post):
+        return
+    db = get_client()
+    wb = db.batch()
+    _queue_media_cleanup(wb, db, brand_id, post)
+    await wb.commit()
+
+# Collections whose documents may reference bucket media. media_cleanup is
+# left out on purpose: its entries are GC candidates, not references.
+_MEDIA_REFERENCE_COLLECTIONS = ("brands", "posts", "content_plans", "video_jobs", "repurpose_jobs")
+
+async def stream_media_reference_docs() -> AsyncIterator[dict]:
+    """Every document that may reference bucket media, for the media GC mark phase."""
+    db = get_client()
+    for name in _MEDIA_REFERENCE_COLLECTIONS:
+        async for snap in db.collection_group(name).stream():
+            yield snap.to_dict() or {}
+
+async def list_media_cleanup(queued_before: datetime) -> list[tuple[str, dict]]:
+    """Queued media_cleanup entries older than ``queued_before`` as (entry_id, doc)."""
+    db = get_client()
+    query = db.collection("media_cleanup").where(filter=FieldFilter("queued_at", "<", queued_before))
+    return [(snap.id, snap.to_dict() or {}) async for snap in query.stream()]
+
+async def delete_media_cleanup(entry_ids: list[str]) -> None:
+    db = get_client()
+    # Firestore batches hold at most 500 writes
+    for start in range(0, len(entry_ids), 500):
+        wb = db.batch()
+        for entry_id in entry_ids[start:start + 500]:
+            wb.delete(db.collection("media_cleanup").document(entry_id))
+        await wb.commit()
+
+async def upsert_generating_post(
+    brand_id: str, plan_id: str, brief_index: int, platform: str, data: dict,
+) -> tuple[str, int]:
+    """Reset a brief's post to a fresh "generating" version in one transaction.
+
+    The post lives at :func:`post_doc_id`, so regenerating a brief overwrites
+    it in place and concurrent regenerations can't leave duplicates — each
+    bumps ``version`` and only the newest may write results (see
+    :func:`update_post_if_version`). Media of the replaced version is queued
+    in ``media_cleanup``. UUID-keyed posts for the same brief, written before
+    deterministic IDs, are deleted the first time the brief is regenerated.
+
+    Returns (post_id, version).
+    """
+    db = get_client()
+    post_id = post_doc_id(plan_id, brief_index, platform)
+    ref = _post_ref(db, brand_id, post_id)
+    legacy_query = (
+        db.collection("brands").document(brand_id).collection("posts")
+        .where(filter=FieldFilter("plan_id", "==", plan_id))
+        .where(filter=FieldFilter("brief_index", "==", brief_index))
+    )
+
+    @firestore.async_transactional
+    async def _upsert(tx) -> tuple[dict, list[str]]:
+        snap = await ref.get(transaction=tx)
+        old = snap.to_dict() if snap.exists else None
+        legacy = []
+        if old is None:
+            legacy = [
+                d for d in await legacy_query.get(transaction=tx)
+                if d.id != post_id and (d.to_dict() or {}).get("platform", "") == platform
+            ]
+        now = datetime.now(timezone.utc)
+        doc = {
+            **data,
+            "post_id": post_id,
+            "brand_id": brand_id,
+            "plan_id": plan_id,
+            "brief_index": brief_index,
+            "platform": platform,
+            "version": int((old or {}).get("version", 0)) + 1,
+            "created_at": (old or {}).get("created_at", now),
+            "updated_at": now,
+        }
+        tx.set(ref, doc)
+        if old:
+            _queue_media_cleanup(tx, db, brand_id, old)
+        for d in legacy:
+            tx.delete(d.reference)
+            _queue_media_cleanup(tx, db, brand_id, d.to_dict() or {})
+        return doc, [d.id for d in legacy]
+
+    doc, legacy_ids = await _upsert(db.transaction())
+    _note_write("set", f"brands/{brand_id}/posts/{post_id}", doc)
+    for legacy_id in legacy_ids:
+        _note_write("delete", f"brands/{brand_id}/posts/{legacy_id}")
+    return post_id, doc["version"]
+
+async def update_posts_if_version(
+    brand_id: str, updates: list[tuple[str, int, dict]],
+) -> set[str]:
+    """Apply (post_id, version, data) updates in one transaction.
+
+    Each update applies only while its post is still at ``version``; posts a
+    newer regeneration has taken over are left alone. Returns the IDs of the
+    posts that were updated.
+    """
+    if not updates:
+        return set()
+    db = get_client()
+    now = datetime.now(timezone.utc)
+    refs = {post_id: _post_ref(db, brand_id, post_id) for post_id, _, _ in updates}
+
+    @firestore.async_transactional
+    async def _update(tx) -> set[str]:
+        versions = {
+            snap.id: (snap.to_dict() or {}).get("version", 0)
+            async for snap in db.get_all(list(refs.values()), transaction=tx)
+            if snap.exists
+        }
+        applied = set()
+        for post_id, version, data in updates:
+            if post_id in versions and versions[post_id] == version:
+                tx.update(refs[post_id], {**data, "updated_at": now})
+                applied.add(post_id)
+        return applied
+
+    applied = await _update(db.transaction())
+    for post_id, _, data in updates:
+        if post_id in applied:
+            _note_write("update", f"brands/{brand_id}/posts/{post_id}", {**data, "updated_at": now})
+    return applied
+
+async def update_post_if_version(brand_id: str, post_id: str, version: int, data: dict) -> bool:
+    """Apply an update only while the post is still at ``version``.
+
+    Returns False (and writes nothing) when a newer regeneration has taken
+    the post over. Posts written before versioning count as version 0.
+    """
+    return post_id in await update_posts_if_version(brand_id, [(post_id, version, data)])
+
 async def get_post(brand_id: str, post_id: str) -> Optional[dict]:
+    path = f"brands/{brand_id}/posts/{post_id}"
+    cached = _cache_get(path)
+    if cached is not _MISSING:
+        return cached
     db = get_client()
     doc = await (db.collection("brands").document(brand_id)
                    .collection("posts").document(post_id).get())
-    return doc.to_dict() if doc.exists else None
+    post = doc.to_dict() if doc.exists else None
+    _cache_put(path, post)
+    return post
 
 async def delete_post(brand_id: str, post_id: str) -> None:
     db = get_client()
     await (db.collection("brands").document(brand_id)
              .collection("posts").document(post_id).delete())
+    _note_write("delete", f"brands/{brand_id}/posts/{post_id}")
 
 async def update_post(brand_id: str, post_id: str, data: dict) -> None:
     db = get_client()
+    update = {
+        **data,
+        "updated_at": datetime.now(timezone.utc),
+    }
     await (db.collection("brands").document(brand_id)
-             .collection("posts").document(post_id).update({
-                 **data,
-                 "updated_at": datetime.now(timezone.utc),
-             }))
+             .collection("posts").document(post_id).update(update))
+    _note_write("update", f"brands/{brand_id}/posts/{post_id}", update)
 
 async def list_posts(brand_id: str, plan_id: Optional[str] = None) -> list:
     db = get_client()
@@ -176,28 +609,165 @@ async def list_posts(brand_id: str, plan_id: Optional[str] = None) -> list:
     if plan_id:
         ref = ref.where("plan_id", "==", plan_id)
     docs = await ref.get()
-    return [d.to_dict() for d in docs]
+    posts = [d.to_dict() for d in docs]
+    # Seed the identity map so follow-up get_post calls in this request are free
+    if _scope_cache() is not None:
+        for post in posts:
+            if post.get("post_id"):
+                _cache_put(f"brands/{brand_id}/posts/{post['post_id']}", post)
+    return posts
+
+# ── Hook index ────────────────────────────────────────────────
+# One document per brand holding near-duplicate signatures of its posts'
+# hooks under entries.{post_id} (see services/hook_index.py).
+
+def _hook_index_ref(db: AsyncClient, brand_id: str):
+    return (db.collection("brands").document(brand_id)
+              .collection("hook_index").document("main"))
+
+async def get_hook_index(brand_id: str) -> dict:
+    """``{post_id: entry}`` for a brand's hook index (empty if none yet)."""
+    snap = await _hook_index_ref(get_client(), brand_id).get()
+    if not snap.exists:
+        return {}
+    return (snap.to_dict() or {}).get("entries") or {}
+
+async def update_hook_index(brand_id: str, entries: dict, removed: Optional[list] = None) -> None:
+    """Merge ``entries`` into the hook index and drop the ``removed`` post IDs.
+
+    A field-level merge, so concurrent generations for one brand never
+    overwrite each other's entries.
+    """
+    changes = {**entries, **{post_id: firestore.DELETE_FIELD for post_id in removed or []}}
+    if not changes:
+        return
+    await _hook_index_ref(get_client(), brand_id).set(
+        {"entries": changes, "updated_at": datetime.now(timezone.utc)}, merge=True,
+    )
 
 # ── Video job operations ──────────────────────────────────────
 
-async def create_video_job(post_id: str, tier: str) -> str:
+async def create_video_job(
+    post_id: str, tier: str, brand_id: Optional[str] = None, post_version: int = 0,
+) -> str:
     db = get_client()
     job_id = str(uuid.uuid4())
     now = datetime.now(timezone.utc)
     await db.collection("video_jobs").document(job_id).set({
-        "job_id": job_id, "post_id": post_id, "tier": tier,
-        "status": "queued", "result": None, "error": None,
+        "job_id": job_id, "post_id": post_id, "brand_id": brand_id, "tier": tier,
+        "post_version": post_version,
+        "status": "queued", "result": None, "error": None, "veo_operation": None,
         "created_at": now, "updated_at": now,
     })
     return job_id
 
-async def update_video_job(job_id: str, status: str, result: Optional[dict] = None) -> None:
+async def set_video_job_operation(job_id: str, operation: dict) -> None:
+    """Record the in-flight Veo operation so another instance can resume it."""
     db = get_client()
-    await db.collection("video_jobs").document(job_id).update({
-        "status": status,
-        "result": result,
+    update = {
+        "veo_operation": {**operation, "started_at": datetime.now(timezone.utc)},
         "updated_at": datetime.now(timezone.utc),
-    })
+    }
+    await db.collection("video_jobs").document(job_id).update(update)
+    _note_write("update", f"video_jobs/{job_id}", update)
+
+async def list_resumable_video_jobs() -> list:
+    """Video jobs still generating with a recorded Veo operation."""
+    db = get_client()
+    docs = await (db.collection("video_jobs")
+                    .where(filter=FieldFilter("status", "==", "generating"))
+                    .get())
+    jobs = [d.to_dict() for d in docs]
+    return [j for j in jobs if j.get("veo_operation")]
+
+# Video job leases: the instance driving a job (``resumed_by``) renews
+# ``lease_until`` while it polls Veo; another instance may only take the job
+# over once the lease has lapsed.
+VIDEO_JOB_LEASE_S = 120
+
+async def claim_video_job(job_id: str, owner: str, lease_s: float = VIDEO_JOB_LEASE_S) -> bool:
+    """Take or renew the lease on a queued or generating video job.
+
+    Returns False when the job has finished or another instance holds a
+    live lease.
+    """
+    db = get_client()
+    ref = db.collection("video_jobs").document(job_id)
+
+    @firestore.async_transactional
+    async def _claim(tx) -> Optional[dict]:
+        snap = await ref.get(transaction=tx)
+        job = snap.to_dict() if snap.exists else None
+        if not job or job.get("status") not in ("queued", "generating"):
+            return None
+        now = datetime.now(timezone.utc)
+        lease = job.get("lease_until")
+        if job.get("resumed_by") not in (None, owner) and isinstance(lease, datetime) and lease > now:
+            return None
+        update = {
+            "status": "generating",
+            "resumed_by": owner,
+            "lease_until": now + timedelta(seconds=lease_s),
+            "updated_at": now,
+        }
+        tx.update(ref, update)
+        return update
+
+    update = await _claim(db.transaction())
+    if update is None:
+        return False
+    _note_write("update", f"video_jobs/{job_id}", update)
+    return True
+
+async def finish_video_job(
+    job_id: str,
+    owner: str,
+    status: str,
+    result: Optional[dict] = None,
+    brand_id: Optional[str] = None,
+    post_id: Optional[str] = None,
+    post_data: Optional[dict] = None,
+    post_version: Optional[int] = None,
+) -> Optional[str]:
+    """Record a video job's outcome, with its post update, under ``owner``'s claim.
+
+    When ``post_version`` is given and the post has since been regenerated,
+    the post is left alone and the job fails as superseded. Returns the job
+    status written, or None (writing nothing) when the job is no longer
+    generating or another instance has taken it over.
+    """
+    db = get_client()
+    ref = db.collection("video_jobs").document(job_id)
+    now = datetime.now(timezone.utc)
+    post_ref = _post_ref(db, brand_id, post_id) if post_data is not None else None
+    post_update = {**(post_data or {}), "updated_at": now}
+
+    @firestore.async_transactional
+    async def _finish(tx) -> Optional[dict]:
+        snap = await ref.get(transaction=tx)
+        job = snap.to_dict() if snap.exists else None
+        if not job or job.get("status") != "generating" or job.get("resumed_by") != owner:
+            return None
+        update = {"status": status, "result": result, "lease_until": None, "updated_at": now}
+        if post_ref is not None:
+            post_snap = await post_ref.get(transaction=tx)
+            current = post_snap.to_dict() if post_snap.exists else None
+            if current is None or (
+                post_version is not None and current.get("version", 0) != post_version
+            ):
+                update.update(status="failed", result={"error": "Post was regenerated before the video finished"})
+            else:
+                tx.update(post_ref, post_update)
+        tx.update(ref, update)
+        return update
+
+    update = await _finish(db.transaction())
+    if update is None:
+        return None
+    _note_write("update", f"video_jobs/{job_id}", update)
+    if post_ref is not None and update["status"] == status:
+        _note_write("update", f"brands/{brand_id}/posts/{post_id}", post_update)
+    return update["status"]
 
 async def get_video_job(job_id: str) -> Optional[dict]:
     db = get_client()
@@ -243,6 +813,7 @@ async def update_repurpose_job(
     if status == "complete":
         payload["completed_at"] = now
     await db.collection("repurpose_jobs").document(job_id).update(payload)
+    _note_write("update", f"repurpose_jobs/{job_id}", payload)
 
 
 async def get_repurpose_job(job_id: str) -> Optional[dict]:
@@ -252,12 +823,7 @@ async def get_repurpose_job(job_id: str) -> Optional[dict]:
 
 
 async def save_review(brand_id: str, post_id: str, review: dict) -> None:
-    db = get_client()
-    await (db.collection("brands").document(brand_id)
-             .collection("posts").document(post_id).update({
-                 "review": review,
-                 "updated_at": datetime.now(timezone.utc),
-             }))
+    await update_post(brand_id, post_id, {"review": review})
 
 
 # ── Platform trends cache ──────────────────────────────────────
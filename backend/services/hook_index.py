@@ -0,0 +1,217 @@
+"""Per-brand near-duplicate index of post hooks and captions.
+
+Each completed post contributes MinHash signatures of its hook (first line)
+and of the start of its caption, stored in one Firestore document per brand.
+Generation loads the index once and uses it to:
+
+  * list only the top-k indexed hooks most similar to the day's brief in the
+    prompt, so the dedup block stays the same size however long the brand's
+    history grows;
+  * flag a generated caption that nearly repeats any earlier post, from any
+    plan, before it is reviewed.
+
+Signatures are 64 32-bit minimums over character 5-gram shingles; the share
+of matching slots estimates the Jaccard similarity of the shingle sets.
+"""
+
+import logging
+import random
+import re
+import zlib
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from backend.config import HOOK_DUPLICATE_THRESHOLD, HOOK_INDEX_MAX_ENTRIES
+from backend.services import firestore_client
+
+logger = logging.getLogger(__name__)
+
+_NUM_PERM = 64
+_SHINGLE_CHARS = 5
+# Captions are compared on their opening, where repeats matter most
+_CAPTION_CHARS = 600
+_HOOK_CHARS = 120
+
+_PRIME = (1 << 61) - 1
+_MASK32 = 0xFFFFFFFF
+# Fixed seed: signatures are persisted and must stay comparable across processes
+_rng = random.Random(0x5EED)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(_NUM_PERM)]
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+_SLIDE_LABEL_RE = re.compile(r"^\s*(?:slide\s*\d+\s*[:\-–]|\d+[/)])\s*", re.IGNORECASE)
+
+
+def hook_of(caption: str) -> str:
+    """First non-empty line of a caption, without a slide/thread label."""
+    for line in caption.split("\n"):
+        line = _SLIDE_LABEL_RE.sub("", line).strip()
+        if line:
+            return line[:_HOOK_CHARS]
+    return ""
+
+
+def signature(text: str) -> bytes:
+    """MinHash signature of ``text`` (empty for text with no words)."""
+    norm = _NON_WORD_RE.sub(" ", text.lower()).strip()
+    if not norm:
+        return b""
+    if len(norm) <= _SHINGLE_CHARS:
+        shingles = {zlib.crc32(norm.encode())}
+    else:
+        shingles = {
+            zlib.crc32(norm[i:i + _SHINGLE_CHARS].encode())
+            for i in range(len(norm) - _SHINGLE_CHARS + 1)
+        }
+    return array("I", (
+        min(((a * h + b) % _PRIME) & _MASK32 for h in shingles)
+        for a, b in _PERMS
+    )).tobytes()
+
+
+def similarity(a: bytes, b: bytes) -> float:
+    """Estimated Jaccard similarity of two signatures (0.0 if either is empty)."""
+    if not a or len(a) != len(b):
+        return 0.0
+    sa, sb = array("I"), array("I")
+    sa.frombytes(a)
+    sb.frombytes(b)
+    return sum(x == y for x, y in zip(sa, sb)) / len(sa)
+
+
+@dataclass
+class HookEntry:
+    post_id: str
+    hook: str
+    hook_sig: bytes
+    caption_sig: bytes
+    created_at: float
+    plan_id: Optional[str] = None
+    platform: Optional[str] = None
+
+    def to_doc(self) -> dict:
+        return {
+            "hook": self.hook,
+            "hook_sig": self.hook_sig,
+            "caption_sig": self.caption_sig,
+            "created_at": datetime.fromtimestamp(self.created_at, timezone.utc),
+            "plan_id": self.plan_id,
+            "platform": self.platform,
+        }
+
+    @classmethod
+    def from_doc(cls, post_id: str, doc: dict) -> "HookEntry":
+        created = doc.get("created_at")
+        return cls(
+            post_id=post_id,
+            hook=doc.get("hook", ""),
+            hook_sig=bytes(doc.get("hook_sig") or b""),
+            caption_sig=bytes(doc.get("caption_sig") or b""),
+            created_at=created.timestamp() if isinstance(created, datetime) else 0.0,
+            plan_id=doc.get("plan_id"),
+            platform=doc.get("platform"),
+        )
+
+
+def build_entry(
+    post_id: str,
+    caption: str,
+    plan_id: Optional[str] = None,
+    platform: Optional[str] = None,
+    created_at: Optional[datetime] = None,
+) -> HookEntry:
+    hook = hook_of(caption)
+    return HookEntry(
+        post_id=post_id,
+        hook=hook,
+        hook_sig=signature(hook),
+        caption_sig=signature(caption[:_CAPTION_CHARS]),
+        created_at=(
+            created_at if isinstance(created_at, datetime) else datetime.now(timezone.utc)
+        ).timestamp(),
+        plan_id=plan_id,
+        platform=platform,
+    )
+
+
+class HookIndex:
+    """A brand's indexed hooks, loaded once per generation."""
+
+    def __init__(self, brand_id: str, entries: dict[str, HookEntry]) -> None:
+        self.brand_id = brand_id
+        self.entries = entries
+
+    def __contains__(self, post_id: str) -> bool:
+        return post_id in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, entry: HookEntry) -> None:
+        self.entries[entry.post_id] = entry
+
+    def discard(self, post_ids: Iterable[str]) -> None:
+        for post_id in post_ids:
+            self.entries.pop(post_id, None)
+
+    def similar_hooks(self, query: str, k: int) -> list[str]:
+        """Up to ``k`` indexed hooks most similar to ``query``, newest first on ties."""
+        query_sig = signature(query) if query else b""
+        ranked = sorted(
+            (e for e in self.entries.values() if e.hook),
+            key=lambda e: (similarity(query_sig, e.hook_sig), e.created_at),
+            reverse=True,
+        )
+        return [e.hook for e in ranked[:k]]
+
+    def near_duplicate(self, caption: str) -> Optional[tuple[HookEntry, float]]:
+        """Most similar indexed post if it reaches HOOK_DUPLICATE_THRESHOLD."""
+        hook_sig = signature(hook_of(caption))
+        caption_sig = signature(caption[:_CAPTION_CHARS])
+        best: Optional[tuple[HookEntry, float]] = None
+        for entry in self.entries.values():
+            score = max(similarity(hook_sig, entry.hook_sig), similarity(caption_sig, entry.caption_sig))
+            if best is None or score > best[1]:
+                best = (entry, score)
+        if best is not None and best[1] >= HOOK_DUPLICATE_THRESHOLD:
+            return best
+        return None
+
+
+async def load(brand_id: str) -> HookIndex:
+    """Read a brand's hook index, trimming it to HOOK_INDEX_MAX_ENTRIES newest."""
+    docs = await firestore_client.get_hook_index(brand_id)
+    entries = {
+        post_id: HookEntry.from_doc(post_id, doc)
+        for post_id, doc in docs.items()
+        if isinstance(doc, dict)
+    }
+    surplus = len(entries) - HOOK_INDEX_MAX_ENTRIES
+    if surplus > 0:
+        oldest = sorted(entries.values(), key=lambda e: e.created_at)[:surplus]
+        removed = [e.post_id for e in oldest]
+        for post_id in removed:
+            del entries[post_id]
+        try:
+            await firestore_client.update_hook_index(brand_id, {}, removed=removed)
+        except Exception as e:
+            logger.warning("Hook index trim failed for brand %s: %s", brand_id, e)
+    return HookIndex(brand_id, entries)
+
+
+async def save(brand_id: str, entries: Iterable[HookEntry], removed: Optional[list[str]] = None) -> None:
+    """Persist new or replaced entries and remove deleted posts."""
+    await firestore_client.update_hook_index(
+        brand_id, {e.post_id: e.to_doc() for e in entries}, removed=removed,
+    )
+
+
+async def record(
+    brand_id: str, post_id: str, caption: str,
+    plan_id: Optional[str] = None, platform: Optional[str] = None,
+) -> None:
+    """Index a completed post's hook and caption."""
+    if caption.strip():
+        await save(brand_id, [build_entry(post_id, caption, plan_id, platform)])
@@ -0,0 +1,38 @@
+"""In-process pub/sub for background job status changes.
+
+firestore_client publishes every write to video_jobs / repurpose_jobs here, so
+SSE subscribers in the same process see transitions immediately instead of
+polling Firestore. Jobs running on another instance are still picked up by the
+subscriber's periodic resync read.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+# job_id -> queues of partial job updates, one per open subscription
+_subscribers: dict[str, set[asyncio.Queue]] = {}
+
+
+def publish(job_id: str, changes: dict) -> None:
+    """Fan a partial job update out to every subscriber of ``job_id``."""
+    for queue in _subscribers.get(job_id, ()):
+        queue.put_nowait(dict(changes))
+
+
+@asynccontextmanager
+async def subscribe(job_id: str) -> AsyncIterator[asyncio.Queue]:
+    """Receive partial updates for ``job_id`` for the lifetime of the block."""
+    queue: asyncio.Queue = asyncio.Queue()
+    _subscribers.setdefault(job_id, set()).add(queue)
+    try:
+        yield queue
+    finally:
+        subs = _subscribers.get(job_id)
+        if subs is not None:
+            subs.discard(queue)
+            if not subs:
+                _subscribers.pop(job_id, None)
@@ -0,0 +1,198 @@
+"""Process-local cache for GCS media: small objects in memory, the rest on disk.
+
+Entries are keyed by gs:// URI and remember the object generation they were
+read at. Objects under the generated/uploaded prefixes are never overwritten
+(every write gets a fresh random name), so a URI hit is served as-is. Other
+paths (e.g. brand assets uploaded under their original filename) are checked
+against the live generation before a hit is trusted.
+
+An object lives in one tier at a time. Both tiers are LRU with byte budgets
+from config. The disk tier is wiped on first use, since its index lives in
+memory.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+from collections import OrderedDict
+from typing import Optional
+
+from backend.config import (
+    MEDIA_CACHE_DIR,
+    MEDIA_CACHE_DISK_BYTES,
+    MEDIA_CACHE_MEMORY_BYTES,
+    MEDIA_CACHE_MAX_MEMORY_ITEM_BYTES,
+)
+
+logger = logging.getLogger(__name__)
+
+# Blob prefixes whose objects are write-once
+_IMMUTABLE_PREFIXES = ("generated/", "byop/", "repurpose/", "posts/", "renditions/")
+
+# uri -> (generation, bytes)
+_memory: "OrderedDict[str, tuple[Optional[int], bytes]]" = OrderedDict()
+_memory_bytes = 0
+
+# uri -> (generation, local path, size)
+_disk: "OrderedDict[str, tuple[Optional[int], str, int]]" = OrderedDict()
+_disk_bytes = 0
+_disk_ready = False
+
+# Single-flight: concurrent misses on one URI share a download
+_inflight: dict[str, asyncio.Future] = {}
+
+
+def is_immutable(blob_path: str) -> bool:
+    return blob_path.startswith(_IMMUTABLE_PREFIXES)
+
+
+def _ensure_disk() -> None:
+    global _disk_ready
+    if not _disk_ready:
+        shutil.rmtree(MEDIA_CACHE_DIR, ignore_errors=True)
+        os.makedirs(MEDIA_CACHE_DIR, exist_ok=True)
+        _disk_ready = True
+
+
+def _disk_path(uri: str, generation: Optional[int]) -> str:
+    digest = hashlib.sha256(uri.encode()).hexdigest()[:32]
+    return os.path.join(MEDIA_CACHE_DIR, f"{digest}_{generation or 0}")
+
+
+def _matches(cached_generation: Optional[int], generation: Optional[int]) -> bool:
+    return generation is None or cached_generation == generation
+
+
+def get_memory(uri: str, generation: Optional[int] = None) -> Optional[bytes]:
+    entry = _memory.get(uri)
+    if entry is None or not _matches(entry[0], generation):
+        return None
+    _memory.move_to_end(uri)
+    return entry[1]
+
+
+def get_disk_path(uri: str, generation: Optional[int] = None) -> Optional[str]:
+    entry = _disk.get(uri)
+    if entry is None or not _matches(entry[0], generation):
+        return None
+    if not os.path.exists(entry[1]):
+        _drop_disk(uri)
+        return None
+    _disk.move_to_end(uri)
+    return entry[1]
+
+
+def put_memory(uri: str, generation: Optional[int], data: bytes) -> None:
+    global _memory_bytes
+    if len(data) > MEDIA_CACHE_MAX_MEMORY_ITEM_BYTES or MEDIA_CACHE_MEMORY_BYTES <= 0:
+        return
+    old = _memory.pop(uri, None)
+    if old is not None:
+        _memory_bytes -= len(old[1])
+    _memory[uri] = (generation, data)
+    _memory_bytes += len(data)
+    while _memory_bytes > MEDIA_CACHE_MEMORY_BYTES and _memory:
+        _, (_, evicted) = _memory.popitem(last=False)
+        _memory_bytes -= len(evicted)
+
+
+def _drop_disk(uri: str) -> None:
+    global _disk_bytes
+    entry = _disk.pop(uri, None)
+    if entry is not None:
+        _disk_bytes -= entry[2]
+        try:
+            os.remove(entry[1])
+        except OSError:
+            pass
+
+
+def _index_disk(uri: str, generation: Optional[int], path: str) -> None:
+    global _disk_bytes
+    old = _disk.get(uri)
+    if old is not None and old[1] != path:
+        _drop_disk(uri)
+    elif old is not None:
+        # Same file rewritten in place: forget the old size, keep the file
+        del _disk[uri]
+        _disk_bytes -= old[2]
+    size = os.path.getsize(path)
+    _disk[uri] = (generation, path, size)
+    _disk_bytes += size
+    # Unlinking a file another request is still streaming is safe on POSIX
+    while _disk_bytes > MEDIA_CACHE_DISK_BYTES and len(_disk) > 1:
+        _drop_disk(next(iter(_disk)))
+
+
+def put_disk(uri: str, generation: Optional[int], data: bytes) -> None:
+    """Write bytes into the disk tier (e.g. right after uploading them)."""
+    if MEDIA_CACHE_DISK_BYTES <= 0:
+        return
+    _ensure_disk()
+    path = _disk_path(uri, generation)
+    tmp = f"{path}.part"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    _index_disk(uri, generation, path)
+
+
+def fits_memory(data: bytes) -> bool:
+    return 0 < len(data) <= MEDIA_CACHE_MAX_MEMORY_ITEM_BYTES and MEDIA_CACHE_MEMORY_BYTES > 0
+
+
+def put(uri: str, generation: Optional[int], data: bytes) -> None:
+    """Seed the cache with an object's bytes: memory if small enough, else disk."""
+    if fits_memory(data):
+        put_memory(uri, generation, data)
+        return
+    try:
+        put_disk(uri, generation, data)
+    except OSError as e:
+        logger.warning("media_cache: could not write %s to disk: %s", uri, e)
+
+
+def promote(uri: str, generation: Optional[int], data: bytes) -> None:
+    """Move an object read from the disk tier into memory.
+
+    The tiers hold disjoint objects, so the disk copy is dropped once the
+    bytes are in memory (on Cloud Run both tiers are RAM).
+    """
+    if fits_memory(data):
+        put_memory(uri, generation, data)
+        _drop_disk(uri)
+
+
+async def fetch_to_disk(uri: str, generation: Optional[int], download) -> str:
+    """Return a local path for ``uri``, downloading it on a miss.
+
+    ``download(dest_path)`` is an async callable that writes the object to
+    ``dest_path``. Concurrent misses for the same URI share one download.
+    """
+    path = get_disk_path(uri, generation)
+    if path is not None:
+        return path
+    pending = _inflight.get(uri)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[uri] = future
+    try:
+        _ensure_disk()
+        path = _disk_path(uri, generation)
+        tmp = f"{path}.part"
+        await download(tmp)
+        os.replace(tmp, path)
+        _index_disk(uri, generation, path)
+        future.set_result(path)
+        return path
+    except BaseException as e:
+        future.set_exception(e)
+        # Waiters receive the error; don't warn if nobody was waiting
+        future.exception()
+        raise
+    finally:
+        _inflight.pop(uri, None)
@@ -0,0 +1,254 @@
+"""Mark-and-sweep garbage collection for bucket media.
+
+Regenerations, image and video edits, repurpose uploads and style-reference
+re-runs all write fresh objects and leave the ones they replace behind.
+
+Sweep candidates are the objects named in the ``media_cleanup`` queue
+(written when a regeneration replaces a post) and, unless ``queue_only``,
+every object listed under MEDIA_GC_PREFIXES. Candidates are enumerated first
+and marked second: everything referenced by a brand, post, content plan,
+video job or repurpose job — as a gs:// URI, signed URL or storage proxy path,
+anywhere in the document — is kept. A remaining object is collected once it
+is older than MEDIA_GC_GRACE_HOURS, so uploads whose Firestore write hasn't
+landed yet survive. Collecting deletes the object, or rewrites it to a colder
+storage class when ``tier_down`` is set.
+
+Runs are dry by default; see scripts/gc_media.py.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+from urllib.parse import unquote
+
+from google.api_core.exceptions import NotFound
+from google.cloud.storage.batch import Batch
+
+from backend.config import (
+    GCS_BUCKET_NAME,
+    MEDIA_GC_BATCH_SIZE,
+    MEDIA_GC_GRACE_HOURS,
+    MEDIA_GC_MAX_OPS_PER_S,
+    MEDIA_GC_PREFIXES,
+)
+from backend.services import firestore_client
+from backend.services.storage_client import get_bucket, get_storage_client
+
+logger = logging.getLogger(__name__)
+
+_bucket_re = re.escape(GCS_BUCKET_NAME)
+_REFERENCE_RE = re.compile(
+    rf"(?:gs://{_bucket_re}/"
+    rf"|https://storage\.googleapis\.com/{_bucket_re}/"
+    rf"|https://{_bucket_re}\.storage\.googleapis\.com/"
+    r"|/api/storage/serve/)"
+    r"([^?#\s\"']+)"
+)
+_GS_PREFIX = f"gs://{GCS_BUCKET_NAME}/"
+
+# Object names listed in a dry run's report
+_SAMPLE_SIZE = 20
+
+
+@dataclass
+class _Object:
+    name: str
+    created: Optional[datetime] = None
+    size: int = 0
+    storage_class: Optional[str] = None
+
+
+@dataclass
+class GCStats:
+    queue_entries: int = 0
+    listed: int = 0
+    referenced: int = 0
+    too_young: int = 0
+    collected: int = 0
+    collected_bytes: int = 0
+    failed: int = 0
+    sample: list[str] = field(default_factory=list)
+
+
+def _collect_references(value, found: set[str]) -> None:
+    if isinstance(value, str):
+        for match in _REFERENCE_RE.finditer(value):
+            found.add(unquote(match.group(1)))
+    elif isinstance(value, dict):
+        for item in value.values():
+            _collect_references(item, found)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _collect_references(item, found)
+
+
+async def mark() -> set[str]:
+    """Object names referenced from Firestore."""
+    found: set[str] = set()
+    docs = 0
+    async for doc in firestore_client.stream_media_reference_docs():
+        _collect_references(doc, found)
+        docs += 1
+    logger.info("Media GC mark: %d objects referenced by %d documents", len(found), docs)
+    return found
+
+
+def _list_objects(prefixes: list[str]) -> list[_Object]:
+    objects = []
+    for prefix in prefixes:
+        for blob in get_storage_client().list_blobs(
+            GCS_BUCKET_NAME, prefix=prefix,
+            fields="items(name,timeCreated,size,storageClass),nextPageToken",
+        ):
+            objects.append(_Object(blob.name, blob.time_created, int(blob.size or 0), blob.storage_class))
+    return objects
+
+
+class _ResponseBatch(Batch):
+    """A storage Batch that keeps the per-request responses from ``finish()``."""
+
+    responses: list = []
+
+    def finish(self, raise_exception: bool = True):
+        self.responses = super().finish(raise_exception=False)
+        return self.responses
+
+
+def _delete_chunk(names: list[str]) -> list[str]:
+    """Delete ``names`` in one batch request; returns the names now gone."""
+    bucket = get_bucket()
+    batch = _ResponseBatch(get_storage_client())
+    with batch:
+        for name in names:
+            bucket.blob(name).delete()
+    removed = []
+    for name, response in zip(names, batch.responses):
+        # 404: deleted by someone else already, which is just as good
+        if 200 <= response.status_code < 300 or response.status_code == 404:
+            removed.append(name)
+        else:
+            logger.warning("Media GC could not delete %s: HTTP %d", name, response.status_code)
+    return removed
+
+
+def _tier_down_chunk(names: list[str], storage_class: str) -> list[str]:
+    """Rewrite ``names`` to ``storage_class``; returns the names handled."""
+    bucket = get_bucket()
+    moved = []
+    for name in names:
+        try:
+            bucket.blob(name).update_storage_class(storage_class)
+        except NotFound:
+            pass
+        except Exception as e:
+            logger.warning("Media GC could not tier down %s: %s", name, e)
+            continue
+        moved.append(name)
+    return moved
+
+
+async def _run_throttled(
+    names: list[str], op: Callable[[list[str]], list[str]], ops_per_s: float,
+) -> set[str]:
+    """Apply ``op`` to ``names`` in batches, at most ``ops_per_s`` objects per second.
+
+    Returns the names ``op`` reported as done.
+    """
+    done: set[str] = set()
+    for start in range(0, len(names), MEDIA_GC_BATCH_SIZE):
+        chunk = names[start:start + MEDIA_GC_BATCH_SIZE]
+        began = time.monotonic()
+        try:
+            done.update(await asyncio.to_thread(op, chunk))
+        except Exception as e:
+            logger.warning("Media GC batch of %d objects failed: %s", len(chunk), e)
+        pause = len(chunk) / ops_per_s - (time.monotonic() - began)
+        if pause > 0:
+            await asyncio.sleep(pause)
+    return done
+
+
+async def collect(
+    dry_run: bool = True,
+    queue_only: bool = False,
+    tier_down: Optional[str] = None,
+    grace_hours: float = MEDIA_GC_GRACE_HOURS,
+    ops_per_s: float = MEDIA_GC_MAX_OPS_PER_S,
+    prefixes: Optional[list[str]] = None,
+) -> GCStats:
+    """Run one mark-and-sweep pass and report what was (or would be) collected."""
+    stats = GCStats()
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=grace_hours)
+
+    # Queued media is at least as old as its entry, so the entry's age
+    # stands in for the grace check
+    queued = await firestore_client.list_media_cleanup(cutoff)
+    stats.queue_entries = len(queued)
+    queued_names: dict[str, list[str]] = {}
+    candidates: dict[str, _Object] = {}
+    for entry_id, entry in queued:
+        names = queued_names.setdefault(entry_id, [])
+        for uri in entry.get("gcs_uris") or []:
+            if isinstance(uri, str) and uri.startswith(_GS_PREFIX):
+                name = uri[len(_GS_PREFIX):]
+                names.append(name)
+                candidates[name] = _Object(name)
+
+    if not queue_only:
+        listed = await asyncio.to_thread(_list_objects, prefixes or MEDIA_GC_PREFIXES)
+        stats.listed = len(listed)
+        for obj in listed:
+            if obj.created is None or obj.created >= cutoff:
+                stats.too_young += 1
+                candidates.pop(obj.name, None)
+            else:
+                candidates[obj.name] = obj
+
+    # Mark after enumerating, so a reference written mid-run is still seen
+    referenced = await mark()
+    # Candidates that need no action: still referenced, or already tiered down
+    settled: set[str] = set()
+    garbage = []
+    for name, obj in candidates.items():
+        if name in referenced:
+            stats.referenced += 1
+            settled.add(name)
+        elif tier_down and obj.storage_class == tier_down:
+            settled.add(name)
+        else:
+            garbage.append(obj)
+    garbage.sort(key=lambda o: o.name)
+    stats.sample = [o.name for o in garbage[:_SAMPLE_SIZE]]
+    action = f"moved to {tier_down}" if tier_down else "deleted"
+
+    if dry_run:
+        stats.collected = len(garbage)
+        stats.collected_bytes = sum(o.size for o in garbage)
+        logger.info("Media GC dry run: %d objects (%d bytes) would be %s",
+                    stats.collected, stats.collected_bytes, action)
+        return stats
+
+    names = [o.name for o in garbage]
+    if tier_down:
+        done = await _run_throttled(names, lambda chunk: _tier_down_chunk(chunk, tier_down), ops_per_s)
+    else:
+        done = await _run_throttled(names, _delete_chunk, ops_per_s)
+    stats.collected = len(done)
+    stats.collected_bytes = sum(o.size for o in garbage if o.name in done)
+    stats.failed = len(garbage) - len(done)
+
+    # Keep an entry queued until every object it names has been dealt with,
+    # so a failed or still-young object gets another pass
+    settled |= done
+    finished = [
+        entry_id for entry_id, entry_names in queued_names.items()
+        if all(name in settled for name in entry_names)
+    ]
+    await firestore_client.delete_media_cleanup(finished)
+    logger.info("Media GC: %d objects %s, %d failed, %d of %d queue entries cleared",
+                stats.collected, action, stats.failed, len(finished), len(queued))
+    return stats
@@ -0,0 +1,150 @@
+"""Compact renditions for generated images.
+
+Gemini returns large lossless PNGs. The master is stored untouched (edits and
+resets work from it), and alongside it we store platform-sized WebP and JPEG
+renditions cropped to the platform aspect ratio, plus small WebP thumbnails
+for grid views. Posts record the renditions under ``image_renditions`` keyed
+by master gs:// URI; list views and exports use the compact variants.
+"""
+
+import asyncio
+import io
+import logging
+from typing import Optional
+
+from PIL import Image
+
+from backend.config import GCS_BUCKET_NAME
+from backend.services.storage_client import upload_image_to_gcs, upload_rendition
+
+logger = logging.getLogger(__name__)
+
+# Target width per orientation; never upscaled beyond the master
+_PORTRAIT_WIDTH = 1080
+_LANDSCAPE_WIDTH = 1200
+
+# Grid/card thumbnail widths (WebP, same crop as the renditions)
+THUMBNAIL_SIZES = (256, 512)
+
+# format key -> (PIL format, mime type, file extension, save options)
+_FORMATS: dict[str, tuple[str, str, str, dict]] = {
+    "webp": ("WEBP", "image/webp", "webp", {"quality": 82, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", "jpg", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+
+def parse_aspect(aspect: str) -> float:
+    """'4:5' -> 0.8, '1.91:1' -> 1.91. Falls back to square on bad input."""
+    try:
+        w, h = aspect.split(":", 1)
+        ratio = float(w) / float(h)
+        return ratio if ratio > 0 else 1.0
+    except (ValueError, ZeroDivisionError):
+        return 1.0
+
+
+def _render(image_bytes: bytes, aspect: str) -> dict[str, tuple[bytes, int, int]]:
+    """Center-crop to ``aspect``, downscale, and encode each rendition format."""
+    img = Image.open(io.BytesIO(image_bytes))
+    img.load()
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+
+    ratio = parse_aspect(aspect)
+    w, h = img.size
+    if w / h > ratio:
+        crop_w = round(h * ratio)
+        left = (w - crop_w) // 2
+        img = img.crop((left, 0, left + crop_w, h))
+    elif w / h < ratio:
+        crop_h = round(w / ratio)
+        top = (h - crop_h) // 2
+        img = img.crop((0, top, w, top + crop_h))
+
+    target_w = min(img.width, _LANDSCAPE_WIDTH if ratio > 1 else _PORTRAIT_WIDTH)
+    if target_w < img.width:
+        img = img.resize((target_w, round(target_w / ratio)), Image.LANCZOS)
+
+    out: dict[str, tuple[bytes, int, int]] = {}
+    for key, (fmt, _, _, opts) in _FORMATS.items():
+        frame = img.convert("RGB") if fmt == "JPEG" and img.mode != "RGB" else img
+        buf = io.BytesIO()
+        frame.save(buf, format=fmt, **opts)
+        out[key] = (buf.getvalue(), img.width, img.height)
+
+    webp_opts = _FORMATS["webp"][3]
+    for size in THUMBNAIL_SIZES:
+        if size >= img.width:
+            thumb = img
+        else:
+            thumb = img.resize((size, max(1, round(size / ratio))), Image.LANCZOS)
+        buf = io.BytesIO()
+        thumb.save(buf, format="WEBP", **webp_opts)
+        out[f"thumb_{size}"] = (buf.getvalue(), thumb.width, thumb.height)
+    return out
+
+
+async def create_renditions(master_gcs_uri: str, image_bytes: bytes, aspect: str) -> dict:
+    """Encode and upload renditions for a stored master image.
+
+    Returns ``{"webp": {...}, "jpeg": {...}, "thumb_256": {...}, "thumb_512": {...}}``
+    where each entry has gcs_uri, width, height and bytes. Returns {} if
+    encoding fails — renditions are an optimization, never a reason to fail
+    generation.
+    """
+    try:
+        rendered = await asyncio.to_thread(_render, image_bytes, aspect)
+    except Exception as e:
+        logger.warning("Rendition encode failed for %s: %s", master_gcs_uri, e)
+        return {}
+
+    master_path = master_gcs_uri.replace(f"gs://{GCS_BUCKET_NAME}/", "")
+    stem = master_path.rsplit(".", 1)[0]
+
+    async def _upload(key: str, data: bytes, width: int, height: int) -> tuple[str, dict]:
+        _, mime, ext, _ = _FORMATS.get(key, _FORMATS["webp"])
+        gcs_uri = await upload_rendition(f"renditions/{stem}/{key}_{width}x{height}.{ext}", data, mime)
+        return key, {"gcs_uri": gcs_uri, "width": width, "height": height, "bytes": len(data)}
+
+    try:
+        uploaded = await asyncio.gather(
+            *[_upload(key, *vals) for key, vals in rendered.items()]
+        )
+    except Exception as e:
+        logger.warning("Rendition upload failed for %s: %s", master_gcs_uri, e)
+        return {}
+    return dict(uploaded)
+
+
+async def store_generated_image(
+    image_bytes: bytes, mime_type: str, post_id: str, aspect: str,
+) -> tuple[str, str, dict]:
+    """Upload a generated image master plus its renditions.
+
+    Returns:
+        (url, gcs_uri, renditions) — master serving URL, master gs:// URI and
+        the ``create_renditions`` result.
+    """
+    url, gcs_uri = await upload_image_to_gcs(image_bytes, mime_type, post_id)
+    renditions = await create_renditions(gcs_uri, image_bytes, aspect)
+    return url, gcs_uri, renditions
+
+
+def compact_uri(post: dict, master_gcs_uri: Optional[str], fmt: str = "webp") -> Optional[str]:
+    """Rendition gs:// URI recorded on ``post`` for a master, if any."""
+    if not master_gcs_uri:
+        return None
+    entry = (post.get("image_renditions") or {}).get(master_gcs_uri) or {}
+    return (entry.get(fmt) or {}).get("gcs_uri")
+
+
+def thumbnail_uris(post: dict, master_gcs_uri: Optional[str]) -> dict[str, str]:
+    """``{"256": gs_uri, "512": gs_uri}`` for a master's thumbnails (may be empty)."""
+    if not master_gcs_uri:
+        return {}
+    entry = (post.get("image_renditions") or {}).get(master_gcs_uri) or {}
+    return {
+        str(size): entry[f"thumb_{size}"]["gcs_uri"]
+        for size in THUMBNAIL_SIZES
+        if (entry.get(f"thumb_{size}") or {}).get("gcs_uri")
+    }
@@ -1,6 +1,8 @@
 """Notion REST API wrapper for OAuth + content calendar export."""
 
 import base64
+import hashlib
+import json
 import logging
 from typing import Optional
 
@@ -172,6 +174,134 @@ async def create_page(
         return resp.json()
 
 
+def content_hash(post: dict, day_index: int, platform: str) -> str:
+    """Hash the post fields that are mirrored into Notion.
+
+    Used by the incremental sync to decide whether an already-exported page
+    needs a PATCH. Signed image URLs are deliberately excluded — they rotate
+    on every read and would make every page look dirty.
+    """
+    payload = {
+        "caption": post.get("caption", ""),
+        "hashtags": list(post.get("hashtags", []) or []),
+        "status": post.get("status", "draft"),
+        "posting_time": post.get("posting_time", ""),
+        "theme": post.get("theme", ""),
+        "content_type": post.get("content_type", "photo"),
+        "day_index": day_index,
+        "platform": platform,
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def body_hash(post: dict) -> str:
+    """Hash only the fields rendered into the page body (caption + hashtags)."""
+    raw = json.dumps(
+        [post.get("caption", ""), list(post.get("hashtags", []) or [])],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def update_page(
+    access_token: str,
+    page_id: str,
+    post: dict,
+    day_index: int,
+    platform: str,
+    replace_body: bool = False,
+) -> dict:
+    """PATCH an existing page's properties, optionally rewriting its body.
+
+    Raises:
+        LookupError: the page no longer exists (deleted or archived in Notion),
+            so the caller should create a fresh one.
+        PermissionError: the access token is no longer valid.
+    """
+    properties = _build_post_properties(post, day_index, platform)
+
+    async with httpx.AsyncClient() as client:
+        resp = await client.patch(
+            f"{NOTION_API}/pages/{page_id}",
+            headers=_headers(access_token),
+            json={"properties": properties},
+        )
+        if resp.status_code == 401:
+            raise PermissionError("Notion token expired. Please reconnect.")
+        if resp.status_code == 404:
+            raise LookupError(f"Notion page {page_id} not found")
+        if resp.status_code == 400 and "archived" in resp.text.lower():
+            raise LookupError(f"Notion page {page_id} is archived")
+        resp.raise_for_status()
+        page = resp.json()
+
+        if replace_body:
+            await _replace_page_body(
+                client, access_token, page_id,
+                _build_page_body(post.get("caption", ""), post.get("hashtags", [])),
+            )
+
+    return page
+
+
+async def _replace_page_body(
+    client: httpx.AsyncClient,
+    access_token: str,
+    page_id: str,
+    blocks: list[dict],
+) -> None:
+    """Delete the page's existing child blocks and append a fresh body."""
+    cursor: Optional[str] = None
+    existing: list[str] = []
+    while True:
+        params = {"page_size": 100}
+        if cursor:
+            params["start_cursor"] = cursor
+        resp = await client.get(
+            f"{NOTION_API}/blocks/{page_id}/children",
+            headers=_headers(access_token),
+            params=params,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        existing.extend(b["id"] for b in data.get("results", []))
+        if not data.get("has_more"):
+            break
+        cursor = data.get("next_cursor")
+
+    for block_id in existing:
+        resp = await client.delete(
+            f"{NOTION_API}/blocks/{block_id}",
+            headers=_headers(access_token),
+        )
+        if resp.status_code != 404:
+            resp.raise_for_status()
+
+    if blocks:
+        resp = await client.patch(
+            f"{NOTION_API}/blocks/{page_id}/children",
+            headers=_headers(access_token),
+            json={"children": blocks},
+        )
+        resp.raise_for_status()
+
+
+async def archive_page(access_token: str, page_id: str) -> None:
+    """Archive (soft-delete) a page. Missing pages are treated as already archived."""
+    async with httpx.AsyncClient() as client:
+        resp = await client.patch(
+            f"{NOTION_API}/pages/{page_id}",
+            headers=_headers(access_token),
+            json={"archived": True},
+        )
+        if resp.status_code == 401:
+            raise PermissionError("Notion token expired. Please reconnect.")
+        if resp.status_code == 404:
+            return
+        resp.raise_for_status()
+
+
 async def ensure_database_schema(access_token: str, database_id: str) -> None:
     """Add missing properties to the target database so exports don't fail.
 
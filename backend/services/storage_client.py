@@ -1,9 +1,11 @@
+import io
 import logging
 import re
 import uuid
 import asyncio
+import threading
 from datetime import timedelta
-from typing import Optional
+from typing import AsyncIterator, Optional
 from google.cloud import storage
 from backend.config import GCS_BUCKET_NAME, GCP_PROJECT_ID
 
@@ -29,6 +31,133 @@ def get_bucket() -> storage.Bucket:
     return get_storage_client().bucket(GCS_BUCKET_NAME)
 
 
+# ── Chunked transfers ─────────────────────────────────────────
+#
+# Video objects are moved in fixed-size chunks so peak memory per transfer is
+# bounded by _CHUNK_SIZE regardless of object size. Each blocking GCS call
+# runs in the default executor, one chunk at a time.
+
+# Resumable-upload chunks must be a multiple of 256 KiB
+_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def _blob_path_from_uri(gcs_uri: str) -> str:
+    prefix = f"gs://{GCS_BUCKET_NAME}/"
+    if not gcs_uri.startswith(prefix):
+        raise ValueError(f"Invalid GCS URI for bucket {GCS_BUCKET_NAME!r}: {gcs_uri!r}")
+    return gcs_uri[len(prefix):]
+
+
+class _AsyncStreamReader(io.RawIOBase):
+    """Blocking, read-only file view of an async byte stream.
+
+    ``read`` runs on a worker thread and pulls chunks from the stream on the
+    event loop, so at most one ``read`` request's worth of bytes is buffered.
+    Raising from ``read`` (size cap, cancelled request) makes
+    ``upload_from_file`` fail without finalizing the object.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], loop, max_bytes: Optional[int]) -> None:
+        self._chunks = chunks.__aiter__()
+        self._loop = loop
+        self._max_bytes = max_bytes
+        self._buffer = bytearray()
+        self._pos = 0
+        self._eof = False
+        self.aborted = False
+
+    def readable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    async def _next_chunk(self) -> Optional[bytes]:
+        try:
+            return await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            if self.aborted:
+                raise ValueError("Upload aborted")
+            chunk = asyncio.run_coroutine_threadsafe(self._next_chunk(), self._loop).result()
+            if chunk is None:
+                self._eof = True
+                break
+            self._buffer += chunk
+            if self._max_bytes is not None and self._pos + len(self._buffer) > self._max_bytes:
+                raise ValueError(f"Upload exceeds {self._max_bytes} bytes")
+        n = len(self._buffer) if size < 0 else min(size, len(self._buffer))
+        data = bytes(self._buffer[:n])
+        del self._buffer[:n]
+        self._pos += n
+        return data
+
+
+async def upload_stream_to_blob(
+    blob_path: str,
+    chunks: AsyncIterator[bytes],
+    content_type: str,
+    max_bytes: Optional[int] = None,
+) -> int:
+    """Write an async byte stream to a blob via a resumable upload.
+
+    Bytes go up in _CHUNK_SIZE pieces, so about one chunk is held in memory.
+    If ``max_bytes`` is exceeded the upload fails before the object is
+    finalized and ValueError is raised. Returns the number of bytes written.
+    """
+    blob = get_bucket().blob(blob_path, chunk_size=_CHUNK_SIZE)
+    reader = _AsyncStreamReader(chunks, asyncio.get_running_loop(), max_bytes)
+    try:
+        # An unfinished resumable session is never committed; it just expires
+        await asyncio.to_thread(blob.upload_from_file, reader, content_type=content_type)
+    except BaseException:
+        reader.aborted = True
+        raise
+    return reader.tell()
+
+
+async def upload_file_to_blob(blob_path: str, file_path: str, content_type: str) -> None:
+    """Upload a local file in _CHUNK_SIZE resumable chunks."""
+    blob = get_bucket().blob(blob_path, chunk_size=_CHUNK_SIZE)
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(
+        None,
+        lambda: blob.upload_from_filename(file_path, content_type=content_type),
+    )
+
+
+async def stream_blob(
+    gcs_uri: str,
+    start: int = 0,
+    end: Optional[int] = None,
+    chunk_size: int = _CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """Yield an object's bytes in chunks, optionally limited to [start, end].
+
+    ``end`` is inclusive, matching HTTP Range semantics.
+    """
+    blob = get_bucket().blob(_blob_path_from_uri(gcs_uri))
+    loop = asyncio.get_running_loop()
+    reader = await loop.run_in_executor(None, lambda: blob.open("rb", chunk_size=chunk_size))
+    try:
+        if start:
+            await loop.run_in_executor(None, reader.seek, start)
+        remaining = None if end is None else end - start + 1
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            chunk = await loop.run_in_executor(None, reader.read, size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+    finally:
+        await loop.run_in_executor(None, reader.close)
+
+
 async def _get_serving_url(blob: storage.Blob, blob_path: str,
                             expiration: timedelta = timedelta(days=7)) -> str:
     """Try to generate a signed URL; fall back to a backend proxy URL.
@@ -49,6 +178,12 @@ async def _get_serving_url(blob: storage.Blob, blob_path: str,
         return f"/api/storage/serve/{blob_path}"
 
 
+def _seed_media_cache(gcs_uri: str, blob: storage.Blob, data: bytes) -> None:
+    """Cache freshly uploaded bytes — they are usually read back soon (edits, Veo)."""
+    from backend.services import media_cache
+    media_cache.put(gcs_uri, blob.generation, data)
+
+
 async def upload_image_to_gcs(image_bytes: bytes, mime_type: str,
                                post_id: Optional[str] = None) -> tuple[str, str]:
     """Upload generated image bytes to GCS.
@@ -71,9 +206,27 @@ async def upload_image_to_gcs(image_bytes: bytes, mime_type: str,
     )
 
     gcs_uri = f"gs://{GCS_BUCKET_NAME}/{blob_path}"
+    _seed_media_cache(gcs_uri, blob, image_bytes)
     url = await _get_serving_url(blob, blob_path)
     return url, gcs_uri
 
+async def upload_rendition(blob_path: str, data: bytes, mime_type: str) -> str:
+    """Upload a derived image rendition. Returns its gs:// URI."""
+    bucket = get_bucket()
+    blob = bucket.blob(blob_path)
+    # Renditions are write-once; let browsers and CDNs keep them
+    blob.cache_control = "public, max-age=31536000, immutable"
+
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(
+        None,
+        lambda: blob.upload_from_string(data, content_type=mime_type)
+    )
+
+    gcs_uri = f"gs://{GCS_BUCKET_NAME}/{blob_path}"
+    _seed_media_cache(gcs_uri, blob, data)
+    return gcs_uri
+
 async def upload_brand_asset(brand_id: str, file_bytes: bytes,
                               filename: str, mime_type: str) -> str:
     """Upload user brand asset (logo, product photo, PDF). Returns GCS URI."""
@@ -132,88 +285,137 @@ async def upload_byop_photo(
     )
 
     gcs_uri = f"gs://{GCS_BUCKET_NAME}/{blob_path}"
+    _seed_media_cache(gcs_uri, blob, file_bytes)
     url = await _get_serving_url(blob, blob_path)
     return url, gcs_uri
 
 
-async def upload_video_to_gcs(video_bytes: bytes, post_id: str) -> tuple[str, str]:
-    """Upload generated MP4 video bytes to GCS.
+async def upload_video_stream_to_gcs(
+    chunks: AsyncIterator[bytes], post_id: str,
+) -> tuple[str, str]:
+    """Stream a generated MP4 into GCS chunk by chunk.
 
     Returns:
         (signed_url, gcs_uri) — 7-day signed URL and the gs:// URI.
     """
     blob_path = f"generated/{post_id}/video_{uuid.uuid4().hex[:8]}.mp4"
-    bucket = get_bucket()
-    blob = bucket.blob(blob_path)
-
-    loop = asyncio.get_running_loop()
-    await loop.run_in_executor(
-        None,
-        lambda: blob.upload_from_string(video_bytes, content_type="video/mp4"),
-    )
+    await upload_stream_to_blob(blob_path, chunks, "video/mp4")
 
     gcs_uri = f"gs://{GCS_BUCKET_NAME}/{blob_path}"
-    url = await _get_serving_url(blob, blob_path)
+    url = await _get_serving_url(get_bucket().blob(blob_path), blob_path)
     return url, gcs_uri
 
 
 async def upload_raw_video_source(
     brand_id: str,
     job_id: str,
-    video_bytes: bytes,
+    chunks: AsyncIterator[bytes],
     filename: str,
-) -> str:
-    """Upload a user-supplied raw video to GCS for processing.
+    max_bytes: Optional[int] = None,
+) -> tuple[str, int]:
+    """Stream a user-supplied raw video to GCS for processing.
 
     Returns:
-        gcs_uri — gs:// path for downstream processing.
+        (gcs_uri, size) — gs:// path for downstream processing and bytes written.
+
+    Raises:
+        ValueError: the stream exceeded ``max_bytes``.
     """
     safe_name = _safe_filename(filename)
     blob_path = f"repurpose/{brand_id}/{job_id}/source_{safe_name}"
-    bucket = get_bucket()
-    blob = bucket.blob(blob_path)
 
     # Preserve correct MIME type for MOV vs MP4
     mime = "video/quicktime" if filename.lower().endswith(".mov") else "video/mp4"
 
-    loop = asyncio.get_running_loop()
-    await loop.run_in_executor(
-        None,
-        lambda: blob.upload_from_string(video_bytes, content_type=mime),
-    )
-
-    return f"gs://{GCS_BUCKET_NAME}/{blob_path}"
+    size = await upload_stream_to_blob(blob_path, chunks, mime, max_bytes=max_bytes)
+    return f"gs://{GCS_BUCKET_NAME}/{blob_path}", size
 
 
 async def upload_repurposed_clip(
     brand_id: str,
     job_id: str,
-    clip_bytes: bytes,
+    clip_path: str,
     clip_filename: str,
 ) -> str:
-    """Upload a processed short-form clip to GCS.
+    """Upload a processed short-form clip to GCS straight from local disk.
 
     Returns:
         gcs_uri — gs:// path. Generate signed URLs at query time via get_signed_url()
         to avoid embedding expiring URLs in durable Firestore documents.
     """
     blob_path = f"repurpose/{brand_id}/{job_id}/clips/{clip_filename}"
-    bucket = get_bucket()
-    blob = bucket.blob(blob_path)
+    await upload_file_to_blob(blob_path, clip_path, "video/mp4")
+    return f"gs://{GCS_BUCKET_NAME}/{blob_path}"
+
+
+async def download_gcs_uri_to_file(gcs_uri: str, dest_path: str) -> None:
+    """Stream a gs:// object to a local file without buffering it in memory.
+
+    The copy runs on a worker thread one _CHUNK_SIZE chunk at a time. If the
+    awaiting task is cancelled, the worker stops at the next chunk boundary
+    and the cancellation only propagates once it has closed the file, so the
+    caller can safely remove ``dest_path`` afterwards.
+    """
+    blob = get_bucket().blob(_blob_path_from_uri(gcs_uri))
+    stop = threading.Event()
+
+    def _copy() -> None:
+        with blob.open("rb", chunk_size=_CHUNK_SIZE) as reader, open(dest_path, "wb") as f:
+            while not stop.is_set():
+                chunk = reader.read(_CHUNK_SIZE)
+                if not chunk:
+                    return
+                f.write(chunk)
+
+    copy = asyncio.get_running_loop().run_in_executor(None, _copy)
+    try:
+        await asyncio.shield(copy)
+    except asyncio.CancelledError:
+        stop.set()
+        await asyncio.gather(copy, return_exceptions=True)
+        raise
+
+
+async def cache_blob_to_disk(gcs_uri: str, generation: Optional[int] = None) -> str:
+    """Return a local media-cache path for a gs:// object, downloading on a miss."""
+    from backend.services import media_cache
 
+    blob_path = gcs_uri.replace(f"gs://{GCS_BUCKET_NAME}/", "")
+    blob = get_bucket().blob(blob_path, chunk_size=_CHUNK_SIZE, generation=generation)
     loop = asyncio.get_running_loop()
-    await loop.run_in_executor(
-        None,
-        lambda: blob.upload_from_string(clip_bytes, content_type="video/mp4"),
-    )
 
-    return f"gs://{GCS_BUCKET_NAME}/{blob_path}"
+    async def _download(dest_path: str) -> None:
+        await loop.run_in_executor(None, lambda: blob.download_to_filename(dest_path))
+
+    return await media_cache.fetch_to_disk(gcs_uri, generation, _download)
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
 
 
 async def download_gcs_uri(gcs_uri: str) -> bytes:
-    """Download bytes from a gs:// URI directly via the GCS client."""
+    """Download bytes from a gs:// URI, served from the local media cache when possible."""
+    from backend.services import media_cache
+
     blob_path = gcs_uri.replace(f"gs://{GCS_BUCKET_NAME}/", "")
     bucket = get_bucket()
-    blob = bucket.blob(blob_path)
     loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, blob.download_as_bytes)
+
+    generation = None
+    if not media_cache.is_immutable(blob_path):
+        # Overwritable path — only trust a cached copy of the live generation
+        meta = await loop.run_in_executor(None, bucket.get_blob, blob_path)
+        if meta is None:
+            # Let the download raise the usual NotFound
+            return await loop.run_in_executor(None, bucket.blob(blob_path).download_as_bytes)
+        generation = meta.generation
+
+    data = media_cache.get_memory(gcs_uri, generation)
+    if data is not None:
+        return data
+    path = await cache_blob_to_disk(gcs_uri, generation)
+    data = await loop.run_in_executor(None, _read_file, path)
+    media_cache.promote(gcs_uri, generation, data)
+    return data
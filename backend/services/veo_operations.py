@@ -0,0 +1,133 @@
+"""Shared poller for long-running Veo ``generate_videos`` operations.
+
+Every in-flight generation registers its operation here instead of running
+its own sleep/poll loop. A single background task refreshes all pending
+operations in one worker thread per cycle, backing off while nothing
+finishes, and resolves one future per operation.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+from google import genai
+from google.genai import types
+
+from backend.config import GOOGLE_API_KEY
+
+logger = logging.getLogger(__name__)
+
+# Veo clips take minutes; polling faster than this only burns quota
+_MIN_POLL_INTERVAL_S = 8.0
+_MAX_POLL_INTERVAL_S = 30.0
+_POLL_BACKOFF = 1.5
+
+# Default ceiling per operation: 20 minutes
+DEFAULT_TIMEOUT_S = 20 * 60
+
+
+@dataclass
+class _Pending:
+    operation: object
+    future: asyncio.Future
+    deadline: float
+
+
+class VeoOperationsManager:
+    """Tracks pending Veo operations and polls them in one batched loop."""
+
+    def __init__(self):
+        self._client: genai.Client | None = None
+        self._pending: dict[str, _Pending] = {}
+        self._poll_task: asyncio.Task | None = None
+        self._interval = _MIN_POLL_INTERVAL_S
+
+    def _get_client(self) -> genai.Client:
+        if self._client is None:
+            self._client = genai.Client(api_key=GOOGLE_API_KEY)
+        return self._client
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def wait(self, operation, timeout: float = DEFAULT_TIMEOUT_S):
+        """Wait until ``operation`` is done and return its final state.
+
+        Concurrent waiters on the same operation name share one poll entry.
+        Cancelling a waiter does not stop polling for the others.
+
+        Raises:
+            TimeoutError: the operation did not finish within ``timeout``.
+        """
+        if operation.done:
+            return operation
+        entry = self._pending.get(operation.name)
+        if entry is None:
+            entry = _Pending(
+                operation=operation,
+                future=asyncio.get_running_loop().create_future(),
+                deadline=time.monotonic() + timeout,
+            )
+            self._pending[operation.name] = entry
+            # New work: drop back to the fastest cadence
+            self._interval = _MIN_POLL_INTERVAL_S
+            if self._poll_task is None or self._poll_task.done():
+                self._poll_task = asyncio.create_task(self._poll_loop())
+        return await asyncio.shield(entry.future)
+
+    async def wait_for_name(self, operation_name: str, timeout: float = DEFAULT_TIMEOUT_S):
+        """Resume waiting on an operation known only by its persisted name."""
+        return await self.wait(types.GenerateVideosOperation(name=operation_name), timeout)
+
+    def _poll_batch(self, operations: list) -> list:
+        """Refresh every operation in one worker thread; errors are returned, not raised."""
+        client = self._get_client()
+        results = []
+        for op in operations:
+            try:
+                results.append(client.operations.get(op))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def _poll_loop(self) -> None:
+        while self._pending:
+            await asyncio.sleep(self._interval)
+            entries = list(self._pending.items())
+            results = await asyncio.to_thread(
+                self._poll_batch, [entry.operation for _, entry in entries],
+            )
+
+            any_done = False
+            now = time.monotonic()
+            for (name, entry), result in zip(entries, results):
+                if isinstance(result, Exception):
+                    # Transient API errors keep the operation pending until its deadline
+                    logger.warning("Veo poll failed for %s: %s", name, result)
+                else:
+                    entry.operation = result
+                    if result.done:
+                        any_done = True
+                        self._pending.pop(name, None)
+                        if not entry.future.done():
+                            entry.future.set_result(result)
+                        continue
+                if now > entry.deadline:
+                    self._pending.pop(name, None)
+                    if not entry.future.done():
+                        entry.future.set_exception(TimeoutError(
+                            f"Veo operation {name} did not finish in time"
+                        ))
+
+            if any_done:
+                self._interval = _MIN_POLL_INTERVAL_S
+            else:
+                self._interval = min(self._interval * _POLL_BACKOFF, _MAX_POLL_INTERVAL_S)
+            logger.info(
+                "Veo poll: %d pending, next poll in %.0fs", len(self._pending), self._interval,
+            )
+
+
+operations_manager = VeoOperationsManager()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Microbenchmark for backend/agents/caption_text.py.
+
+Runs each caption post-processing helper and the implementation it replaced
+over a small corpus of realistic captions, reports any output differences
+and the per-call time of both. strip_markdown is also compared on random
+strings of markdown characters.
+
+Usage:
+    python scripts/bench_caption_text.py [--number 2000] [--fuzz 20000]
+"""
+
+import argparse
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.agents import caption_text  # noqa: E402
+from backend.agents.caption_text import (  # noqa: E402
+    _BANNED_OPENERS_RE,
+    _DISCOURSE_MARKER_RE,
+    _HASHTAG_STOPWORDS,
+    _VALID_HASHTAG_RE,
+    _VAGUE_SOCIAL_PROOF_RE,
+)
+from backend.platforms import get as get_platform  # noqa: E402
+
+
+# ── Previous implementations (from agents/content_creator.py) ────────────────
+
+def legacy_fix_mojibake(text: str) -> str:
+    """Detect and repair UTF-8→CP1252 double-encoding artifacts (quotes, dashes, emojis).
+
+    Works by reversing the double-encoding: encode mojibake chars back to CP1252
+    bytes, then decode as UTF-8. Characters that aren't CP1252-encodable (real emojis)
+    are preserved as-is. Non-mojibake Latin chars (é, ñ, etc.) survive via surrogate
+    round-trip back to their original CP1252 character.
+    """
+    # Quick check: mojibake from CP1252 always involves these starter chars
+    if not any(c in text for c in "âÃðÂ"):
+        return text
+
+    result: list[str] = []
+    buf: list[str] = []
+
+    for ch in text:
+        try:
+            ch.encode("cp1252")
+            buf.append(ch)
+        except UnicodeEncodeError:
+            # Non-CP1252 char (e.g. real emoji U+1F4xx) — flush buffer, keep char
+            if buf:
+                result.append(_legacy_roundtrip_cp1252(buf))
+                buf = []
+            result.append(ch)
+
+    if buf:
+        result.append(_legacy_roundtrip_cp1252(buf))
+
+    return "".join(result)
+
+
+def _legacy_roundtrip_cp1252(buf: list[str]) -> str:
+    """Reverse CP1252 mojibake in a buffer of CP1252-encodable chars."""
+    chunk = "".join(buf)
+    try:
+        raw = chunk.encode("cp1252")
+        decoded = raw.decode("utf-8", errors="surrogateescape")
+        # Surrogates represent bytes that weren't valid UTF-8 — map them back
+        # to the original CP1252 character (e.g. 0xE9 → é)
+        out: list[str] = []
+        for ch in decoded:
+            if "\udc80" <= ch <= "\udcff":
+                byte_val = ord(ch) - 0xDC00
+                out.append(bytes([byte_val]).decode("cp1252"))
+            else:
+                out.append(ch)
+        return "".join(out)
+    except (UnicodeDecodeError, UnicodeEncodeError):
+        return chunk
+
+
+def legacy_sanitize_hashtags(raw_tags: list[str], platform: str) -> list[str]:
+    """Clean and validate hashtags, enforcing per-platform limits."""
+    limit = get_platform(platform).hashtag_limit
+    clean = []
+    for tag in raw_tags:
+        tag = tag.strip().lstrip("#").strip()
+        if len(tag) < 3:
+            continue
+        if tag.lower() in _HASHTAG_STOPWORDS:
+            continue
+        if not _VALID_HASHTAG_RE.match(tag):
+            continue
+        # Mastodon: CamelCase hashtags for screen reader accessibility
+        if platform == "mastodon":
+            tag = ''.join(word.capitalize() for word in re.findall(r'[a-zA-Z][a-z]*|[0-9]+', tag))
+        clean.append(tag)
+    return clean[:limit]
+
+
+def legacy_strip_markdown(text: str) -> str:
+    """Remove markdown formatting that social platforms can't render."""
+    text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
+    text = re.sub(r'\*(.+?)\*', r'\1', text)
+    text = re.sub(r'__(.+?)__', r'\1', text)
+    text = re.sub(r'_(.+?)_', r'\1', text)
+    text = re.sub(r'\[(.+?)\]\(.+?\)', r'\1', text)
+    text = re.sub(r'^#{1,6}\s+', '', text, flags=re.MULTILINE)
+    # Strip markdown bullet lists: "* item" or "- item" at line start
+    text = re.sub(r'^\s*[\*\-]\s+', '', text, flags=re.MULTILINE)
+    return text
+
+
+def legacy_check_quality_violations(caption: str, platform: str, derivative_type: str) -> list[str]:
+    """Lightweight regex safety net for literal violations the self-review missed."""
+    violations = []
+    first_line = caption.split("\n")[0].strip()
+    if derivative_type == "carousel" and "Slide 1" in caption:
+        m = re.search(r"Slide\s*1[:\-\u2013]\s*(.*?)(?:\n|$)", caption, re.IGNORECASE)
+        if m:
+            first_line = m.group(1).strip()
+    if platform != "pinterest":
+        # Check each sentence in the opening line, stripping discourse markers
+        # to catch variants like "But what if" → "what if" (already banned)
+        for sentence in re.split(r'[.?!:]\s+', first_line):
+            cleaned = _DISCOURSE_MARKER_RE.sub("", sentence.strip())
+            if cleaned and _BANNED_OPENERS_RE.match(cleaned):
+                violations.append(f"BANNED_HOOK: '{sentence.strip()[:60]}'")
+                break
+    m = _VAGUE_SOCIAL_PROOF_RE.search(caption)
+    if m:
+        violations.append(f"VAGUE_SOCIAL_PROOF: '{m.group()}'")
+    if len(re.findall(r"!\s", caption + " ")) > 1:
+        violations.append("EXCLAMATION_SPAM")
+    return violations
+
+
+# ── Corpus ───────────────────────────────────────────────────────────────────
+
+def _mojibake(text: str) -> str:
+    return text.encode("utf-8").decode("cp1252", errors="ignore")
+
+
+_CLEAN = [
+    "Most founders price by gut feel. Here's the fix.\n\n"
+    "Start with your real cost per hour — it's the floor. Then add the margin you need to grow.\n\n"
+    "What's your floor price?",
+    "Slide 1: Pricing is a signal.\nSlide 2: Cheap says risky. Premium says safe.\n"
+    "Slide 3: Raise it once. Watch who stays.\nSave this for your next quote.",
+    "1/ Your onboarding email is doing too much.\n2/ Cut it to one action.\n3/ Measure replies, not opens.",
+    "PIN TITLE: 5-minute pantry reset\nPIN DESCRIPTION: A café-style shelf system that actually sticks 🚀",
+    "Did you know most clients never read past line one! Fix the hook! Then the rest!",
+    "But what if countless businesses are overpaying? Here's how to check in 10 minutes.",
+    "Plain caption with no formatting and nothing to repair at all, just words. " * 4,
+]
+_MARKDOWN = [
+    "**Bold hook** that *matters*.\n- first point\n- second point\n## Heading\nSee [our guide](https://x.y).",
+    "__Underlined__ and _italic_ text with **nested *emphasis* inside**.",
+    "* bullet one\n* bullet two\n\nClosing line with **strong** ask?",
+    # Edge cases where pass order and multi-line \s matter
+    "**bold with *italic***",
+    "Intro\n\n- one",
+    "# \nText",
+    "***triple*** and _mixed **both**_ with [**bold link**](https://x.y)",
+    "-\n-\n\n* \n#\t\n## two\n\n\n- three",
+]
+CORPUS = _CLEAN + _MARKDOWN + [_mojibake(c) for c in _CLEAN + _MARKDOWN]
+HASHTAGS = [
+    ["#SmallBusiness", "#pricing", "the", "#ok", "#growth-hacks", "#Marketing101", "#coffee_shop", "#tips"],
+    ["#a", "#bb", "#ccc", "#dddd", "#eeeee", "#ffffff", "#ggggggg"],
+]
+PLATFORMS = ["instagram", "linkedin", "x", "mastodon", "pinterest"]
+# Random strings over markdown characters for the strip_markdown parity check
+_FUZZ_ALPHABET = "*_[]()#- \n\tab"
+
+
+def _fuzz_markdown(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return ["".join(rng.choice(_FUZZ_ALPHABET) for _ in range(rng.randint(0, 40))) for _ in range(count)]
+
+
+# ── Benchmark ────────────────────────────────────────────────────────────────
+
+def _cases():
+    yield "fix_mojibake", legacy_fix_mojibake, caption_text.fix_mojibake, [(c,) for c in CORPUS]
+    yield "strip_markdown", legacy_strip_markdown, caption_text.strip_markdown, [(c,) for c in CORPUS]
+    yield (
+        "check_quality_violations",
+        legacy_check_quality_violations,
+        caption_text.check_quality_violations,
+        [(c, p, d) for c in CORPUS for p in PLATFORMS[:2] for d in ("original", "carousel")],
+    )
+    yield (
+        "sanitize_hashtags",
+        legacy_sanitize_hashtags,
+        caption_text.sanitize_hashtags,
+        [(tags, p) for tags in HASHTAGS for p in PLATFORMS],
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--number", type=int, default=2000, help="passes over the corpus per timing")
+    parser.add_argument("--fuzz", type=int, default=20000, help="random markdown strings to compare")
+    args = parser.parse_args()
+
+    differences = 0
+    fuzz_differences = 0
+    for text in _fuzz_markdown(args.fuzz):
+        if legacy_strip_markdown(text) != caption_text.strip_markdown(text):
+            fuzz_differences += 1
+            if fuzz_differences <= 5:
+                print(f"  strip_markdown differs for fuzz input {text!r}")
+    print(f"strip_markdown fuzz: {fuzz_differences} of {args.fuzz} inputs differ")
+    differences += fuzz_differences
+
+    print(f"{'function':<26} {'old µs/call':>12} {'new µs/call':>12} {'speedup':>8}")
+    for name, old, new, inputs in _cases():
+        for call_args in inputs:
+            expected, actual = old(*call_args), new(*call_args)
+            if expected != actual:
+                differences += 1
+                print(f"  {name} differs for {call_args[0]!r:.80}:\n    old {expected!r}\n    new {actual!r}")
+        calls = args.number * len(inputs)
+        old_s = timeit.timeit(lambda: [old(*a) for a in inputs], number=args.number)
+        new_s = timeit.timeit(lambda: [new(*a) for a in inputs], number=args.number)
+        print(f"{name:<26} {old_s / calls * 1e6:>12.2f} {new_s / calls * 1e6:>12.2f} {old_s / new_s:>7.1f}x")
+    print(f"{differences} output difference(s)")
+
+
+if __name__ == "__main__":
+    main()
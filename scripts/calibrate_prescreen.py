@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Calibrate the local pre-review scorer against stored LLM review scores.
+
+Reads every post with an LLM review from Firestore, scores it with
+backend/agents/caption_scorer.py and writes the pass/fail penalty thresholds
+to REVIEW_PRESCREEN_CALIBRATION (backend/prescreen_calibration.json by
+default). Restart the backend to pick up a new calibration.
+
+Usage:
+    python scripts/calibrate_prescreen.py [--min-precision 0.95] [--min-support 20] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import sys
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.agents import caption_scorer  # noqa: E402
+from backend.services.firestore_client import get_client  # noqa: E402
+
+
+async def _collect_samples() -> list[tuple[int, int]]:
+    db = get_client()
+    # Score every caption against "always review" thresholds so no verdict
+    # logic leaks into the raw penalties
+    neutral = caption_scorer.Calibration(pass_max_penalty=None, fail_min_penalty=None)
+    samples: list[tuple[int, int]] = []
+    async for snap in db.collection_group("posts").stream():
+        post = snap.to_dict() or {}
+        review = post.get("review") or {}
+        if not post.get("caption") or "score" not in review or review.get("source") == "prescreen":
+            continue
+        result = caption_scorer.score_caption(
+            post["caption"],
+            post.get("hashtags") or [],
+            post.get("platform", "instagram"),
+            post.get("derivative_type", "original"),
+            post.get("cta_type"),
+            calibration=neutral,
+        )
+        samples.append((result.penalty, int(review["score"])))
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--min-precision", type=float, default=0.95)
+    parser.add_argument("--min-support", type=int, default=20)
+    parser.add_argument("--dry-run", action="store_true", help="print the calibration without saving it")
+    args = parser.parse_args()
+
+    samples = asyncio.run(_collect_samples())
+    print(f"{len(samples)} reviewed posts")
+    for penalty, count in sorted(Counter(p for p, _ in samples).items()):
+        passed = sum(1 for p, s in samples if p == penalty and s >= 7)
+        print(f"  penalty {penalty:>2}: {count:>5} posts, {passed / count:.0%} passed review")
+
+    calibration = caption_scorer.calibrate(samples, args.min_precision, args.min_support)
+    print(calibration)
+    if not args.dry_run:
+        caption_scorer.save_calibration(calibration)
+        print(f"Saved to {caption_scorer.REVIEW_PRESCREEN_CALIBRATION}")
+
+
+if __name__ == "__main__":
+    main()
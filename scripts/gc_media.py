@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Collect bucket media that no Firestore document references.
+
+Runs one mark-and-sweep pass of backend/services/media_gc.py. Nothing is
+changed without --execute; a dry run reports what would be collected.
+
+Usage:
+    python scripts/gc_media.py [--execute] [--queue-only] [--tier-down COLDLINE]
+                               [--grace-hours 72] [--ops-per-second 50] [--prefix generated/ ...]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.config import MEDIA_GC_GRACE_HOURS, MEDIA_GC_MAX_OPS_PER_S  # noqa: E402
+from backend.services import media_gc  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--execute", action="store_true", help="delete or tier down (default is a dry run)")
+    parser.add_argument("--queue-only", action="store_true",
+                        help="only sweep the media_cleanup queue, without listing the bucket")
+    parser.add_argument("--tier-down", metavar="STORAGE_CLASS",
+                        help="move garbage to this storage class (e.g. COLDLINE, ARCHIVE) instead of deleting it")
+    parser.add_argument("--grace-hours", type=float, default=MEDIA_GC_GRACE_HOURS)
+    parser.add_argument("--ops-per-second", type=float, default=MEDIA_GC_MAX_OPS_PER_S)
+    parser.add_argument("--prefix", action="append", dest="prefixes",
+                        help="object prefix to sweep (repeatable; default MEDIA_GC_PREFIXES)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    stats = asyncio.run(media_gc.collect(
+        dry_run=not args.execute,
+        queue_only=args.queue_only,
+        tier_down=args.tier_down,
+        grace_hours=args.grace_hours,
+        ops_per_s=args.ops_per_second,
+        prefixes=args.prefixes,
+    ))
+    print(f"{stats.queue_entries} queued cleanup entries, {stats.listed} objects listed")
+    print(f"  kept: {stats.referenced} referenced, {stats.too_young} inside the grace period")
+    verb = "collected" if args.execute else "would collect"
+    print(f"  {verb}: {stats.collected} objects, {stats.collected_bytes / 1e6:.1f} MB listed size")
+    if stats.failed:
+        print(f"  failed: {stats.failed}")
+    for name in stats.sample:
+        print(f"    {name}")
+
+
+if __name__ == "__main__":
+    main()